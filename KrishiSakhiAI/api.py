@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from embedding_cache import get_embedding_cache
 
 try:
     from livestock_biosecurity.models import load_livestock_models, GaitAnalyzer, BehaviorAnalyzer
@@ -20,6 +21,7 @@ except:
 OLLAMA_URL = "http://localhost:11434"
 VECTOR_STORE_DIR = "agricultural_vector_store"
 SYSTEM_PROMPT = "You are KrishiSakhi, an advanced AI agricultural assistant. Provide practical farming advice warmly and clearly."
+embed_cache = get_embedding_cache("nomic-embed-text")
 
 class VectorStoreManager:
     def __init__(self, d):
@@ -27,6 +29,7 @@ class VectorStoreManager:
         self.index = None
         self.documents = []
         self.chunks_metadata = []
+        self.id_to_pos = {}
         self.loaded = False
     def load_vector_store(self):
         try:
@@ -39,6 +42,7 @@ class VectorStoreManager:
                 data = pickle.load(f)
                 self.documents = data['documents']
                 self.chunks_metadata = data['chunks_metadata']
+                self.id_to_pos = {vid: pos for pos, vid in enumerate(data.get('ids', range(len(self.documents))))}
             self.loaded = True
             print(f"Vector store loaded: {len(self.documents)} docs")
             return True
@@ -46,10 +50,14 @@ class VectorStoreManager:
             print(f"Vector store error: {e}")
             return False
     def get_embedding(self, text):
+        cached = embed_cache.get(text)
+        if cached is not None: return cached
         try:
             r = requests.post(f"{OLLAMA_URL}/api/embeddings", json={"model": "nomic-embed-text", "prompt": text}, timeout=30)
             r.raise_for_status()
-            return r.json()["embedding"]
+            emb = r.json()["embedding"]
+            embed_cache.put(text, emb)
+            return emb
         except: return None
     def search(self, query, k=3):
         if not self.loaded: return []
@@ -61,8 +69,9 @@ class VectorStoreManager:
         scores, indices = self.index.search(qa, k)
         results = []
         for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.documents) and score > 0.1:
-                results.append({"content": self.documents[idx], "metadata": self.chunks_metadata[idx], "score": float(score)})
+            pos = self.id_to_pos.get(int(idx))
+            if pos is not None and score > 0.1:
+                results.append({"content": self.documents[pos], "metadata": self.chunks_metadata[pos], "score": float(score)})
         return results
 
 def get_models():
@@ -152,12 +161,14 @@ def chat(req: ChatReq):
     msgs.append(cur)
     return StreamingResponse(stream_ollama(req.model, msgs, req.temperature), media_type="text/plain")
 
+gait_cv, behavior_cv = (GaitAnalyzer(), BehaviorAnalyzer()) if LIVESTOCK_AVAILABLE else (None, None)  # per-animal trends
+
 @app.post("/api/livestock/scan")
 def scan(req: LivestockReq):
     if not lm: return {"error": "Livestock models not available"}
     r = req.dict()
     return {"health": lm['health_predictor'].predict(r), "anomaly": lm['anomaly_detector'].predict(r),
             "gait": lm['gait_predictor'].predict(r), "disease": lm['disease_forecaster'].predict(r),
-            "gait_cv": GaitAnalyzer().analyze_gait(r), "behavior": BehaviorAnalyzer().analyze_behavior(r)}
+            "gait_cv": gait_cv.analyze_gait(r), "behavior": behavior_cv.analyze_behavior(r)}
 
 #app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
@@ -1,4 +1,5 @@
-import json, pickle, base64, requests, numpy as np
+import json, time, pickle, base64, numpy as np
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Optional
 from fastapi import FastAPI, UploadFile, File, Form
@@ -7,10 +8,18 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 import pandas as pd
+from embedding_cache import get_embedding_cache
+from query_cache import TTLCache, normalize_query
+from ollama_client import AsyncOllamaClient
 
 # ── Livestock models ─────────────────────────────────────────────
 try:
-    from livestock_biosecurity.models import load_livestock_models, GaitAnalyzer, BehaviorAnalyzer
+    from livestock_biosecurity.models import load_models as load_livestock_models
+    from livestock_biosecurity.cv_module import GaitAnalyzer, BehaviorAnalyzer
+    from livestock_biosecurity.batch_inference import score_herd, to_scan_rows, stream_scan_events, scan_readings
+    from livestock_biosecurity.micro_batching import MicroBatcher
+    from livestock_biosecurity.alert_system import BiosecurityAlertSystem
+    from livestock_biosecurity.alert_db import SQLiteAlertStore
     LIVESTOCK_AVAILABLE = True
 except:
     try:
@@ -20,7 +29,13 @@ except:
         LIVESTOCK_AVAILABLE = False
 
 OLLAMA_URL = "http://localhost:11434"
+ollama = AsyncOllamaClient(OLLAMA_URL)
 VECTOR_STORE_DIR = "agricultural_vector_store"
+LIVESTOCK_BACKEND = "compiled"  # or "sklearn"
+LIVESTOCK_TIER = "full"  # or "fast" (distilled disease forecaster, see train_livestock_models.py)
+SCAN_BATCH_WINDOW_MS = 5.0  # /api/livestock/scan micro-batching window
+SCAN_BATCH_MAX_ROWS = 64
+ALERT_DB_PATH = "alerts.db"  # shared by all workers and the Streamlit dashboard
 SYSTEM_PROMPT = """You are KrishiSakhi, an advanced AI agricultural assistant with deep expertise in Indian farming.
 You provide warm, practical advice on crop management, pest/disease identification, weather-based recommendations,
 sustainable methods, cost-effective solutions, soil health, irrigation, and market trends.
@@ -133,13 +148,19 @@ VET_RESOURCES = [
 ]
 
 # ── Vector Store ─────────────────────────────────────────────────
+embed_cache = get_embedding_cache("nomic-embed-text")
+
 class VectorStoreManager:
     def __init__(self, d):
         self.vector_store_dir = Path(d)
         self.index = None
         self.documents = []
         self.chunks_metadata = []
+        self.id_to_pos = {}
         self.loaded = False
+        # Keyed by normalized query; both are dropped whenever the store is (re)loaded
+        self.query_embeddings = TTLCache(maxsize=2048, ttl=24 * 3600)
+        self.query_results = TTLCache(maxsize=2048, ttl=3600)
 
     def load_vector_store(self):
         try:
@@ -152,6 +173,10 @@ class VectorStoreManager:
                 data = pickle.load(f)
                 self.documents = data['documents']
                 self.chunks_metadata = data['chunks_metadata']
+                # Incrementally built stores map vector IDs → chunk positions
+                self.id_to_pos = {vid: pos for pos, vid in enumerate(data.get('ids', range(len(self.documents))))}
+            self.query_embeddings.clear()
+            self.query_results.clear()
             self.loaded = True
             print(f"✅ Vector store: {len(self.documents)} docs")
             return True
@@ -159,36 +184,48 @@ class VectorStoreManager:
             print(f"⚠️  Vector store: {e}")
             return False
 
-    def get_embedding(self, text):
+    async def get_embedding(self, text):
+        cached = embed_cache.get(text)
+        if cached is not None: return cached
         try:
-            r = requests.post(f"{OLLAMA_URL}/api/embeddings", json={"model":"nomic-embed-text","prompt":text}, timeout=30)
-            r.raise_for_status()
-            return r.json()["embedding"]
+            emb = await ollama.embed(text, "nomic-embed-text", timeout=30)
+            embed_cache.put(text, emb)
+            return emb
         except: return None
 
-    def search(self, query, k=3):
+    async def search(self, query, k=3):
         if not self.loaded: return []
         import faiss
-        emb = self.get_embedding(query)
-        if emb is None: return []
-        qa = np.array([emb]).astype('float32')
-        faiss.normalize_L2(qa)
-        scores, indices = self.index.search(qa, k)
-        return [{"content": self.documents[idx], "metadata": self.chunks_metadata[idx], "score": float(score)}
-                for score, idx in zip(scores[0], indices[0]) if idx < len(self.documents) and score > 0.1]
+        key = normalize_query(query)
+        hits = self.query_results.get((key, k))
+        if hits is None:
+            emb = self.query_embeddings.get(key)
+            if emb is None:
+                emb = await self.get_embedding(query)
+                if emb is None: return []
+                self.query_embeddings.put(key, emb)
+            qa = np.array([emb]).astype('float32')
+            faiss.normalize_L2(qa)
+            scores, indices = self.index.search(qa, k)
+            hits = [(int(idx), float(score)) for score, idx in zip(scores[0], indices[0])]
+            self.query_results.put((key, k), hits)
+        hits = [(score, self.id_to_pos.get(idx)) for idx, score in hits]
+        return [{"content": self.documents[pos], "metadata": self.chunks_metadata[pos], "score": score}
+                for score, pos in hits if pos is not None and score > 0.1]
+
+    def cache_stats(self):
+        return {"query_embeddings": self.query_embeddings.stats(),
+                "query_results": self.query_results.stats(),
+                "embedding_cache": embed_cache.stats()}
 
 # ── Helpers ──────────────────────────────────────────────────────
-def get_models():
+async def get_models():
     try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        if r.status_code == 200:
-            return [m["name"] for m in r.json().get("models", []) if 'embed' not in m["name"].lower()]
-        return []
+        return [m["name"] for m in await ollama.tags(timeout=5) if 'embed' not in m["name"].lower()]
     except: return []
 
-def check_ollama():
-    try: return requests.get(f"{OLLAMA_URL}/api/tags", timeout=5).status_code == 200
-    except: return False
+async def check_ollama():
+    return await ollama.is_up(timeout=5)
 
 def build_prompt(query, docs, farmer=None, language="English"):
     ctx = ""
@@ -202,25 +239,26 @@ def build_prompt(query, docs, farmer=None, language="English"):
     lang_instruction = f"\nRespond in {language}." if language != "English" else ""
     return f"{ctx}{farmer_ctx}{lang_instruction}\n\nFarmer's Question: {query}"
 
-def stream_ollama_sse(model, messages, temp=0.7):
-    payload = {"model": model, "messages": messages, "stream": True,
-                "options": {"temperature": temp, "system": SYSTEM_PROMPT}}
+async def stream_ollama_sse(model, messages, temp=0.7):
+    # Starlette cancels this generator when the client disconnects, which closes the Ollama stream
     try:
-        with requests.post(f"{OLLAMA_URL}/api/chat", json=payload, stream=True, timeout=120) as r:
-            for line in r.iter_lines():
-                if line:
-                    try:
-                        chunk = json.loads(line.decode())
-                        if "message" in chunk and "content" in chunk["message"]:
-                            token = chunk["message"]["content"]
-                            yield f"data: {json.dumps({'token': token})}\n\n"
-                        if chunk.get("done"): break
-                    except: continue
+        async for chunk in ollama.chat_stream(model, messages, {"temperature": temp, "system": SYSTEM_PROMPT},
+                                              timeout=120):
+            if "message" in chunk and "content" in chunk["message"]:
+                token = chunk["message"]["content"]
+                yield f"data: {json.dumps({'token': token})}\n\n"
     except Exception as e:
         yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
 # ── App startup ──────────────────────────────────────────────────
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    if scan_batcher: await scan_batcher.aclose()
+    if alerts: alerts.store.close()
+    await ollama.aclose()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 vs = VectorStoreManager(VECTOR_STORE_DIR)
@@ -228,9 +266,17 @@ vs.load_vector_store()
 lm = None
 if LIVESTOCK_AVAILABLE:
     try:
-        lm = load_livestock_models('trained_models')
+        lm = load_livestock_models('trained_models', backend=LIVESTOCK_BACKEND, tier=LIVESTOCK_TIER)
         print("✅ Livestock models loaded")
     except Exception as e: print(f"⚠️  Livestock: {e}")
+alerts = None
+if LIVESTOCK_AVAILABLE:
+    try: alerts = BiosecurityAlertSystem(store=SQLiteAlertStore(ALERT_DB_PATH))
+    except Exception as e: print(f"⚠️  Alerts: {e}")
+gait_cv, behavior_cv = (GaitAnalyzer(), BehaviorAnalyzer()) if lm else (None, None)  # keep per-animal trends
+scan_batcher = MicroBatcher(lambda readings: scan_readings(lm, readings, alert_system=alerts,
+                                                           gait_analyzer=gait_cv, behavior_analyzer=behavior_cv),
+                            max_batch_rows=SCAN_BATCH_MAX_ROWS, max_wait_ms=SCAN_BATCH_WINDOW_MS) if lm else None
 
 # ── Schemas ───────────────────────────────────────────────────────
 class ChatRequest(BaseModel):
@@ -249,16 +295,17 @@ class LivestockReq(BaseModel):
     steps_count: float; gait_score: float; stance_symmetry: float
     stride_length: float; ambient_temp: float; humidity_pct: float
     thi_index: Optional[float] = None
+    animal_id: Optional[str] = None
 
 # ── Routes ────────────────────────────────────────────────────────
 @app.get("/api/health")
 @app.get("/api/status")
-def health():
-    return {"ollama": check_ollama(), "vector_store": vs.loaded, "livestock": lm is not None}
+async def health():
+    return {"ollama": await check_ollama(), "vector_store": vs.loaded, "livestock": lm is not None}
 
 @app.get("/api/models")
-def models():
-    return {"models": get_models()}
+async def models():
+    return {"models": await get_models()}
 
 @app.get("/api/regions")
 def regions():
@@ -278,15 +325,22 @@ def rare_crops(crop: str):
          "pesticides": "Mancozeb 75WP @ 2g/L or Copper oxychloride @ 3g/L"}]})
     return {"crop": crop, **data}
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    return vs.cache_stats()
+
 @app.post("/api/chat")
 async def chat(req: ChatRequest):
-    docs = vs.search(req.message, 3) if req.use_kb and vs.loaded else []
+    t0 = time.perf_counter()
+    docs = await vs.search(req.message, 3) if req.use_kb and vs.loaded else []
+    retrieval_ms = (time.perf_counter() - t0) * 1000
     prompt = build_prompt(req.message, docs, req.farmer_profile, req.language)
     msgs = [{"role": m["role"], "content": m["content"]} for m in req.history[-10:]]
     msgs.append({"role": "user", "content": prompt})
     return StreamingResponse(stream_ollama_sse(req.model, msgs, req.temperature),
                              media_type="text/event-stream",
-                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                                      "X-Retrieval-Ms": f"{retrieval_ms:.1f}"})
 
 @app.post("/api/analyze-image")
 async def analyze_image(file: UploadFile = File(...), question: str = Form(...),
@@ -296,51 +350,81 @@ async def analyze_image(file: UploadFile = File(...), question: str = Form(...),
         b64 = base64.b64encode(img_bytes).decode()
         lang_note = f" Respond in {language}." if language != "English" else ""
         full_question = f"{question}{lang_note}"
-        payload = {"model": model, "messages": [{"role": "user", "content": full_question, "images": [b64]}],
-                   "stream": False, "options": {"system": SYSTEM_PROMPT}}
-        r = requests.post(f"{OLLAMA_URL}/api/chat", json=payload, timeout=120)
-        r.raise_for_status()
-        return {"analysis": r.json()["message"]["content"]}
+        result = await ollama.chat(model, [{"role": "user", "content": full_question, "images": [b64]}],
+                                   {"system": SYSTEM_PROMPT}, timeout=120)
+        return {"analysis": result["message"]["content"]}
     except Exception as e:
         return JSONResponse({"analysis": f"❌ Image analysis failed: {str(e)}. Ensure llava is installed: ollama pull llava"})
 
 @app.post("/api/livestock/scan")
-def scan(req: LivestockReq):
+async def scan(req: LivestockReq):
     if not lm: return {"error": "Livestock models not available. Run: python train_livestock_models.py"}
     r = req.dict()
     if r.get('thi_index') is None:
         r['thi_index'] = round(0.8 * r['ambient_temp'] + r['humidity_pct'] / 100 * (r['ambient_temp'] - 14.4) + 46.4, 1)
     try:
-        return {"health": lm['health_predictor'].predict(r), "anomaly": lm['anomaly_detector'].predict(r),
-                "gait": lm['gait_predictor'].predict(r), "disease": lm['disease_forecaster'].predict(r),
-                "gait_cv": GaitAnalyzer().analyze_gait(r), "behavior": BehaviorAnalyzer().analyze_behavior(r)}
+        # Concurrent scans are coalesced into one batched inference
+        return await scan_batcher.submit(r)
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/api/livestock/scan/stats")
+def scan_stats():
+    if not scan_batcher: return {"error": "Livestock models not available"}
+    return scan_batcher.stats()
+
+# ── Alerts ──
+@app.get("/api/alerts")
+def list_alerts(severity: Optional[str] = None, category: Optional[str] = None, limit: int = 50, offset: int = 0):
+    if not alerts: return {"error": "Alert store not available"}
+    limit, offset = min(max(limit, 1), 500), max(offset, 0)
+    return {"alerts": alerts.get_active_alerts(severity=severity, category=category, limit=limit, offset=offset),
+            "limit": limit, "offset": offset}
+
+@app.get("/api/alerts/summary")
+def alerts_summary():
+    if not alerts: return {"error": "Alert store not available"}
+    return alerts.get_alert_summary()
+
+@app.get("/api/alerts/history")
+def alerts_history(animal_id: Optional[str] = None, since: Optional[str] = None, limit: int = 50, offset: int = 0):
+    if not alerts: return {"error": "Alert store not available"}
+    limit, offset = min(max(limit, 1), 500), max(offset, 0)
+    return {"alerts": alerts.get_alert_history(animal_id=animal_id, since=since, limit=limit, offset=offset),
+            "limit": limit, "offset": offset}
+
+@app.post("/api/alerts/{alert_id}/acknowledge")
+def acknowledge_alert(alert_id: str):
+    if not alerts: return {"error": "Alert store not available"}
+    if not alerts.acknowledge_alert(alert_id): return JSONResponse({"error": f"Unknown alert {alert_id}"}, 404)
+    return {"alert_id": alert_id, "acknowledged": True}
+
+@app.post("/api/alerts/{alert_id}/resolve")
+def resolve_alert(alert_id: str, note: str = ""):
+    if not alerts: return {"error": "Alert store not available"}
+    if not alerts.resolve_alert(alert_id, resolution_note=note): return JSONResponse({"error": f"Unknown alert {alert_id}"}, 404)
+    return {"alert_id": alert_id, "status": "RESOLVED"}
+
 @app.post("/api/livestock/scan-csv")
-async def scan_csv(file: UploadFile = File(...)):
+def scan_csv(file: UploadFile = File(...)):
+    # Plain def: parsing and scoring run in the threadpool, off the event loop
     if not lm: return {"error": "Livestock models not available"}
     try:
-        import io
-        content = await file.read()
-        df = pd.read_csv(io.BytesIO(content))
-        results = []
-        for idx, row in df.iterrows():
-            rd = row.to_dict()
-            if 'thi_index' not in rd:
-                rd['thi_index'] = round(0.8*rd.get('ambient_temp',30) + rd.get('humidity_pct',65)/100*(rd.get('ambient_temp',30)-14.4)+46.4,1)
-            h = lm['health_predictor'].predict(rd)
-            d = lm['disease_forecaster'].predict(rd)
-            g = lm['gait_predictor'].predict(rd)
-            a = lm['anomaly_detector'].predict(rd)
-            results.append({"id": idx+1, "animal_id": rd.get('animal_id', f'A-{idx+1}'),
-                "health": h['status_label'], "confidence": f"{h['confidence']*100:.0f}%",
-                "disease": d['predicted_disease'].replace('_',' '),
-                "gait": f"{g['gait_score']:.1f}", "anomaly": a['is_anomaly']})
+        df = pd.read_csv(file.file)
+        results = to_scan_rows(score_herd(lm, df))
         return {"total": len(results), "results": results}
     except Exception as e:
         return {"error": str(e)}
 
+@app.post("/api/livestock/scan-csv/stream")
+def scan_csv_stream(file: UploadFile = File(...), format: str = "ndjson", chunk_size: int = 500):
+    """Score the upload chunk by chunk, streaming results + progress as NDJSON or SSE."""
+    if not lm: return {"error": "Livestock models not available"}
+    fmt = "sse" if format == "sse" else "ndjson"
+    return StreamingResponse(stream_scan_events(lm, file.file, max(1, chunk_size), fmt),
+                             media_type="text/event-stream" if fmt == "sse" else "application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/api/reference/vaccination")
 def ref_vax(): return {"schedule": VAX_SCHEDULE}
 
@@ -0,0 +1,304 @@
+# embedding_cache.py
+"""Persistent, size-capped embedding cache keyed by (model name, text digest).
+
+Each model gets its own directory holding three memory-mapped ``.npy`` files:
+
+- ``vectors.npy``: float32 ``(slots, dimension)`` embeddings
+- ``keys.npy``:    16-byte BLAKE2b digest of the text stored in each slot
+- ``ticks.npy``:   last-use tick per slot (0 = empty), used for LRU eviction
+
+The files start at ``INITIAL_CAPACITY`` slots and double when they fill up,
+until ``capacity`` is reached; from then on the least recently used entry is
+evicted. Ticks are drawn from one counter shared by every process
+(``clock.npy``), so the eviction order reflects hits and writes from all of
+them. The in-memory index (digest -> slot) is rebuilt from ``keys.npy`` on
+open, so there is no separate index file to keep in sync.
+
+The indexer, the APIs and the Streamlit app share these files. Lookups and
+writes both hold an exclusive ``flock`` on ``<model dir>/lock`` (once per
+``get_many`` / ``put_many`` batch), since a hit writes its slot's tick.
+Writers also bump a write counter in ``generation.npy``; a process that sees
+the counter move reloads the files before going on. Growing the files writes
+new copies and renames them into place, so other processes never see a file
+change size under their memory maps. Where ``fcntl`` is unavailable
+(Windows) there is no lock, and only one process may use a cache directory
+at a time.
+"""
+import os
+import re
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer per cache directory, see above
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "embedding_cache"
+DEFAULT_CAPACITY = 100_000
+INITIAL_CAPACITY = 1024
+DIGEST_SIZE = 16
+
+
+@contextmanager
+def _file_lock(path: Path, exclusive: bool = True):
+    """Hold an advisory ``flock`` on ``path`` (a no-op without ``fcntl``)."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """LRU embedding cache for one embedding model, backed by mmap'd arrays."""
+
+    def __init__(self, model_name: str = "nomic-embed-text", cache_dir: str = DEFAULT_CACHE_DIR,
+                 capacity: int = DEFAULT_CAPACITY):
+        self.model_name = model_name
+        self.path = Path(cache_dir) / re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._keys = None
+        self._ticks = None
+        self._state = None          # mmap of generation.npy: writes by any process
+        self._generation = 0        # the write counter as of this process's last load/write
+        self._clock = None          # mmap of clock.npy: the last tick handed out by any process
+        self._slots = {}            # digest -> slot
+        self._free = []
+        if self.path.exists():
+            with _file_lock(self._lock_path, exclusive=False):
+                self._load()
+            if self._vectors is not None:
+                logger.info(f"Embedding cache opened: {len(self._slots)}/{self.capacity} entries "
+                            f"({self.model_name})")
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+    def _files(self):
+        return self.path / "vectors.npy", self.path / "keys.npy", self.path / "ticks.npy"
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.path / "lock"
+
+    @property
+    def _state_path(self) -> Path:
+        return self.path / "generation.npy"
+
+    @property
+    def _clock_path(self) -> Path:
+        return self.path / "clock.npy"
+
+    def _stale(self) -> bool:
+        """Whether another process has written since this one last loaded the files."""
+        if self._state is None:
+            return self._state_path.exists()
+        return int(self._state[0]) != self._generation
+
+    def _load(self):
+        """Map the cache files and rebuild the LRU index from them (caller holds the file lock)."""
+        self._vectors = self._keys = self._ticks = None
+        self._slots.clear()
+        self._free = []
+        if self._state is None and self._state_path.exists():
+            self._state = np.load(self._state_path, mmap_mode='r+')
+        self._generation = int(self._state[0]) if self._state is not None else 0
+
+        vectors_path, keys_path, ticks_path = self._files()
+        if not vectors_path.exists():
+            return
+        try:
+            vectors = np.load(vectors_path, mmap_mode='r+')
+            keys = np.load(keys_path, mmap_mode='r+')
+            ticks = np.load(ticks_path, mmap_mode='r+')
+            if not (len(vectors) == len(keys) == len(ticks)) or keys.shape[1] != DIGEST_SIZE:
+                raise ValueError("inconsistent cache files")
+        except (OSError, ValueError, IndexError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache at {self.path}: {e}")
+            return
+
+        if len(vectors) > self.capacity:
+            logger.info(f"Embedding cache at {self.path} has {len(vectors)} slots; keeping them")
+            self.capacity = len(vectors)
+        self._vectors, self._keys, self._ticks = vectors, keys, ticks
+
+        used = np.flatnonzero(ticks)
+        for slot in used.tolist():
+            self._slots[keys[slot].tobytes()] = slot
+        used_set = set(used.tolist())
+        self._free = [slot for slot in range(len(vectors) - 1, -1, -1) if slot not in used_set]
+
+    def _allocate(self, slots: int, dimension: int):
+        """Replace the cache files with ``slots`` slots, keeping the entries if the dimension is unchanged.
+
+        New files are written beside the old ones and renamed over them, so a
+        process still mapping the old files keeps reading valid (if stale) data.
+        Caller holds the exclusive file lock.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        keep = self._vectors is not None and self._vectors.shape[1] == dimension
+        old = len(self._vectors) if keep else 0
+        shapes = ((slots, dimension), (slots, DIGEST_SIZE), (slots,))
+        dtypes = (np.float32, np.uint8, np.uint64)
+        arrays = (self._vectors, self._keys, self._ticks)
+        for path, shape, dtype, current in zip(self._files(), shapes, dtypes, arrays):
+            tmp_path = path.with_name(path.stem + ".tmp.npy")
+            new = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=shape)
+            if keep:
+                new[:old] = current
+            new.flush()
+            del new
+            os.replace(tmp_path, path)
+        self._vectors, self._keys, self._ticks = (np.load(path, mmap_mode='r+') for path in self._files())
+        if not keep:
+            self._slots.clear()
+            self._free = []
+        self._free = list(range(slots - 1, old - 1, -1)) + self._free
+
+    def _bump_generation(self):
+        """Record a write so other processes reload before their next one (caller holds the file lock)."""
+        if self._state is None:
+            if not self._state_path.exists():
+                tmp_path = self._state_path.with_name("generation.tmp.npy")
+                np.save(tmp_path, np.zeros(1, dtype=np.int64), allow_pickle=False)
+                os.replace(tmp_path, self._state_path)
+            self._state = np.load(self._state_path, mmap_mode='r+')
+        self._state[0] += 1
+        self._generation = int(self._state[0])
+
+    def _touch(self, slot: int):
+        """Mark ``slot`` as just used, with a tick from the shared clock (caller holds the exclusive file lock)."""
+        if self._clock is None:
+            if not self._clock_path.exists():
+                # Start above every tick already in the files
+                tmp_path = self._clock_path.with_name("clock.tmp.npy")
+                np.save(tmp_path, self._ticks.max(keepdims=True).astype(np.uint64), allow_pickle=False)
+                os.replace(tmp_path, self._clock_path)
+            self._clock = np.load(self._clock_path, mmap_mode='r+')
+        self._clock[0] += 1
+        self._ticks[slot] = self._clock[0]
+
+    def _evict(self) -> int:
+        """Free the slot least recently used by any process and return it (caller holds the exclusive file lock)."""
+        slot = int(np.argmin(self._ticks))
+        self._slots.pop(self._keys[slot].tobytes(), None)
+        return slot
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for ``text`` or None."""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached embeddings for ``texts`` (None where missing), under one acquisition of the file lock."""
+        keys = [self.digest(text) for text in texts]
+        with self._lock:
+            if self._vectors is None and not self._stale():
+                # Nothing cached by any process yet
+                self.misses += len(keys)
+                return [None] * len(keys)
+            with _file_lock(self._lock_path):
+                if self._stale():
+                    self._load()
+                results = []
+                for key in keys:
+                    slot = self._slots.get(key)
+                    if slot is None:
+                        self.misses += 1
+                        results.append(None)
+                        continue
+                    self._touch(slot)
+                    self.hits += 1
+                    results.append(self._vectors[slot].tolist())
+            return results
+
+    def _put(self, key: bytes, vector: np.ndarray):
+        """Store one entry, growing the files or evicting the LRU entry when full."""
+        if self._vectors is None or self._vectors.shape[1] != len(vector):
+            self._allocate(min(self.capacity, INITIAL_CAPACITY), len(vector))
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free and len(self._vectors) < self.capacity:
+                self._allocate(min(self.capacity, 2 * len(self._vectors)), len(vector))
+            slot = self._free.pop() if self._free else self._evict()
+            self._slots[key] = slot
+        # Invalidate the slot while it is rewritten
+        self._ticks[slot] = 0
+        self._vectors[slot] = vector
+        self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self._touch(slot)
+
+    def put(self, text: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entry when full."""
+        self.put_many([text], [embedding])
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]):
+        """Store several embeddings under one acquisition of the file lock."""
+        entries = []
+        for text, embedding in zip(texts, embeddings):
+            vector = np.asarray(embedding, dtype=np.float32)
+            # Never cache the zero-vector fallback used when Ollama fails
+            if vector.ndim == 1 and vector.any():
+                entries.append((self.digest(text), vector))
+        if not entries:
+            return
+        with self._lock, _file_lock(self._lock_path):
+            if self._stale():
+                self._load()
+            for key, vector in entries:
+                self._put(key, vector)
+            self._bump_generation()
+
+    def flush(self):
+        """Flush dirty pages to disk."""
+        with self._lock:
+            for arr in (self._vectors, self._keys, self._ticks, self._state, self._clock):
+                if arr is not None:
+                    arr.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'model': self.model_name,
+            'entries': len(self._slots),
+            'slots': len(self._vectors) if self._vectors is not None else 0,
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._slots)
+
+
+_caches: Dict[tuple, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str = "nomic-embed-text", cache_dir: str = DEFAULT_CACHE_DIR,
+                        capacity: int = DEFAULT_CAPACITY) -> EmbeddingCache:
+    """Return the process-wide cache for (cache_dir, model_name), creating it on first use."""
+    key = (str(Path(cache_dir).resolve()), model_name)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(model_name, cache_dir, capacity)
+        return _caches[key]
@@ -0,0 +1,205 @@
+# embedding_engine.py
+"""Batched, concurrent embedding generation against the Ollama API."""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from embedding_cache import EmbeddingCache
+from ingestion_pipeline import ordered_map
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying; anything else in the 4xx range is a caller error
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class BatchEmbeddingEngine:
+    """Embeds texts in batches with bounded concurrency over a pooled HTTP session.
+
+    Texts are grouped into ``batch_size`` batches and up to ``max_workers``
+    batches are in flight at once. Each batch is sent to ``/api/embed`` (which
+    accepts a list of inputs); older Ollama builds that lack that endpoint fall
+    back to one ``/api/embeddings`` call per text. Results are always returned
+    in input order. When a ``cache`` is given, texts already embedded by the same
+    model are served from it and never sent to Ollama. A text whose request
+    still fails after ``max_retries`` comes back as ``None`` (and is not cached),
+    so callers can tell it apart from a real embedding and retry it later.
+    """
+
+    def __init__(self, model_name: str = "nomic-embed-text",
+                 base_url: str = "http://localhost:11434",
+                 batch_size: int = 16, max_workers: int = 4,
+                 max_retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 60, dimension: int = 768,
+                 cache: Optional[EmbeddingCache] = None):
+        self.model_name = model_name
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.dimension = dimension  # Updated from the first successful response
+        self.cache = cache
+        self.last_stats: Dict[str, Any] = {}
+        self._batch_endpoint = True
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to Ollama, retrying transient failures with exponential backoff."""
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                    raise requests.HTTPError(f"{response.status_code} from {url}", response=response)
+                response.raise_for_status()
+                return response.json()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = getattr(e.response, 'status_code', None) if isinstance(e, requests.HTTPError) else None
+                if attempt >= self.max_retries or (status is not None and status not in RETRYABLE_STATUS):
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"Embedding request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _embed_batch_endpoint(self, texts: List[str]) -> List[List[float]]:
+        data = self._post("/api/embed", {"model": self.model_name, "input": texts})
+        return data["embeddings"]
+
+    def _embed_single_endpoint(self, texts: List[str]) -> List[List[float]]:
+        return [self._post("/api/embeddings", {"model": self.model_name, "prompt": text})["embedding"]
+                for text in texts]
+
+    def embed_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed one batch; ``None`` for every text if Ollama keeps failing."""
+        try:
+            if self._batch_endpoint:
+                try:
+                    embeddings = self._embed_batch_endpoint(texts)
+                except requests.HTTPError as e:
+                    if getattr(e.response, 'status_code', None) != 404:
+                        raise
+                    logger.info("/api/embed not available, falling back to /api/embeddings")
+                    self._batch_endpoint = False
+                    embeddings = self._embed_single_endpoint(texts)
+            else:
+                embeddings = self._embed_single_endpoint(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(embeddings)}")
+            if embeddings:
+                self.dimension = len(embeddings[0])
+            return embeddings
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.error(f"Error generating embeddings for batch of {len(texts)}: {e}")
+            # Keep results aligned with the input; None marks a text that was not embedded
+            return [None] * len(texts)
+
+    def embed_one(self, text: str) -> List[float]:
+        """Embed a single text (e.g. a search query), using the cache if present.
+
+        Falls back to an (uncached) zero vector if Ollama keeps failing.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+        embedding = self.embed_batch([text])[0]
+        if embedding is None:
+            return [0.0] * self.dimension
+        if self.cache is not None:
+            self.cache.put(text, embedding)
+        return embedding
+
+    def embed_cached(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed one batch, sending only the texts missing from the cache (``None`` where that failed)."""
+        if self.cache is None:
+            return self.embed_batch(texts)
+        embeddings = self.cache.get_many(texts)
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            fresh = self.embed_batch([texts[i] for i in missing])
+            for i, emb in zip(missing, fresh):
+                embeddings[i] = emb
+            self.cache.put_many(*self._embedded([texts[i] for i in missing], fresh))
+        return embeddings
+
+    @staticmethod
+    def _embedded(texts: List[str], embeddings: List[Optional[List[float]]]) -> tuple:
+        """(texts, embeddings) without the entries that failed to embed."""
+        pairs = [(text, emb) for text, emb in zip(texts, embeddings) if emb is not None]
+        return [text for text, _ in pairs], [emb for _, emb in pairs]
+
+    def embed_stream(self, batches: Iterable[Any], key=None) -> Iterator[tuple]:
+        """Embed a stream of batches, yielding ``(batch, embeddings)`` in input order.
+
+        ``key`` maps a batch to its list of texts (default: the batch is the
+        list of texts). Batches are pulled lazily and up to ``max_workers`` are
+        in flight at once, so a streaming producer (see ``ingestion_pipeline``)
+        keeps the network busy while it prepares the next batch.
+        """
+        key = key or (lambda batch: batch)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                yield from ordered_map(pool, self.embed_cached, batches, self.max_workers, key=key)
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed all texts, preserving order (``None`` where that failed); throughput goes to ``last_stats``."""
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        embeddings = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        pending = [texts[i] for i in missing]
+        if self.cache is not None:
+            logger.info(f"Embedding cache: {len(texts) - len(missing)}/{len(texts)} chunks cached")
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.embed_batch, batch): i for i, batch in enumerate(batches)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += len(batches[i])
+                elapsed = time.perf_counter() - start
+                logger.info(f"Embedded {done}/{len(pending)} chunks "
+                            f"({done / elapsed if elapsed > 0 else 0.0:.1f} chunks/sec)")
+
+        fresh = [emb for batch in results for emb in batch]
+        for i, emb in zip(missing, fresh):
+            embeddings[i] = emb
+        if self.cache is not None and pending:
+            self.cache.put_many(*self._embedded(pending, fresh))
+            self.cache.flush()
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            'chunks': len(texts),
+            'cached': len(texts) - len(pending),
+            'failed': sum(emb is None for emb in fresh),
+            'batches': len(batches),
+            'seconds': elapsed,
+            'chunks_per_sec': len(texts) / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(f"Embedded {len(texts)} chunks in {elapsed:.1f}s "
+                    f"({self.last_stats['chunks_per_sec']:.1f} chunks/sec, "
+                    f"batch_size={self.batch_size}, workers={self.max_workers})")
+        return embeddings
+
+    def close(self):
+        self.session.close()
@@ -15,6 +15,8 @@ import os
 # Add project root for livestock module
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from embedding_cache import get_embedding_cache
+
 # Livestock Biosecurity imports
 try:
     from livestock_biosecurity.models import load_models as load_livestock_models, HEALTH_LABELS
@@ -735,6 +737,7 @@ class VectorStoreManager:
         self.index = None
         self.documents = []
         self.chunks_metadata = []
+        self.id_to_pos = {}
         self.dimension = 768
         self.loaded = False
 
@@ -752,6 +755,9 @@ class VectorStoreManager:
                 self.documents = data['documents']
                 self.chunks_metadata = data['chunks_metadata']
                 self.dimension = data['dimension']
+                # Incrementally built stores map vector IDs → chunk positions
+                ids = data.get('ids', range(len(self.documents)))
+                self.id_to_pos = {vid: pos for pos, vid in enumerate(ids)}
             
             self.loaded = True
             return True
@@ -760,6 +766,10 @@ class VectorStoreManager:
             return False
 
     def get_embedding(self, text: str, model_name="nomic-embed-text"):
+        cache = get_embedding_cache(model_name)
+        cached = cache.get(text)
+        if cached is not None:
+            return cached
         try:
             response = requests.post(
                 f"{OLLAMA_URL}/api/embeddings",
@@ -767,7 +777,9 @@ class VectorStoreManager:
                 timeout=30
             )
             response.raise_for_status()
-            return response.json()["embedding"]
+            embedding = response.json()["embedding"]
+            cache.put(text, embedding)
+            return embedding
         except Exception as e:
             st.error(f"🔗 Embedding error: {e}")
             return None
@@ -786,10 +798,11 @@ class VectorStoreManager:
         
         results = []
         for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.documents) and score > 0.1:
+            pos = self.id_to_pos.get(int(idx))
+            if pos is not None and score > 0.1:
                 results.append({
-                    "content": self.documents[idx],
-                    "metadata": self.chunks_metadata[idx],
+                    "content": self.documents[pos],
+                    "metadata": self.chunks_metadata[pos],
                     "score": float(score)
                 })
         return results
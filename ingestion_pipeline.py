@@ -0,0 +1,221 @@
+# ingestion_pipeline.py
+"""Streaming staged pipelines over bounded queues, with per-stage stats.
+
+A ``Pipeline`` chains stages, each a generator function that consumes an
+iterator of items from the stage before it and yields items for the stage
+after it. Every stage runs in its own thread and adjacent stages are joined
+by a bounded queue, so they overlap (PDF parsing, chunking, network-bound
+embedding and index writes all make progress at once) and memory is bounded
+by ``queue_size`` items per edge rather than by the corpus size. When a stage
+falls behind, the queue in front of it fills and the stage upstream blocks
+on ``put``: that is backpressure, and it is what the stats measure.
+
+Per stage the pipeline records items in and out, optional work units (e.g.
+chunks in a batch), time starved waiting for input, time blocked waiting for
+room downstream, and the high-water mark of its output queue. Work that
+needs parallelism inside a stage (a process pool for CPU-bound parsing, a
+thread pool for I/O) goes through ``ordered_map``, which keeps a bounded
+number of tasks in flight and yields results in input order.
+"""
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+# How often a blocked put/get wakes up to check whether the pipeline was aborted
+_POLL_SECONDS = 0.1
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage failed."""
+
+
+class StageStats:
+    """Throughput and backpressure counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.units = 0
+        self.starved = 0.0      # waiting for the upstream queue
+        self.blocked = 0.0      # waiting for room in the downstream queue
+        self.max_queue = 0      # high-water mark of the output queue
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def busy(self) -> float:
+        return max(0.0, self.elapsed - self.starved - self.blocked)
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed, busy = self.elapsed, self.busy
+        units = self.units or self.items_out
+        return {
+            'stage': self.name,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'units': units,
+            'elapsed_s': round(elapsed, 3),
+            'busy_s': round(busy, 3),
+            'units_per_s': round(units / elapsed, 1) if elapsed > 0 else 0.0,
+            'units_per_busy_s': round(units / busy, 1) if busy > 0 else 0.0,
+            'starved_pct': round(100 * self.starved / elapsed, 1) if elapsed > 0 else 0.0,
+            'blocked_pct': round(100 * self.blocked / elapsed, 1) if elapsed > 0 else 0.0,
+            'max_queue': self.max_queue,
+        }
+
+
+class Pipeline:
+    """Linear chain of generator stages, one thread each, joined by bounded queues.
+
+    Args:
+        source: iterable feeding the first stage (consumed in its own thread)
+        queue_size: capacity of every inter-stage queue
+    """
+
+    def __init__(self, source: Iterable, queue_size: int = 8):
+        self.source = source
+        self.queue_size = max(1, queue_size)
+        self.stages: List[tuple] = []
+        self.stats: List[StageStats] = [StageStats('source')]
+        self._abort = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def stage(self, name: str, fn: Callable[[Iterator], Iterator],
+              units: Optional[Callable[[Any], int]] = None) -> 'Pipeline':
+        """Append a stage; ``units(item)`` counts the work in each output item."""
+        self.stages.append((fn, units))
+        self.stats.append(StageStats(name))
+        return self
+
+    # ── Queue plumbing ──
+
+    def _put(self, q: queue.Queue, item, stats: StageStats):
+        start = time.perf_counter()
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        stats.blocked += time.perf_counter() - start
+        if item is not _DONE:
+            stats.max_queue = max(stats.max_queue, q.qsize())
+
+    def _iter_queue(self, q: queue.Queue, stats: StageStats) -> Iterator:
+        while True:
+            start = time.perf_counter()
+            while True:
+                if self._abort.is_set():
+                    raise PipelineAborted()
+                try:
+                    item = q.get(timeout=_POLL_SECONDS)
+                    break
+                except queue.Empty:
+                    continue
+            stats.starved += time.perf_counter() - start
+            if item is _DONE:
+                return
+            stats.items_in += 1
+            yield item
+
+    def _run_stage(self, items: Iterator, out: Optional[queue.Queue], stats: StageStats, units):
+        stats.started = time.perf_counter()
+        try:
+            for item in items:
+                stats.items_out += 1
+                if units is not None:
+                    stats.units += units(item)
+                if out is not None:
+                    self._put(out, item, stats)
+            if out is not None:
+                self._put(out, _DONE, stats)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._abort.set()
+        finally:
+            stats.finished = time.perf_counter()
+
+    # ── Running ──
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Run every stage to completion; re-raises the first stage error. Returns ``snapshot()``."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._run_stage, name='pipeline-source',
+                                    args=(iter(self.source), queues[0] if queues else None,
+                                          self.stats[0], None), daemon=True)]
+        for i, (fn, units) in enumerate(self.stages):
+            stats = self.stats[i + 1]
+            items = fn(self._iter_queue(queues[i], stats))
+            out = queues[i + 1] if i + 1 < len(queues) else None
+            threads.append(threading.Thread(target=self._run_stage, name=f'pipeline-{stats.name}',
+                                            args=(items, out, stats, units), daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return self.snapshot()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [stats.snapshot() for stats in self.stats]
+
+    def log_stats(self, log: Callable[[str], None] = logger.info):
+        """Log one line per stage: throughput, starvation, backpressure, queue depth."""
+        log(f"{'stage':<10} {'in':>7} {'out':>7} {'units':>8} {'units/s':>9} "
+            f"{'busy units/s':>12} {'starved':>8} {'blocked':>8} {'max q':>6}")
+        for s in self.snapshot():
+            log(f"{s['stage']:<10} {s['items_in']:>7} {s['items_out']:>7} {s['units']:>8} "
+                f"{s['units_per_s']:>9.1f} {s['units_per_busy_s']:>12.1f} {s['starved_pct']:>7.1f}% "
+                f"{s['blocked_pct']:>7.1f}% {s['max_queue']:>3}/{self.queue_size}")
+
+
+def ordered_map(executor, fn: Callable, items: Iterable, window: int,
+                key: Optional[Callable] = None) -> Iterator:
+    """``executor.map`` with at most ``window`` tasks in flight, yielding results in input order.
+
+    Unlike ``Executor.map`` this does not submit the whole input up front, so a
+    slow consumer holds back the producer instead of buffering every result.
+    With ``key``, ``fn(key(item))`` is submitted (only that is sent to a process
+    pool) and ``(item, result)`` pairs are yielded.
+    """
+    window = max(1, window)
+    pending = deque()
+    for item in items:
+        future = executor.submit(fn, item if key is None else key(item))
+        pending.append((item, future))
+        if len(pending) >= window:
+            done, future = pending.popleft()
+            yield future.result() if key is None else (done, future.result())
+    while pending:
+        done, future = pending.popleft()
+        yield future.result() if key is None else (done, future.result())
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Group an iterable into lists of ``size`` (the last may be shorter)."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
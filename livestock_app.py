@@ -20,10 +20,13 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from livestock_biosecurity.data_generator import LivestockDataGenerator
+from livestock_biosecurity.simulator import HerdSimulator
 from livestock_biosecurity.models import load_models, HEALTH_LABELS
 from livestock_biosecurity.cv_module import GaitAnalyzer, BehaviorAnalyzer
 from livestock_biosecurity.alert_system import BiosecurityAlertSystem
+from livestock_biosecurity.alert_db import SQLiteAlertStore
+
+ALERT_DB_PATH = "alerts.db"
 
 # ── Page Configuration ──────────────────────────────────────────────────────
 st.set_page_config(
@@ -344,14 +347,11 @@ def load_all_models():
     models = load_models('trained_models')
     return models
 
-@st.cache_resource
-def get_data_generator():
-    return LivestockDataGenerator(seed=42)
-
 def init_session_state():
     """Initialize session state variables."""
     if 'alert_system' not in st.session_state:
-        st.session_state.alert_system = BiosecurityAlertSystem()
+        # Same database as the API servers, so alerts survive restarts and are shared
+        st.session_state.alert_system = BiosecurityAlertSystem(store=SQLiteAlertStore(ALERT_DB_PATH))
     if 'gait_analyzer' not in st.session_state:
         st.session_state.gait_analyzer = GaitAnalyzer()
     if 'behavior_analyzer' not in st.session_state:
@@ -422,27 +422,12 @@ def render_gait_meter(score):
 
 
 def generate_herd_data(n_animals=25):
-    """Generate herd data for dashboard display."""
-    gen = get_data_generator()
-    herd = []
-    diseases = ['Mastitis', 'Lameness', 'BRD', 'Heat_Stress', 'Metabolic_Disorder']
-    
-    for i in range(n_animals):
-        # 70% healthy, 20% at-risk, 10% critical
-        rand = np.random.random()
-        if rand < 0.70:
-            reading = gen.generate_realtime_reading(f"KS-{i:04d}", health='healthy')
-        elif rand < 0.90:
-            disease = np.random.choice(diseases)
-            reading = gen.generate_realtime_reading(f"KS-{i:04d}", health='diseased', 
-                                                     disease=disease, severity='mild')
-        else:
-            disease = np.random.choice(diseases)
-            reading = gen.generate_realtime_reading(f"KS-{i:04d}", health='diseased',
-                                                     disease=disease, severity='severe')
-        herd.append(reading)
-    
-    return herd
+    """Next reading of every animal from the session's herd simulator (animal state persists across refreshes)."""
+    sim = st.session_state.get('herd_simulator')
+    if sim is None or sim.n_animals != n_animals:
+        # ~30% of the herd ill at any time; each refresh advances the herd six hours
+        sim = st.session_state.herd_simulator = HerdSimulator(n_animals, interval=6 * 3600, sick_fraction=0.3)
+    return sim.step().to_dict('records')
 
 
 # ── Sidebar ─────────────────────────────────────────────────────────────────
@@ -494,8 +479,8 @@ with st.sidebar:
     auto_refresh = st.checkbox("Auto-refresh (10s)", value=False)
 
     if st.button("🔄 Refresh Herd Data", use_container_width=True):
+        # Alerts are kept: the re-scan coalesces repeats into the existing ones
         st.session_state.herd_data = None
-        st.session_state.alert_system.clear_all_alerts()
         st.rerun()
 
     st.divider()
@@ -525,40 +510,42 @@ if st.session_state.herd_data is None:
     with st.spinner("🔄 Scanning herd sensors..."):
         st.session_state.herd_data = generate_herd_data(herd_size)
         # Run all models on herd data
+        # Alerts persist across refreshes; repeats coalesce into the existing alert
         alert_sys = st.session_state.alert_system
-        alert_sys.clear_all_alerts()
-        
-        for animal_data in st.session_state.herd_data:
-            aid = animal_data['animal_id']
-            
-            # Health prediction
-            health_result = models['health_predictor'].predict(animal_data)
-            animal_data['health_prediction'] = health_result
-            alert_sys.process_health_prediction(aid, health_result)
-            
-            # Anomaly detection
-            anomaly_result = models['anomaly_detector'].predict(animal_data)
-            animal_data['anomaly_result'] = anomaly_result
-            alert_sys.process_anomaly_detection(aid, anomaly_result)
-            
-            # Gait prediction
-            gait_result = models['gait_predictor'].predict(animal_data)
-            animal_data['gait_prediction'] = gait_result
-            alert_sys.process_gait_analysis(aid, gait_result)
-            
-            # Disease forecast
-            disease_result = models['disease_forecaster'].predict(animal_data)
-            animal_data['disease_prediction'] = disease_result
-            alert_sys.process_disease_forecast(aid, disease_result)
-            
-            # CV Gait analysis
-            gait_cv = st.session_state.gait_analyzer.analyze_gait(animal_data)
-            animal_data['gait_cv'] = gait_cv
-            
-            # Behavior analysis
-            behavior = st.session_state.behavior_analyzer.analyze_behavior(animal_data)
-            animal_data['behavior_analysis'] = behavior
-            alert_sys.process_behavior_analysis(aid, behavior)
+
+        # One store write for the whole scan cycle
+        with alert_sys.batch():
+            for animal_data in st.session_state.herd_data:
+                aid = animal_data['animal_id']
+
+                # Health prediction
+                health_result = models['health_predictor'].predict(animal_data)
+                animal_data['health_prediction'] = health_result
+                alert_sys.process_health_prediction(aid, health_result)
+
+                # Anomaly detection
+                anomaly_result = models['anomaly_detector'].predict(animal_data)
+                animal_data['anomaly_result'] = anomaly_result
+                alert_sys.process_anomaly_detection(aid, anomaly_result)
+
+                # Gait prediction
+                gait_result = models['gait_predictor'].predict(animal_data)
+                animal_data['gait_prediction'] = gait_result
+                alert_sys.process_gait_analysis(aid, gait_result)
+
+                # Disease forecast
+                disease_result = models['disease_forecaster'].predict(animal_data)
+                animal_data['disease_prediction'] = disease_result
+                alert_sys.process_disease_forecast(aid, disease_result)
+
+                # CV Gait analysis
+                gait_cv = st.session_state.gait_analyzer.analyze_gait(animal_data)
+                animal_data['gait_cv'] = gait_cv
+
+                # Behavior analysis
+                behavior = st.session_state.behavior_analyzer.analyze_behavior(animal_data)
+                animal_data['behavior_analysis'] = behavior
+                alert_sys.process_behavior_analysis(aid, behavior)
 
 herd = st.session_state.herd_data
 alert_system = st.session_state.alert_system
@@ -0,0 +1,374 @@
+"""
+SQLite Alert Store
+====================
+Durable drop-in for ``AlertStore``, shared by every process that opens the
+same database file (uvicorn workers, the Streamlit dashboard).
+
+- the database runs in WAL mode, so readers never block the writer and
+  each other
+- alerts are rows keyed by ``alert_id``; the fields that queries filter or
+  sort on (status, severity, category, animal_id, timestamp) are real
+  indexed columns, the full alert dict is kept as JSON alongside
+- writes are queued and committed in one transaction when the enclosing
+  ``batch()`` ends (one per scan cycle); outside a batch each write commits
+  immediately. Batches belong to the thread that opened them, so an
+  acknowledge or resolve from another request thread commits on its own
+  instead of waiting in a scan's queue. Updates are field-level ``json_set``
+  patches, so two processes updating different fields of one alert don't
+  overwrite each other
+- coalescing a signal into an active alert (``modify_active``) is a patch
+  guarded by ``status = 'ACTIVE'``, so an alert another process has resolved
+  is never patched back to life under its old id. Outside a batch the row is
+  read and patched in one write transaction; inside one, the patch joins the
+  batch and the decision is made on the alert as last committed or as the
+  batch has already changed it
+- inside a batch, ``get`` and ``in`` see the batch's own writes; queries see
+  committed state
+- ``query_active`` / ``summary`` run as indexed SQL (``LIMIT/OFFSET`` pages and
+  ``GROUP BY`` counts over covering indexes); only the returned page is
+  loaded into Python
+- resolved alerts older than the newest ``history_size`` alerts are deleted,
+  matching the in-memory store's retention
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from .alert_store import SEVERITY_ORDER
+from .alert_dedup import severity_rank
+
+
+# Fields mirrored into indexed columns; everything else lives only in the JSON
+INDEXED_FIELDS = ('timestamp', 'animal_id', 'category', 'severity', 'model_source', 'status')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    alert_id      TEXT NOT NULL UNIQUE,
+    timestamp     TEXT NOT NULL,
+    animal_id     TEXT,
+    category      TEXT,
+    severity      TEXT,
+    severity_rank INTEGER NOT NULL,
+    bucket_seq    INTEGER NOT NULL,
+    model_source  TEXT,
+    status        TEXT NOT NULL,
+    data          TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alert_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO alert_counters VALUES ('bucket_seq', 0);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_priority ON alerts (status, severity_rank, bucket_seq);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_severity ON alerts (status, severity);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_category ON alerts (status, category);
+CREATE INDEX IF NOT EXISTS idx_alerts_status_animal ON alerts (status, animal_id);
+CREATE INDEX IF NOT EXISTS idx_alerts_animal ON alerts (animal_id, seq);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp);
+"""
+
+PAGE_SIZE = 500
+
+# Active alerts sort by (severity_rank, bucket_seq). bucket_seq is drawn from a
+# counter on insert and again when an alert changes severity, so an escalated
+# alert goes to the back of its new bucket, as in the in-memory store.
+_NEXT_BUCKET_SEQ = "UPDATE alert_counters SET value = value + 1 WHERE name = 'bucket_seq'"
+_BUCKET_SEQ = "(SELECT value FROM alert_counters WHERE name = 'bucket_seq')"
+
+
+def _json_default(value):
+    # numpy scalars/arrays in model outputs
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(value, default=_json_default)
+
+
+class SQLiteAlertStore:
+    """
+    Alert store on an embedded SQLite database.
+
+    Args:
+        path: database file (created if missing)
+        history_size: resolved alerts are kept while they are among the
+                      newest ``history_size`` alerts
+    """
+
+    def __init__(self, path='alerts.db', history_size=10_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.history_size = history_size
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        self._local = threading.local()  # per-thread batch, see _batch_state
+
+    # ── Write batching ──
+
+    def _batch_state(self):
+        """This thread's batch: nesting depth, queued (sql, params) and alert_id -> alert written in it."""
+        state = self._local
+        if not hasattr(state, 'depth'):
+            state.depth, state.pending, state.alerts = 0, [], {}
+        return state
+
+    @contextmanager
+    def batch(self):
+        """Commit every write this thread makes inside the block in one transaction."""
+        state = self._batch_state()
+        state.depth += 1
+        try:
+            yield self
+        finally:
+            state.depth -= 1
+            if state.depth == 0:
+                self.flush()
+
+    def _write(self, sql, params):
+        state = self._batch_state()
+        state.pending.append((sql, params))
+        if state.depth == 0:
+            self.flush()
+
+    def flush(self):
+        """Commit this thread's queued writes (and apply retention) in one transaction."""
+        state = self._batch_state()
+        if not state.pending:
+            return
+        pending, state.pending = state.pending, []
+        state.alerts.clear()
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in pending:
+                    conn.execute(sql, params)
+                conn.execute(
+                    "DELETE FROM alerts WHERE status != 'ACTIVE' "
+                    "AND seq <= (SELECT MAX(seq) FROM alerts) - ?",
+                    (self.history_size,),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    # ── Lookups ──
+
+    def _row_alert(self, alert_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM alerts WHERE alert_id = ?", (alert_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, alert_id):
+        if alert_id in self._batch_state().alerts:
+            return True
+        # Queued writes never delete rows, so committed state answers this
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM alerts WHERE alert_id = ?", (alert_id,)).fetchone() is not None
+
+    def get(self, alert_id):
+        return self._batch_state().alerts.get(alert_id) or self._row_alert(alert_id)
+
+    # ── Mutations ──
+
+    def add(self, alert):
+        state = self._batch_state()
+        state.alerts[alert['alert_id']] = alert
+        state.pending.append((_NEXT_BUCKET_SEQ, ()))
+        self._write(
+            "INSERT INTO alerts (alert_id, timestamp, animal_id, category, severity, severity_rank, "
+            f"bucket_seq, model_source, status, data) VALUES (?, ?, ?, ?, ?, ?, {_BUCKET_SEQ}, ?, ?, ?)",
+            (alert['alert_id'], alert['timestamp'], alert['animal_id'], alert['category'],
+             alert['severity'], severity_rank(alert['severity']), alert['model_source'],
+             alert['status'], _dumps(alert)),
+        )
+
+    @staticmethod
+    def _patch_statements(alert_id, fields, where=""):
+        """(sql, params) statements for a field-level update of both the JSON and the indexed columns."""
+        statements = []
+        columns = [f"{name} = ?" for name in INDEXED_FIELDS if name in fields]
+        params = [fields[name] for name in INDEXED_FIELDS if name in fields]
+        if 'severity' in fields:
+            columns.append("severity_rank = ?")
+            params.append(severity_rank(fields['severity']))
+        if 'severity' in fields or 'category' in fields:
+            statements.append((_NEXT_BUCKET_SEQ, ()))
+            columns.append(f"bucket_seq = {_BUCKET_SEQ}")
+        paths = ", ".join("?, json(?)" for _ in fields)
+        columns.append(f"data = json_set(data, {paths})")
+        for name, value in fields.items():
+            params.extend((f'$."{name}"', _dumps(value)))
+        params.append(alert_id)
+        statements.append((f"UPDATE alerts SET {', '.join(columns)} WHERE alert_id = ?{where}", params))
+        return statements
+
+    def _patch(self, alert, fields, where=""):
+        """Queue a field-level update of both the JSON and the indexed columns of ``alert``."""
+        state = self._batch_state()
+        alert.update(fields)
+        state.alerts[alert['alert_id']] = alert
+        *before, update = self._patch_statements(alert['alert_id'], fields, where)
+        state.pending.extend(before)
+        self._write(*update)
+
+    def update(self, alert_id, **fields):
+        alert = self.get(alert_id)
+        if alert is None:
+            return None
+        self._patch(alert, fields)
+        return alert
+
+    def modify_active(self, alert_id, change):
+        """
+        Apply ``change(alert) -> fields`` to an alert only while it is ACTIVE.
+
+        Outside a batch the row is read and patched in one ``BEGIN IMMEDIATE``
+        transaction, so ``change`` sees the alert as every process has left
+        it. Inside a batch ``change`` sees the alert as last committed or as
+        the batch has changed it, and the patch is queued with the batch;
+        either way it only applies while the row is still ACTIVE. Returns the
+        updated alert, or None if the alert is gone or no longer active.
+        """
+        if self._batch_state().depth:
+            alert = self.get(alert_id)
+            if alert is None or alert['status'] != 'ACTIVE':
+                return None
+            self._patch(alert, change(alert), " AND status = 'ACTIVE'")
+            return alert
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT data FROM alerts WHERE alert_id = ? AND status = 'ACTIVE'",
+                                   (alert_id,)).fetchone()
+                alert = None
+                if row is not None:
+                    alert = json.loads(row[0])
+                    fields = change(alert)
+                    for sql, params in self._patch_statements(alert_id, fields, " AND status = 'ACTIVE'"):
+                        conn.execute(sql, params)
+                    alert.update(fields)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return alert
+
+    # Severity/category are plain columns, so moving buckets is just an update
+    reindex = update
+
+    def resolve(self, alert_id, **fields):
+        return self.update(alert_id, **fields, status='RESOLVED')
+
+    def clear(self, **fields):
+        """Resolve every active alert, setting ``fields`` on it; history is kept, as in ``AlertStore``."""
+        fields = {**fields, 'status': 'RESOLVED'}
+        for alert in self._batch_state().alerts.values():
+            if alert['status'] == 'ACTIVE':
+                alert.update(fields)
+        paths = ", ".join("?, json(?)" for _ in fields)
+        params = [param for name, value in fields.items() for param in (f'$."{name}"', _dumps(value))]
+        self._write(f"UPDATE alerts SET status = 'RESOLVED', data = json_set(data, {paths}) "
+                    "WHERE status = 'ACTIVE'", params)
+
+    # ── Queries ──
+
+    @staticmethod
+    def _active_filter(severity, category):
+        clauses, params = ["status = 'ACTIVE'"], []
+        if severity:
+            # The rank lets the priority index serve the filter and the ordering
+            clauses.append("severity_rank = ? AND severity = ?")
+            params.extend((severity_rank(severity), severity))
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        return " AND ".join(clauses), params
+
+    def query_active(self, severity=None, category=None, limit=50, offset=0):
+        """One page of active alerts in priority order (severity, then age)."""
+        where, params = self._active_filter(severity, category)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM alerts WHERE {where} ORDER BY severity_rank, bucket_seq LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def iter_active(self, severity=None, category=None):
+        """All active alerts in priority order, fetched a page at a time."""
+        where, params = self._active_filter(severity, category)
+        after = (-1, -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT severity_rank, bucket_seq, data FROM alerts WHERE {where} "
+                    f"AND (severity_rank, bucket_seq) > (?, ?) ORDER BY severity_rank, bucket_seq LIMIT ?",
+                    (*params, *after, PAGE_SIZE),
+                ).fetchall()
+            for _, _, data in rows:
+                yield json.loads(data)
+            if len(rows) < PAGE_SIZE:
+                return
+            after = rows[-1][:2]
+
+    def query_history(self, animal_id=None, since=None, limit=50, offset=0):
+        """Alerts of any status, newest first, optionally for one animal / since an ISO timestamp."""
+        clauses, params = [], []
+        if animal_id:
+            clauses.append("animal_id = ?")
+            params.append(animal_id)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM alerts {where} ORDER BY seq DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    @property
+    def history(self):
+        """The newest ``history_size`` alerts, oldest first."""
+        return self.query_history(limit=self.history_size)[::-1]
+
+    @property
+    def total_generated(self):
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'alerts'").fetchone()
+        return row[0] if row else 0
+
+    def summary(self):
+        with self._lock:
+            conn = self._conn
+            by_severity = dict(conn.execute(
+                "SELECT severity, COUNT(*) FROM alerts WHERE status = 'ACTIVE' GROUP BY severity"))
+            by_category = dict(conn.execute(
+                "SELECT category, COUNT(*) FROM alerts WHERE status = 'ACTIVE' GROUP BY category"))
+            animals, = conn.execute(
+                "SELECT COUNT(DISTINCT animal_id) FROM alerts WHERE status = 'ACTIVE'").fetchone()
+        return {
+            'total_active': sum(by_severity.values()),
+            'by_severity': {sev: by_severity.get(sev, 0) for sev in SEVERITY_ORDER},
+            'by_category': by_category,
+            'total_historical': self.total_generated,
+            'unique_animals_affected': animals,
+        }
@@ -0,0 +1,118 @@
+"""
+Alert Deduplication
+=====================
+Coalesces repeated signals into one alert per incident.
+
+Signals are keyed by ``(animal_id, category, model_source)``. For each key
+the coalescer remembers the latest alert and when it was last seen:
+
+- an ACTIVE alert seen within the suppression window absorbs the signal:
+  its occurrence count and ``last_seen`` are bumped, and a higher severity
+  escalates it in place
+- a RESOLVED alert resolved within the window suppresses the signal, unless
+  the signal is more severe than the resolved alert
+- anything else (unknown key, or the key has been quiet longer than the
+  window) starts a new alert
+
+Every decision is one dict lookup. Expired keys are swept when the table
+doubles in size, so the cost per signal stays amortized O(1).
+"""
+
+import time
+
+from .alert_store import SEVERITY_ORDER
+
+
+DEFAULT_SUPPRESSION_WINDOW = 3600.0
+
+# Slow-moving conditions re-alert less often than the default
+DEFAULT_CATEGORY_WINDOWS = {
+    'LAMENESS': 12 * 3600.0,
+    'ENVIRONMENTAL': 3 * 3600.0,
+}
+
+COALESCE, SUPPRESS, NEW = 'coalesce', 'suppress', 'new'
+
+
+def severity_rank(severity):
+    """Lower is more severe; unknown severities rank below LOW."""
+    try:
+        return SEVERITY_ORDER.index(severity)
+    except ValueError:
+        return len(SEVERITY_ORDER)
+
+
+class AlertCoalescer:
+    """
+    Suppression-window bookkeeping for ``BiosecurityAlertSystem``.
+
+    Args:
+        window_seconds: default suppression window
+        category_windows: {category: window_seconds} overrides, merged over
+                          ``DEFAULT_CATEGORY_WINDOWS``
+        clock: time source in seconds (``time.time`` by default)
+    """
+
+    def __init__(self, window_seconds=DEFAULT_SUPPRESSION_WINDOW, category_windows=None, clock=time.time):
+        self.window = float(window_seconds)
+        self.category_windows = {**DEFAULT_CATEGORY_WINDOWS, **(category_windows or {})}
+        self.clock = clock
+        self._latest = {}               # key -> [alert, last_seen]
+        self._sweep_at = 1024
+        self.coalesced = 0
+        self.suppressed = 0
+        self.escalated = 0
+
+    @staticmethod
+    def key(animal_id, category, model_source):
+        return (animal_id, category, model_source)
+
+    def window_for(self, category):
+        return self.category_windows.get(category, self.window)
+
+    def classify(self, key, severity, now):
+        """Return (decision, alert) for a signal; alert is None for NEW."""
+        entry = self._latest.get(key)
+        if entry is None:
+            return NEW, None
+        alert, last_seen = entry
+        if now - last_seen > self.window_for(key[1]):
+            return NEW, None
+        if alert['status'] == 'ACTIVE':
+            return COALESCE, alert
+        if severity_rank(severity) < severity_rank(alert['severity']):
+            return NEW, None
+        return SUPPRESS, alert
+
+    def record(self, key, alert, now):
+        """Remember ``alert`` as the latest for ``key``, seen at ``now``."""
+        self._latest[key] = [alert, now]
+        if len(self._latest) >= self._sweep_at:
+            self._sweep(now)
+
+    def resolved(self, alert, now):
+        """Start the post-resolution window for the key ``alert`` belongs to."""
+        key = self.key(alert['animal_id'], alert['category'], alert['model_source'])
+        entry = self._latest.get(key)
+        if entry is not None and entry[0]['alert_id'] == alert['alert_id']:
+            # A persistent store hands back its own copy; keep the resolved one
+            entry[:] = [alert, now]
+
+    def _sweep(self, now):
+        self._latest = {
+            key: entry for key, entry in self._latest.items()
+            if now - entry[1] <= self.window_for(key[1])
+        }
+        self._sweep_at = max(1024, 2 * len(self._latest))
+
+    def clear(self):
+        self._latest.clear()
+        self._sweep_at = 1024
+        self.coalesced = self.suppressed = self.escalated = 0
+
+    def stats(self):
+        return {
+            'coalesced_signals': self.coalesced,
+            'suppressed_signals': self.suppressed,
+            'escalations': self.escalated,
+        }
@@ -0,0 +1,170 @@
+"""
+Indexed Alert Store
+=====================
+In-memory storage behind ``BiosecurityAlertSystem``.
+
+Every operation the dashboard and scan loop perform is O(1) or O(limit):
+
+- alerts are indexed by ``alert_id`` for acknowledge / resolve
+- active alerts sit in insertion-ordered buckets per severity and per
+  (severity, category); walking the buckets in severity-priority order
+  yields alerts already sorted the way ``get_active_alerts`` returns them,
+  so a query touches only the alerts it returns
+- summary counters (by severity, by category, affected animals) are
+  updated as alerts are added, resolved or cleared
+- history is a bounded ring buffer; resolved alerts are forgotten once
+  they fall out of it
+"""
+
+from collections import Counter, deque
+from contextlib import nullcontext
+from itertools import islice
+
+
+# Severities in priority order; unknown severities sort after these
+SEVERITY_ORDER = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+
+class AlertStore:
+    """Alert dicts indexed by id, severity and category with incremental counters."""
+
+    def __init__(self, history_size=10_000):
+        self.alerts = {}                      # alert_id -> alert (active + retained resolved)
+        self.history = deque(maxlen=history_size)
+        self.total_generated = 0
+        self._out_of_history = set()          # active alerts already evicted from history
+
+        # Active-alert indexes; dicts double as insertion-ordered sets
+        self.severity_order = list(SEVERITY_ORDER)
+        self.active = {}
+        self.by_severity = {sev: {} for sev in SEVERITY_ORDER}
+        self.by_severity_category = {}
+        self.category_counts = Counter()
+        self.animal_counts = Counter()
+
+    def __contains__(self, alert_id):
+        return alert_id in self.alerts
+
+    def get(self, alert_id):
+        return self.alerts.get(alert_id)
+
+    # ── Index maintenance ──
+
+    def _index(self, alert):
+        severity, category = alert['severity'], alert['category']
+        if severity not in self.by_severity:
+            self.by_severity[severity] = {}
+            self.severity_order.append(severity)
+        alert_id = alert['alert_id']
+        self.active[alert_id] = alert
+        self.by_severity[severity][alert_id] = alert
+        self.by_severity_category.setdefault((severity, category), {})[alert_id] = alert
+        self.category_counts[category] += 1
+        self.animal_counts[alert['animal_id']] += 1
+
+    def _unindex(self, alert):
+        severity, category = alert['severity'], alert['category']
+        alert_id = alert['alert_id']
+        del self.active[alert_id]
+        del self.by_severity[severity][alert_id]
+        del self.by_severity_category[(severity, category)][alert_id]
+        for counter, key in ((self.category_counts, category), (self.animal_counts, alert['animal_id'])):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    # ── Mutations ──
+
+    def batch(self):
+        """Writes apply immediately; kept for interface parity with ``SQLiteAlertStore``."""
+        return nullcontext(self)
+
+    def add(self, alert):
+        if len(self.history) == self.history.maxlen:
+            oldest = self.history[0]
+            if self.alerts.get(oldest['alert_id']) is oldest:
+                if oldest['status'] == 'ACTIVE':
+                    self._out_of_history.add(oldest['alert_id'])
+                else:
+                    del self.alerts[oldest['alert_id']]
+        self.history.append(alert)
+        self.alerts[alert['alert_id']] = alert
+        self.total_generated += 1
+        if alert['status'] == 'ACTIVE':
+            self._index(alert)
+
+    def resolve(self, alert_id, **fields):
+        alert = self.alerts.get(alert_id)
+        if alert is None:
+            return None
+        if alert_id in self.active:
+            self._unindex(alert)
+        alert.update(fields, status='RESOLVED')
+        if alert_id in self._out_of_history:
+            # Nothing retains it any more once resolved
+            self._out_of_history.discard(alert_id)
+            del self.alerts[alert_id]
+        return alert
+
+    def update(self, alert_id, **fields):
+        alert = self.alerts.get(alert_id)
+        if alert is not None:
+            alert.update(fields)
+        return alert
+
+    def modify_active(self, alert_id, change):
+        """Apply ``change(alert) -> fields`` to an alert while it is active; returns it, or None."""
+        alert = self.active.get(alert_id)
+        if alert is None:
+            return None
+        fields = change(alert)
+        if 'severity' in fields or 'category' in fields:
+            return self.reindex(alert_id, **fields)
+        return self.update(alert_id, **fields)
+
+    def reindex(self, alert_id, **fields):
+        """Update an active alert's indexed fields (severity, category); it moves to the back of its new bucket."""
+        alert = self.active.get(alert_id)
+        if alert is None:
+            return self.update(alert_id, **fields)
+        self._unindex(alert)
+        alert.update(fields)
+        self._index(alert)
+        return alert
+
+    def clear(self, **fields):
+        """Resolve every active alert, setting ``fields`` on it; history is kept."""
+        for alert_id in list(self.active):
+            self.resolve(alert_id, **fields)
+
+    # ── Queries ──
+
+    def iter_active(self, severity=None, category=None):
+        """Active alerts in priority order (severity, then age)."""
+        severities = [severity] if severity else self.severity_order
+        for sev in severities:
+            bucket = (self.by_severity.get(sev, {}) if category is None
+                      else self.by_severity_category.get((sev, category), {}))
+            yield from bucket.values()
+
+    def query_active(self, severity=None, category=None, limit=50, offset=0):
+        return list(islice(self.iter_active(severity, category), offset, offset + limit))
+
+    def query_history(self, animal_id=None, since=None, limit=50, offset=0):
+        """Alerts of any status still in history, newest first."""
+        matches = (
+            alert for alert in reversed(self.history)
+            if (not animal_id or alert['animal_id'] == animal_id)
+            and (not since or alert['timestamp'] >= since)
+        )
+        return list(islice(matches, offset, offset + limit))
+
+    def summary(self):
+        by_severity = {sev: len(self.by_severity[sev]) for sev in SEVERITY_ORDER}
+        return {
+            'total_active': len(self.active),
+            'by_severity': by_severity,
+            'by_category': dict(self.category_counts),
+            'total_historical': self.total_generated,
+            'unique_animals_affected': len(self.animal_counts),
+        }
@@ -9,6 +9,9 @@ from datetime import datetime
 from collections import defaultdict
 import uuid
 
+from .alert_store import AlertStore
+from .alert_dedup import AlertCoalescer, COALESCE, SUPPRESS, DEFAULT_SUPPRESSION_WINDOW, severity_rank
+
 
 class BiosecurityAlertSystem:
     """
@@ -34,15 +37,65 @@ class BiosecurityAlertSystem:
         'ENVIRONMENTAL':    'Environmental Stress Alert',
     }
 
-    def __init__(self):
-        self.active_alerts = []
-        self.alert_history = []
+    def __init__(self, history_size=10_000, suppression_window=DEFAULT_SUPPRESSION_WINDOW,
+                 category_windows=None, clock=None, store=None):
+        """
+        Args:
+            history_size: number of most recent alerts kept in ``alert_history``;
+                          resolved alerts older than that are dropped
+            suppression_window: seconds a repeated signal for the same
+                          (animal, category, model) folds into the existing
+                          alert instead of raising a new one
+            category_windows: per-category overrides of ``suppression_window``
+            clock: time source in seconds for the windows (default ``time.time``)
+            store: alert storage; defaults to an in-memory ``AlertStore``. Pass a
+                   ``SQLiteAlertStore`` to persist alerts and share them
+                   between processes.
+        """
+        self.store = store if store is not None else AlertStore(history_size=history_size)
         self.alert_counts = defaultdict(int)
+        coalescer_args = {'clock': clock} if clock is not None else {}
+        self.coalescer = AlertCoalescer(suppression_window, category_windows, **coalescer_args)
+        if store is not None and clock is None:
+            self._resume_coalescing()
+
+    def _resume_coalescing(self):
+        """Pick up active alerts already in a persistent store, so repeats keep coalescing after a restart."""
+        for alert in self.store.iter_active():
+            last_seen = alert.get('last_seen', alert['timestamp'])
+            key = self.coalescer.key(alert['animal_id'], alert['category'], alert['model_source'])
+            self.coalescer.record(key, alert, datetime.fromisoformat(last_seen).timestamp())
+
+    def batch(self):
+        """Group the alerts of one scan cycle into a single store write."""
+        return self.store.batch()
+
+    @property
+    def active_alerts(self):
+        """Currently active alerts in priority order."""
+        return list(self.store.iter_active())
+
+    @property
+    def alert_history(self):
+        return list(self.store.history)
+
+    def _new_alert_id(self):
+        # 8 hex chars collide after tens of thousands of alerts; the id index must stay unique
+        while True:
+            alert_id = str(uuid.uuid4())[:8].upper()
+            if alert_id not in self.store:
+                return alert_id
 
     def generate_alert(self, animal_id, category, severity, message, details=None, model_source=None):
         """
-        Generate a new biosecurity alert.
-        
+        Generate a biosecurity alert, or fold the signal into an existing one.
+
+        A signal for the same (animal_id, category, model_source) as an active
+        alert seen within the suppression window updates that alert instead:
+        ``occurrences``, ``last_seen`` and ``details`` are refreshed, and a more
+        severe signal escalates it in place. Signals shortly after the alert
+        was resolved are suppressed unless they are more severe.
+
         Args:
             animal_id: ID of the affected animal
             category: Alert category (from ALERT_CATEGORIES)
@@ -52,11 +105,25 @@ class BiosecurityAlertSystem:
             model_source: Which ML model generated this alert
         
         Returns:
-            dict with full alert information
+            dict with full alert information (the new, coalesced or suppressing alert)
         """
+        now = self.coalescer.clock()
+        timestamp = datetime.now().isoformat()
+        key = self.coalescer.key(animal_id, category, model_source)
+        decision, existing = self.coalescer.classify(key, severity, now)
+        if decision == COALESCE:
+            alert = self._coalesce(key, existing, severity, message, details, timestamp, now)
+            if alert is not None:
+                return alert
+            # No longer active in the store (resolved elsewhere): this signal starts a new incident
+        elif decision == SUPPRESS:
+            self.coalescer.suppressed += 1
+            self._update(existing, suppressed_occurrences=existing.get('suppressed_occurrences', 0) + 1)
+            return existing
+
         alert = {
-            'alert_id': str(uuid.uuid4())[:8].upper(),
-            'timestamp': datetime.now().isoformat(),
+            'alert_id': self._new_alert_id(),
+            'timestamp': timestamp,
             'animal_id': animal_id,
             'category': category,
             'category_label': self.ALERT_CATEGORIES.get(category, category),
@@ -67,14 +134,60 @@ class BiosecurityAlertSystem:
             'model_source': model_source,
             'status': 'ACTIVE',
             'acknowledged': False,
+            'occurrences': 1,
+            'first_seen': timestamp,
+            'last_seen': timestamp,
         }
 
-        self.active_alerts.append(alert)
-        self.alert_history.append(alert)
+        self.store.add(alert)
         self.alert_counts[severity] += 1
+        self.coalescer.record(key, alert, now)
 
         return alert
 
+    def _coalesce(self, key, alert, severity, message, details, timestamp, now):
+        """
+        Fold a repeated signal into ``alert``, escalating its severity if needed.
+
+        The coalescer's copy of the alert is only a hint: the store applies the
+        change to its current state, so occurrences and severity build on what
+        every process has written. Returns None, without touching the alert,
+        if it is no longer active in the store.
+        """
+        escalated = []
+
+        def change(current):
+            fields = {
+                'occurrences': current.get('occurrences', 1) + 1,
+                'last_seen': timestamp,
+                'details': details or {},
+            }
+            if severity_rank(severity) < severity_rank(current['severity']):
+                escalated.append(True)
+                fields.update(
+                    severity=severity,
+                    severity_info=self.SEVERITY_LEVELS.get(severity, self.SEVERITY_LEVELS['LOW']),
+                    message=message,
+                    escalated_from=current['severity'],
+                    escalated_at=timestamp,
+                    # An escalated alert needs looking at again
+                    acknowledged=False,
+                )
+            return fields
+
+        updated = self.store.modify_active(alert['alert_id'], change)
+        if updated is None:
+            return None
+        self.coalescer.coalesced += 1
+        self.coalescer.escalated += len(escalated)
+        self.coalescer.record(key, updated, now)
+        return updated
+
+    def _update(self, alert, **fields):
+        # The store may hold its own copy of the alert (SQLite), so update both
+        self.store.update(alert['alert_id'], **fields)
+        alert.update(fields)
+
     def process_health_prediction(self, animal_id, health_result):
         """Generate alerts from health prediction results."""
         alerts = []
@@ -238,61 +351,44 @@ class BiosecurityAlertSystem:
 
         return alerts
 
-    def get_active_alerts(self, severity=None, category=None, limit=50):
-        """Get active alerts, optionally filtered."""
-        alerts = [a for a in self.active_alerts if a['status'] == 'ACTIVE']
+    def process_scan_result(self, animal_id, result):
+        """Run every model output of one ``scan_readings`` result through the alert rules."""
+        return [
+            *self.process_health_prediction(animal_id, result['health']),
+            *self.process_anomaly_detection(animal_id, result['anomaly']),
+            *self.process_gait_analysis(animal_id, result['gait']),
+            *self.process_disease_forecast(animal_id, result['disease']),
+            *self.process_behavior_analysis(animal_id, result['behavior']),
+        ]
 
-        if severity:
-            alerts = [a for a in alerts if a['severity'] == severity]
-        if category:
-            alerts = [a for a in alerts if a['category'] == category]
+    def get_active_alerts(self, severity=None, category=None, limit=50, offset=0):
+        """Get active alerts, optionally filtered, highest severity first."""
+        return self.store.query_active(severity=severity, category=category, limit=limit, offset=offset)
 
-        # Sort by priority (severity)
-        priority_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
-        alerts.sort(key=lambda a: priority_order.get(a['severity'], 4))
-
-        return alerts[:limit]
+    def get_alert_history(self, animal_id=None, since=None, limit=50, offset=0):
+        """Alerts of any status, newest first, optionally for one animal or since an ISO timestamp."""
+        return self.store.query_history(animal_id=animal_id, since=since, limit=limit, offset=offset)
 
     def get_alert_summary(self):
-        """Get a summary of current alert status."""
-        active = [a for a in self.active_alerts if a['status'] == 'ACTIVE']
-
-        return {
-            'total_active': len(active),
-            'by_severity': {
-                'CRITICAL': len([a for a in active if a['severity'] == 'CRITICAL']),
-                'HIGH': len([a for a in active if a['severity'] == 'HIGH']),
-                'MEDIUM': len([a for a in active if a['severity'] == 'MEDIUM']),
-                'LOW': len([a for a in active if a['severity'] == 'LOW']),
-            },
-            'by_category': {
-                cat: len([a for a in active if a['category'] == cat])
-                for cat in set(a['category'] for a in active)
-            },
-            'total_historical': len(self.alert_history),
-            'unique_animals_affected': len(set(a['animal_id'] for a in active)),
-        }
+        """Get a summary of current alert status (maintained incrementally, O(1))."""
+        return {**self.store.summary(), **self.coalescer.stats()}
 
     def acknowledge_alert(self, alert_id):
         """Acknowledge an alert."""
-        for alert in self.active_alerts:
-            if alert['alert_id'] == alert_id:
-                alert['acknowledged'] = True
-                alert['acknowledged_at'] = datetime.now().isoformat()
-                return True
-        return False
+        return self.store.update(alert_id, acknowledged=True,
+                                 acknowledged_at=datetime.now().isoformat()) is not None
 
     def resolve_alert(self, alert_id, resolution_note=''):
-        """Resolve and close an alert."""
-        for alert in self.active_alerts:
-            if alert['alert_id'] == alert_id:
-                alert['status'] = 'RESOLVED'
-                alert['resolved_at'] = datetime.now().isoformat()
-                alert['resolution_note'] = resolution_note
-                return True
-        return False
+        """Resolve and close an alert; repeats of it are suppressed for the suppression window."""
+        alert = self.store.resolve(alert_id, resolved_at=datetime.now().isoformat(),
+                                   resolution_note=resolution_note)
+        if alert is None:
+            return False
+        self.coalescer.resolved(alert, self.coalescer.clock())
+        return True
 
     def clear_all_alerts(self):
-        """Clear all active alerts (for demo / reset purposes)."""
-        self.active_alerts = []
+        """Resolve all active alerts (for demo / reset purposes); alert history is kept."""
+        self.store.clear(resolved_at=datetime.now().isoformat(), resolution_note='Cleared')
+        self.coalescer.clear()
         self.alert_counts = defaultdict(int)
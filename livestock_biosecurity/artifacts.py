@@ -0,0 +1,219 @@
+"""
+Model Artifact Format
+=======================
+Versioned on-disk format for the trained livestock models, used by
+``save_models`` / ``load_models`` in place of pickled wrapper objects.
+
+Every save writes a new version directory and then switches the
+``current`` pointer file to it with one atomic rename::
+
+    current                         name of the live version directory
+    v<timestamp>/manifest.json      schema version, per-model features, scaler
+                                    params, label classes, metrics, and the
+                                    estimator type/params/array list
+    v<timestamp>/<model>/<array>.npy
+                                    flattened tree arrays (see compiled_trees)
+    v<timestamp>/<model>.pkl        the sklearn wrapper, for backend='sklearn'
+
+Readers resolve ``current`` once (``current_version``) and read the
+manifest and every array from that directory, so a save never mixes one
+version's manifest with another's arrays, even for a ``LazyEstimator``
+that maps its arrays long after startup. The newest ``KEEP_VERSIONS``
+versions are kept; a process still serving an older one must have mapped
+its arrays (or be restarted). Directories from before versioning (manifest
+at the top level, no ``current``) are still read.
+
+The manifest is small JSON, so loading it is instant. Estimator arrays are
+opened with ``np.load(mmap_mode='r')`` the first time a model predicts;
+several server worker processes reading the same files share those pages
+through the OS page cache instead of each holding a private unpickled copy.
+Nothing on the compiled load path imports sklearn.
+"""
+
+import os
+import json
+import pickle
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from .compiled_trees import COMPILED_TYPES
+
+
+ARTIFACT_SCHEMA_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+CURRENT_NAME = 'current'
+KEEP_VERSIONS = 5
+
+
+class ArrayScaler:
+    """StandardScaler.transform from stored mean/scale arrays."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X):
+        # Same operations, in the same order, as StandardScaler.transform
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class ArrayLabelEncoder:
+    """LabelEncoder lookups from the stored ``classes_`` array."""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+    def transform(self, labels):
+        return np.searchsorted(self.classes_, np.asarray(labels))
+
+
+class LazyEstimator:
+    """
+    Stands in for a compiled estimator until it is first used.
+
+    The arrays are memory-mapped on first attribute access (e.g. the first
+    ``predict``), so startup only reads the manifest.
+    """
+
+    def __init__(self, directory, spec):
+        self._directory = Path(directory)
+        self._spec = spec
+        self._estimator = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self._estimator is not None
+
+    def load(self):
+        if self._estimator is None:
+            with self._lock:
+                if self._estimator is None:
+                    if not self._directory.exists():
+                        raise RuntimeError(f"Model version {self._directory} was pruned by later saves; "
+                                           f"reload the models")
+                    arrays = {
+                        name: np.load(self._directory / f"{name}.npy", mmap_mode='r')
+                        for name in self._spec['arrays']
+                    }
+                    cls = COMPILED_TYPES[self._spec['type']]
+                    self._estimator = cls.from_state(self._spec['params'], arrays)
+        return self._estimator
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+def _json_safe(value):
+    """Convert numpy scalars/containers in metrics to plain JSON types."""
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def current_version(save_dir):
+    """The live version directory of ``save_dir`` (``save_dir`` itself in the pre-versioning layout)."""
+    save_path = Path(save_dir)
+    pointer = save_path / CURRENT_NAME
+    if not pointer.exists():
+        return save_path
+    return save_path / pointer.read_text().strip()
+
+
+def _prune_versions(save_path, keep=KEEP_VERSIONS):
+    """Delete all but the newest ``keep`` version directories (never the live one)."""
+    live = current_version(save_path).name
+    versions = sorted(p for p in save_path.glob('v*') if p.is_dir() and (p / MANIFEST_NAME).exists())
+    for old in versions[:-keep]:
+        if old.name != live:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def write_artifacts(entries, save_dir, pickles=None):
+    """
+    Write model entries as a new version of an artifact directory and make it live.
+
+    Args:
+        entries: {name: {'class', 'features', 'scaler', 'label_classes',
+                  'metrics', 'estimator'}} where 'estimator' is a compiled
+                  estimator and 'scaler' a fitted StandardScaler
+        save_dir: output directory
+        pickles: optional {name: object} pickled as ``<name>.pkl`` into the
+                 same version
+
+    Nothing in the new version is visible until the ``current`` pointer is
+    renamed over the old one, after every file is written.
+    """
+    save_path = Path(save_dir)
+    save_path.mkdir(parents=True, exist_ok=True)
+    version_path = save_path / f"v{datetime.now():%Y%m%d-%H%M%S-%f}"
+    version_path.mkdir()
+
+    manifest = {
+        'schema_version': ARTIFACT_SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'models': {},
+    }
+    for name, entry in entries.items():
+        params, arrays = entry['estimator'].state()
+        model_dir = version_path / name
+        model_dir.mkdir()
+        for array_name, array in arrays.items():
+            np.save(model_dir / f"{array_name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+
+        scaler = entry['scaler']
+        label_classes = entry.get('label_classes')
+        manifest['models'][name] = {
+            'class': entry['class'],
+            'features': list(entry['features']),
+            'scaler': {'mean': scaler.mean_.tolist(), 'scale': scaler.scale_.tolist()},
+            'label_classes': None if label_classes is None else _json_safe(label_classes),
+            'metrics': _json_safe(entry.get('metrics', {})),
+            'estimator': {
+                'type': type(entry['estimator']).__name__,
+                'params': params,
+                'arrays': sorted(arrays),
+            },
+        }
+
+    with open(version_path / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    for name, obj in (pickles or {}).items():
+        with open(version_path / f"{name}.pkl", 'wb') as f:
+            pickle.dump(obj, f)
+
+    tmp = save_path / f"{CURRENT_NAME}.{os.getpid()}.tmp"
+    tmp.write_text(version_path.name)
+    os.replace(tmp, save_path / CURRENT_NAME)
+    _prune_versions(save_path)
+    return manifest
+
+
+def read_manifest(version_dir):
+    """Read and validate the manifest of a version directory (see ``current_version``); None if absent."""
+    path = Path(version_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    version = manifest.get('schema_version')
+    if version != ARTIFACT_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported model artifact schema version {version} in {path} "
+                         f"(expected {ARTIFACT_SCHEMA_VERSION})")
+    return manifest
@@ -0,0 +1,179 @@
+"""
+Batch Inference Engine
+========================
+Scores a whole herd DataFrame with all four livestock models at once.
+
+The upload is converted once into a shared feature matrix
+(``FeaturePipeline``); each model runs a single vectorized inference over its
+column view of that matrix instead of one sklearn call per animal, and the
+results are assembled column-wise into one DataFrame.
+
+For large uploads, ``stream_scan_events`` parses the CSV in fixed-size
+chunks and scores each chunk as it arrives, so memory stays bounded by the
+chunk size and the first results go out before the file is fully parsed.
+"""
+
+import os
+import json
+
+import pandas as pd
+
+from .features import FeaturePipeline
+from .models import predict_readings
+from .cv_module import GaitAnalyzer, BehaviorAnalyzer
+
+
+def score_herd(models, df, pipeline=None):
+    """
+    Run all four models over a DataFrame of sensor readings.
+
+    Args:
+        models: dict from ``load_models`` (health_predictor, anomaly_detector,
+                gait_predictor, disease_forecaster)
+        df: one reading per row; row ids are taken from ``df.index``.
+            A missing ``thi_index`` is computed from temperature/humidity.
+        pipeline: optional prebuilt ``FeaturePipeline.for_models(models)``
+
+    Returns:
+        pd.DataFrame indexed like ``df`` with one column per model output
+    """
+    pipeline = pipeline or FeaturePipeline.for_models(models)
+    X = pipeline.transform(df)
+
+    health = models['health_predictor'].predict_rows(pipeline.view(X, 'health_predictor'))
+    anomaly = models['anomaly_detector'].predict_rows(pipeline.view(X, 'anomaly_detector'))
+    gait = models['gait_predictor'].predict_rows(pipeline.view(X, 'gait_predictor'))
+    disease = models['disease_forecaster'].predict_rows(pipeline.view(X, 'disease_forecaster'))
+
+    scored = pd.DataFrame(index=df.index)
+    if 'animal_id' in df.columns:
+        scored['animal_id'] = df['animal_id']
+    else:
+        scored['animal_id'] = [f'A-{i + 1}' for i in df.index]
+    scored['health_status'] = health['predicted_status']
+    scored['health_label'] = health['predicted_label']
+    scored['health_confidence'] = health['confidence']
+    scored['is_anomaly'] = anomaly['predicted_anomaly']
+    scored['anomaly_score'] = anomaly['anomaly_score']
+    scored['anomaly_severity'] = anomaly['anomaly_severity']
+    scored['gait_score'] = gait['predicted_gait_score']
+    scored['lameness_label'] = gait['lameness_label']
+    scored['needs_attention'] = gait['needs_attention']
+    scored['predicted_disease'] = disease['predicted_disease']
+    scored['disease_confidence'] = disease['disease_confidence']
+    scored['is_healthy'] = disease['is_healthy']
+    return scored
+
+
+def scan_readings(models, readings, pipeline=None, alert_system=None,
+                  gait_analyzer=None, behavior_analyzer=None):
+    """
+    Full ``/api/livestock/scan`` result for each of several single readings.
+
+    The four models and the CV gait / behavior analyzers each run once over
+    all readings together. Pass long-lived ``gait_analyzer`` /
+    ``behavior_analyzer`` instances to keep per-animal score trends across
+    calls (fresh ones are used otherwise). With an ``alert_system``,
+    readings that carry an ``animal_id`` are run through its alert rules and
+    the alerts they raised are returned under ``'alerts'``; all alerts of the
+    call are written to the store in one batch.
+    """
+    predictions = predict_readings(models, readings, pipeline)
+    gait_cv = (gait_analyzer or GaitAnalyzer()).analyze_gait_records(readings)
+    behavior = (behavior_analyzer or BehaviorAnalyzer()).analyze_behavior_records(readings)
+    results = [
+        {
+            'health': preds['health_predictor'],
+            'anomaly': preds['anomaly_detector'],
+            'gait': preds['gait_predictor'],
+            'disease': preds['disease_forecaster'],
+            'gait_cv': gait,
+            'behavior': behav,
+        }
+        for preds, gait, behav in zip(predictions, gait_cv, behavior)
+    ]
+    if alert_system is not None:
+        with alert_system.batch():
+            for reading, result in zip(readings, results):
+                if reading.get('animal_id'):
+                    result['alerts'] = alert_system.process_scan_result(reading['animal_id'], result)
+    return results
+
+
+def to_scan_rows(scored):
+    """Format scored rows the way the ``/api/livestock/scan-csv`` endpoints return them."""
+    return [
+        {
+            'id': int(idx) + 1,
+            'animal_id': animal_id,
+            'health': label,
+            'confidence': f"{conf * 100:.0f}%",
+            'disease': disease.replace('_', ' '),
+            'gait': f"{gait:.1f}",
+            'anomaly': bool(anomaly),
+        }
+        for idx, animal_id, label, conf, disease, gait, anomaly in zip(
+            scored.index, scored['animal_id'], scored['health_label'],
+            scored['health_confidence'], scored['predicted_disease'],
+            scored['gait_score'], scored['is_anomaly'],
+        )
+    ]
+
+
+def iter_scored_chunks(models, fileobj, chunk_size=500, first_chunk_size=100):
+    """
+    Parse a CSV file object chunk by chunk and score each chunk.
+
+    The first chunk is kept small so results start flowing quickly.
+    Row indices continue across chunks, so ``id`` values match a full read.
+
+    Yields:
+        (scored chunk DataFrame, progress dict)
+    """
+    try:
+        total_bytes = os.fstat(fileobj.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        total_bytes = None
+
+    reader = pd.read_csv(fileobj, chunksize=chunk_size)
+    pipeline = FeaturePipeline.for_models(models)
+    rows = 0
+    size = first_chunk_size
+    with reader:
+        while True:
+            try:
+                chunk = reader.get_chunk(size)
+            except StopIteration:
+                break
+            size = chunk_size
+            scored = score_herd(models, chunk, pipeline)
+            rows += len(chunk)
+            progress = {'rows': rows}
+            if total_bytes:
+                bytes_read = min(fileobj.tell(), total_bytes)
+                progress.update(bytes_read=bytes_read, total_bytes=total_bytes,
+                                pct=round(bytes_read / total_bytes * 100, 1))
+            yield scored, progress
+
+
+def _format_event(payload, fmt):
+    line = json.dumps(payload)
+    return f"data: {line}\n\n" if fmt == 'sse' else f"{line}\n"
+
+
+def stream_scan_events(models, fileobj, chunk_size=500, fmt='ndjson'):
+    """
+    Stream scan-csv results as NDJSON lines (``fmt='ndjson'``) or SSE events (``fmt='sse'``).
+
+    Every chunk produces a ``results`` event followed by a ``progress`` event;
+    the stream ends with ``done`` (or ``error`` if parsing/scoring fails).
+    """
+    total = 0
+    try:
+        for scored, progress in iter_scored_chunks(models, fileobj, chunk_size):
+            total = progress['rows']
+            yield _format_event({'event': 'results', 'results': to_scan_rows(scored)}, fmt)
+            yield _format_event({'event': 'progress', **progress}, fmt)
+        yield _format_event({'event': 'done', 'total': total}, fmt)
+    except Exception as e:
+        yield _format_event({'event': 'error', 'error': str(e), 'rows_scored': total}, fmt)
@@ -0,0 +1,334 @@
+"""
+Compiled Tree-Ensemble Inference
+==================================
+Optional fast inference backend for the fitted sklearn ensembles used by the
+livestock models (RandomForestClassifier, IsolationForest,
+GradientBoostingRegressor, GradientBoostingClassifier).
+
+At load time every tree of an ensemble is flattened into one set of
+contiguous NumPy arrays (feature, threshold, left, right, value). Prediction
+walks all trees for all rows at once, one tree level per step, so a single
+reading costs a handful of array operations instead of sklearn's per-call
+validation and thread-pool dispatch.
+
+The compiled estimators expose the same predict / predict_proba /
+decision_function methods the model wrappers call, and ``verify_compiled``
+checks them against the original sklearn estimator before they are used.
+Their state is plain arrays plus a few scalars (``state`` / ``from_state``),
+which is what the model artifact format stores; this module never imports
+sklearn, so serving from artifacts doesn't pay that import.
+"""
+
+import numpy as np
+
+
+BLOCK_ROWS = 2048
+
+
+def _blocked(fn, X):
+    """Apply fn to row blocks so (n_trees, n_rows) temporaries stay small for big batches."""
+    X = np.asarray(X)
+    if len(X) <= BLOCK_ROWS:
+        return fn(X)
+    return np.concatenate([fn(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+
+class CompiledForest:
+    """All trees of an ensemble flattened into shared node arrays."""
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'nan_left', 'value', 'roots')
+
+    def __init__(self, trees, feature_maps=None):
+        """
+        Args:
+            trees: list of fitted sklearn ``Tree`` objects (``estimator.tree_``)
+            feature_maps: optional per-tree arrays mapping the tree's local
+                feature index to a column of the full input (IsolationForest
+                trains each tree on a feature subset)
+        """
+        features, thresholds, lefts, rights, nan_left, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for t, tree in enumerate(trees):
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            idx = np.arange(n)
+
+            feature = tree.feature.astype(np.intp)
+            if feature_maps is not None:
+                feature = np.where(is_leaf, 0, np.asarray(feature_maps[t])[np.where(is_leaf, 0, feature)])
+            # Leaves point at themselves so the walk needs no per-row leaf test
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, idx, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, idx, tree.children_right) + offset)
+            missing_left = getattr(tree, 'missing_go_to_left', None)
+            nan_left.append(np.zeros(n, dtype=bool) if missing_left is None else missing_left.astype(bool))
+            values.append(tree.value.reshape(n, -1))
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.nan_left = np.concatenate(nan_left)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.n_trees = len(roots)
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays, max_depth):
+        """Rebuild from ``arrays()`` output; arrays (e.g. read-only memmaps) are used as-is."""
+        forest = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(forest, name, arrays[name])
+        forest.max_depth = int(max_depth)
+        forest.n_trees = len(forest.roots)
+        return forest
+
+    def apply(self, X):
+        """Return the leaf node index reached by every row in every tree, shape (n_trees, n_rows)."""
+        # sklearn compares float32 inputs against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[None, :]
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.nan_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def leaf_values(self, X):
+        """Leaf values per tree and row, shape (n_trees, n_rows, n_values)."""
+        return self.value[self.apply(X)]
+
+
+class CompiledEstimator:
+    """Serialization shared by the compiled estimators: a forest plus named scalars and arrays."""
+
+    PARAMS = ()
+    ARRAYS = ()
+
+    def state(self):
+        """Return (JSON-safe params, dict of arrays) describing this estimator."""
+        params = {'max_depth': self.forest.max_depth}
+        for name in self.PARAMS:
+            value = getattr(self, name)
+            params[name] = value.item() if isinstance(value, np.generic) else value
+        arrays = self.forest.arrays()
+        arrays.update({name: np.asarray(getattr(self, name)) for name in self.ARRAYS})
+        return params, arrays
+
+    @classmethod
+    def from_state(cls, params, arrays):
+        estimator = cls.__new__(cls)
+        estimator.forest = CompiledForest.from_arrays(arrays, params['max_depth'])
+        for name in cls.PARAMS:
+            setattr(estimator, name, params[name])
+        for name in cls.ARRAYS:
+            setattr(estimator, name, arrays[name])
+        return estimator
+
+
+class CompiledRandomForestClassifier(CompiledEstimator):
+    """Drop-in predict / predict_proba for a fitted RandomForestClassifier."""
+
+    PARAMS = ('n_classes_',)
+    ARRAYS = ('classes_', 'feature_importances_')
+
+    def __init__(self, model):
+        self.classes_ = model.classes_
+        self.n_classes_ = model.n_classes_
+        self.feature_importances_ = model.feature_importances_
+        self.forest = CompiledForest([est.tree_ for est in model.estimators_])
+        # Per-leaf class fractions, as DecisionTreeClassifier.predict_proba normalizes them
+        value = self.forest.value
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        self.forest.value = value / totals
+
+    def predict_proba(self, X):
+        return _blocked(self._predict_proba, X)
+
+    def _predict_proba(self, X):
+        leaves = self.forest.leaf_values(X)
+        proba = np.zeros(leaves.shape[1:])
+        for tree_proba in leaves:
+            proba += tree_proba
+        return proba / self.forest.n_trees
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def _average_path_length(n_samples):
+    """Average unsuccessful-search path length in a BST of n samples (as in sklearn's iForest)."""
+    n = np.asarray(n_samples, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def _node_depths(tree):
+    depth = np.zeros(tree.node_count, dtype=np.float64)
+    for node in range(tree.node_count):  # children always come after their parent
+        if tree.children_left[node] != -1:
+            depth[tree.children_left[node]] = depth[node] + 1
+            depth[tree.children_right[node]] = depth[node] + 1
+    return depth
+
+
+class CompiledIsolationForest(CompiledEstimator):
+    """Drop-in score_samples / decision_function / predict for a fitted IsolationForest."""
+
+    PARAMS = ('offset_', 'denominator')
+
+    def __init__(self, model):
+        self.offset_ = model.offset_
+        trees = [est.tree_ for est in model.estimators_]
+        self.forest = CompiledForest(trees, feature_maps=model.estimators_features_)
+        # Leaf value = path length to the leaf + expected remaining depth below it
+        self.forest.value = np.concatenate([
+            ((_node_depths(tree) + 1.0) + _average_path_length(tree.n_node_samples) - 1.0)[:, None]
+            for tree in trees
+        ])
+        self.denominator = len(trees) * float(_average_path_length([model.max_samples_])[0])
+
+    def score_samples(self, X):
+        return _blocked(self._score_samples, X)
+
+    def _score_samples(self, X):
+        leaves = self.forest.leaf_values(X)[:, :, 0]
+        depths = np.zeros(leaves.shape[1])
+        for tree_depths in leaves:
+            depths += tree_depths
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2 ** (-depths / self.denominator))
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def _init_raw(model):
+    """Constant raw prediction of a gradient-boosting init estimator."""
+    if not (model.init_ == 'zero' or type(model.init_).__name__ in ('DummyClassifier', 'DummyRegressor')):
+        raise TypeError(f"Unsupported gradient boosting init estimator: {model.init_!r}")
+    probe = np.zeros((1, model.n_features_in_), dtype=np.float32)
+    return model._raw_predict_init(probe)[0]
+
+
+class CompiledGradientBoosting(CompiledEstimator):
+    """Shared raw-prediction path for gradient-boosting regressors and classifiers."""
+
+    PARAMS = ('learning_rate', 'n_stages', 'n_outputs')
+    ARRAYS = ('init',)
+
+    def __init__(self, model):
+        self.learning_rate = model.learning_rate
+        self.n_stages, self.n_outputs = model.estimators_.shape
+        # Stage-major order: tree (stage, k) is at index stage * n_outputs + k
+        self.forest = CompiledForest([est.tree_ for est in model.estimators_.ravel()])
+        self.init = _init_raw(model)
+
+    def _raw_predict(self, X):
+        return _blocked(self._raw_predict_block, X)
+
+    def _raw_predict_block(self, X):
+        leaves = self.forest.leaf_values(X)[:, :, 0]
+        raw = np.tile(self.init, (leaves.shape[1], 1))
+        stages = leaves.reshape(self.n_stages, self.n_outputs, -1)
+        for stage in stages:
+            raw += self.learning_rate * stage.T
+        return raw
+
+
+class CompiledGradientBoostingRegressor(CompiledGradientBoosting):
+    """Drop-in predict for a fitted GradientBoostingRegressor (squared-error style losses)."""
+
+    def predict(self, X):
+        return self._raw_predict(X).ravel()
+
+
+class CompiledGradientBoostingClassifier(CompiledGradientBoosting):
+    """Drop-in predict / predict_proba for a fitted GradientBoostingClassifier (log loss)."""
+
+    ARRAYS = ('init', 'classes_')
+
+    def __init__(self, model):
+        if getattr(model, 'loss', 'log_loss') not in ('log_loss', 'deviance'):
+            raise TypeError(f"Unsupported gradient boosting loss: {model.loss!r}")
+        super().__init__(model)
+        self.classes_ = model.classes_
+
+    def decision_function(self, X):
+        raw = self._raw_predict(X)
+        return raw.ravel() if raw.shape[1] == 1 else raw
+
+    def predict_proba(self, X):
+        raw = self._raw_predict(X)
+        if raw.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        raw = raw - raw.max(axis=1, keepdims=True)
+        exp = np.exp(raw)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        raw = self.decision_function(X)
+        encoded = (raw >= 0).astype(int) if raw.ndim == 1 else np.argmax(raw, axis=1)
+        return self.classes_[encoded]
+
+
+# Keyed by sklearn class name so this module doesn't need to import sklearn
+COMPILERS = {
+    'RandomForestClassifier': CompiledRandomForestClassifier,
+    'IsolationForest': CompiledIsolationForest,
+    'GradientBoostingRegressor': CompiledGradientBoostingRegressor,
+    'GradientBoostingClassifier': CompiledGradientBoostingClassifier,
+}
+
+COMPILED_TYPES = {cls.__name__: cls for cls in COMPILERS.values()}
+
+
+def compile_estimator(model):
+    """Compile a fitted sklearn ensemble; raises TypeError for unsupported estimators."""
+    compiler = COMPILERS.get(type(model).__name__)
+    if compiler is None:
+        raise TypeError(f"No compiled backend for {type(model).__name__}")
+    return compiler(model)
+
+
+def verify_compiled(original, compiled, X, rtol=1e-7, atol=1e-9):
+    """
+    Check a compiled estimator against the sklearn original on inputs X.
+
+    Compares every continuous output the compiled estimator exposes
+    (predict_proba / decision_function / predict for regressors) and the
+    discrete predictions. Returns (ok, max_abs_diff).
+    """
+    max_diff = 0.0
+    for method in ('predict_proba', 'decision_function'):
+        if hasattr(compiled, method) and hasattr(original, method):
+            expected = getattr(original, method)(X)
+            got = getattr(compiled, method)(X)
+            max_diff = max(max_diff, float(np.max(np.abs(expected - got))))
+            if expected.shape != got.shape or not np.allclose(expected, got, rtol=rtol, atol=atol):
+                return False, max_diff
+    expected = original.predict(X)
+    got = compiled.predict(X)
+    if np.issubdtype(np.asarray(expected).dtype, np.floating):
+        max_diff = max(max_diff, float(np.max(np.abs(expected - got))))
+        return bool(np.allclose(expected, got, rtol=rtol, atol=atol)), max_diff
+    return bool(np.array_equal(expected, got)), max_diff
@@ -12,16 +12,123 @@ Here we simulate the CV pipeline outputs using rule-based + noise models.
 """
 
 import numpy as np
+import pandas as pd
 from datetime import datetime
-import random
 
+from .features import _column_source, _is_column_dict
+from .timeseries import AnimalSeriesStore, trend_direction
+
+
+def _rounded_rows(cols, rounding):
+    """Per-row lists of the ``rounding`` columns, rounded with one vectorized call per precision."""
+    names = list(rounding)
+    matrix = np.column_stack([cols[name] for name in names])
+    for decimals in set(rounding.values()):
+        idx = [i for i, name in enumerate(names) if rounding[name] == decimals]
+        matrix[:, idx] = np.round(matrix[:, idx], decimals)
+    return [dict(zip(names, row)) for row in matrix.tolist()]
+
+
+def _input_columns(readings, defaults):
+    """(n, {name: float64 column}) with missing fields / values filled from ``defaults``."""
+    n, get = _column_source(readings)
+    columns = {}
+    for name, default in defaults.items():
+        values = get(name)
+        columns[name] = (np.full(n, float(default)) if values is None
+                         else np.where(np.isnan(values), default, values))
+    return n, columns
+
+
+def _animal_ids(readings):
+    """``animal_id`` of every row, or None when the readings carry none."""
+    if isinstance(readings, pd.DataFrame):
+        return readings['animal_id'].tolist() if 'animal_id' in readings.columns else None
+    if isinstance(readings, dict):
+        if _is_column_dict(readings):
+            return list(readings['animal_id']) if 'animal_id' in readings else None
+        return [readings.get('animal_id')]
+    if isinstance(readings, (list, tuple)):
+        return [r.get('animal_id') for r in readings]
+    names = np.asarray(readings).dtype.names or ()
+    return np.atleast_1d(readings)['animal_id'].tolist() if 'animal_id' in names else None
+
+
+class _TrendTracking:
+    """
+    Per-animal score history shared by the analyzers.
+
+    Readings that carry an ``animal_id`` append their scores to a bounded
+    ring-buffer series (``self.history``); the rolling mean, trend slope and
+    EWMA are then attached to that animal's result.
+    """
 
-class GaitAnalyzer:
+    TRACKED = ()            # metrics kept per animal
+    TREND_METRIC = None     # higher-is-better metric whose slope gives the direction
+    TREND_THRESHOLD = 0.5   # slope (points per scan) that counts as a change
+
+    def _init_history(self, history_capacity, max_animals):
+        self.history = AnimalSeriesStore(self.TRACKED, capacity=history_capacity, max_animals=max_animals)
+
+    def _track(self, readings, cols):
+        """Record the tracked metrics; returns (row positions, trend columns) or None."""
+        ids = _animal_ids(readings)
+        if ids is None:
+            return None
+        pos = np.array([i for i, a in enumerate(ids) if a is not None and a == a], dtype=np.intp)  # skips NaN
+        if not len(pos):
+            return None
+        tracked_ids = [ids[i] for i in pos]
+        self.history.update(tracked_ids, {m: cols[m][pos] for m in self.TRACKED})
+        stats = self.history.stats(tracked_ids)
+        trend = {'trend_samples': stats['samples']}
+        for metric in self.TRACKED:
+            for stat, values in stats[metric].items():
+                trend[f'trend_{metric}_{stat}'] = np.round(values, 3)
+        trend['trend_direction'] = trend_direction(stats[self.TREND_METRIC]['slope'], stats['samples'],
+                                                   self.TREND_THRESHOLD)
+        return pos, trend
+
+    def _attach_trends(self, results, tracked):
+        """Add a ``trend`` dict to the result of every tracked animal."""
+        if tracked is None:
+            return results
+        pos, trend = tracked
+        columns = {name: values.tolist() for name, values in trend.items()}
+        for j, i in enumerate(pos.tolist()):
+            results[i]['trend'] = {
+                'samples': columns['trend_samples'][j],
+                'direction': columns['trend_direction'][j],
+                **{metric: {stat: columns[f'trend_{metric}_{stat}'][j] for stat in ('mean', 'slope', 'ewma')}
+                   for metric in self.TRACKED},
+            }
+        return results
+
+    @staticmethod
+    def _trend_frame(frame, tracked):
+        """Add the trend columns to a batch frame (NaN / None for untracked animals)."""
+        if tracked is None:
+            return frame
+        pos, trend = tracked
+        for name, values in trend.items():
+            column = np.zeros(len(frame), np.int64) if name == 'trend_samples' else (
+                np.full(len(frame), None, object) if values.dtype == object else np.full(len(frame), np.nan))
+            column[pos] = values
+            frame[name] = column
+        return frame
+
+
+class GaitAnalyzer(_TrendTracking):
     """
     Simulates computer vision gait analysis from video feeds.
     
     In production, this would use pose estimation (e.g., DeepLabCut)
     on video frames to extract keypoints and compute gait metrics.
+
+    Single readings and whole herds go through the same column-wise
+    computation; ``seed`` makes the simulated measurement noise reproducible.
+    Readings with an ``animal_id`` also get a ``trend`` from that animal's
+    last ``history_capacity`` scans.
     """
 
     # Locomotion Scoring System (1-5 scale, industry standard)
@@ -33,35 +140,49 @@ class GaitAnalyzer:
         5: {'label': 'Severely Lame',     'description': 'Cannot walk or bear weight, refuses to move'},
     }
 
-    def __init__(self):
-        self.analysis_history = []
+    # Sensor inputs and the values used when a reading lacks them
+    INPUTS = {
+        'activity_level': 70,
+        'steps_count': 3500,
+        'lying_time': 12,
+        'stride_length': 1.5,
+        'stance_symmetry': 0.95,
+    }
 
-    def analyze_gait(self, sensor_data):
-        """
-        Analyze gait from sensor data (simulating CV output).
-        
-        In production: input would be video frames → pose estimation → gait metrics.
-        Here: we compute from IoT sensors as a simulation.
-        
-        Args:
-            sensor_data: dict with activity_level, steps_count, lying_time, etc.
-        
-        Returns:
-            dict with gait analysis results
-        """
-        activity = sensor_data.get('activity_level', 70)
-        steps = sensor_data.get('steps_count', 3500)
-        lying_time = sensor_data.get('lying_time', 12)
-        stride_length = sensor_data.get('stride_length', 1.5)
-        stance_symmetry = sensor_data.get('stance_symmetry', 0.95)
+    # Composite above each threshold → score; anything lower is 5
+    COMPOSITE_THRESHOLDS = (0.85, 0.70, 0.50, 0.30)
+
+    _LABELS = np.array([''] + [info['label'] for info in LOCOMOTION_SCORES.values()], dtype=object)
+    _DESCRIPTIONS = np.array([''] + [info['description'] for info in LOCOMOTION_SCORES.values()], dtype=object)
+
+    TRACKED = ('locomotion_score', 'composite_score')
+    TREND_METRIC = 'composite_score'
+
+    def __init__(self, seed=None, history_capacity=64, max_animals=10_000):
+        self.rng = np.random.default_rng(seed)
+        self._init_history(history_capacity, max_animals)
+
+    # Std of the simulated noise on the composite and three CV metrics, drawn in one call
+    NOISE_SCALE = np.array([0.03, 2, 1, 0.1])
+
+    # Output columns and the decimals they are rounded to
+    ROUNDING = {
+        'composite_score': 1, 'activity': 1, 'steps': 1, 'rest_pattern': 1, 'stride': 1, 'symmetry': 1,
+        'back_posture_angle': 1, 'head_bob_amplitude': 1, 'stride_regularity': 1,
+        'weight_distribution': 1, 'walking_speed_mps': 2,
+    }
+
+    def _compute(self, readings):
+        """All gait outputs as columns (one entry per animal), unrounded."""
+        n, c = _input_columns(readings, self.INPUTS)
+        noise = self.rng.normal(0, self.NOISE_SCALE, (n, len(self.NOISE_SCALE)))
 
-        # Compute composite gait metrics (simulating CV output)
         # Normalized scores (0-1, lower = worse)
-        activity_score = np.clip(activity / 85, 0, 1)
-        step_score = np.clip(steps / 4000, 0, 1)
-        rest_score = np.clip(1 - (lying_time - 12) / 8, 0, 1)  # Penalize excessive rest
-        stride_score = np.clip(stride_length / 1.6, 0, 1)
-        symmetry_score = np.clip(stance_symmetry, 0, 1)
+        activity_score = np.clip(c['activity_level'] / 85, 0, 1)
+        step_score = np.clip(c['steps_count'] / 4000, 0, 1)
+        rest_score = np.clip(1 - (c['lying_time'] - 12) / 8, 0, 1)  # Penalize excessive rest
+        stride_score = np.clip(c['stride_length'] / 1.6, 0, 1)
+        symmetry_score = np.clip(c['stance_symmetry'], 0, 1)
 
         # Weighted composite → locomotion score
         composite = (
@@ -73,60 +194,111 @@ class GaitAnalyzer:
         )
 
         # Add slight noise (simulating CV measurement variance)
-        noise = np.random.normal(0, 0.03)
-        composite = np.clip(composite + noise, 0, 1)
-
-        # Map composite to locomotion score (1-5)
-        if composite > 0.85:
-            locomotion_score = 1
-        elif composite > 0.70:
-            locomotion_score = 2
-        elif composite > 0.50:
-            locomotion_score = 3
-        elif composite > 0.30:
-            locomotion_score = 4
-        else:
-            locomotion_score = 5
+        composite = np.clip(composite + noise[:, 0], 0, 1)
 
-        score_info = self.LOCOMOTION_SCORES[locomotion_score]
+        # Map composite to locomotion score (1-5): one step per threshold not exceeded
+        locomotion = 1 + sum((composite <= t).astype(np.int64) for t in self.COMPOSITE_THRESHOLDS)
+        step = locomotion - 1
 
-        # Detailed CV metrics (simulated)
-        cv_metrics = {
-            'back_posture_angle': round(180 - (locomotion_score - 1) * 8 + np.random.normal(0, 2), 1),
-            'head_bob_amplitude': round(max(0, (locomotion_score - 1) * 3.5 + np.random.normal(0, 1)), 1),
-            'stride_regularity': round(composite * 100, 1),
-            'weight_distribution': round(symmetry_score * 100, 1),
-            'walking_speed_mps': round(max(0.2, 1.4 - (locomotion_score - 1) * 0.25 + np.random.normal(0, 0.1)), 2),
+        return {
+            'locomotion_score': locomotion,
+            'composite_score': composite * 100,
+            'activity': activity_score * 100,
+            'steps': step_score * 100,
+            'rest_pattern': rest_score * 100,
+            'stride': stride_score * 100,
+            'symmetry': symmetry_score * 100,
+            # Detailed CV metrics (simulated)
+            'back_posture_angle': 180 - step * 8 + noise[:, 1],
+            'head_bob_amplitude': np.maximum(0, step * 3.5 + noise[:, 2]),
+            'stride_regularity': composite * 100,
+            'weight_distribution': symmetry_score * 100,
+            'walking_speed_mps': np.maximum(0.2, 1.4 - step * 0.25 + noise[:, 3]),
         }
 
-        result = {
+    def _records(self, cols):
+        """Result dicts shaped like ``analyze_gait`` has always returned, one per animal."""
+        timestamp = datetime.now().isoformat()
+        return [
+            self._record(score, values, timestamp)
+            for score, values in zip(cols['locomotion_score'].tolist(), _rounded_rows(cols, self.ROUNDING))
+        ]
+
+    def _record(self, locomotion_score, values, timestamp):
+        score_info = self.LOCOMOTION_SCORES[locomotion_score]
+        return {
             'locomotion_score': locomotion_score,
             'label': score_info['label'],
             'description': score_info['description'],
-            'composite_score': round(composite * 100, 1),
+            'composite_score': values['composite_score'],
             'component_scores': {
-                'activity': round(activity_score * 100, 1),
-                'steps': round(step_score * 100, 1),
-                'rest_pattern': round(rest_score * 100, 1),
-                'stride': round(stride_score * 100, 1),
-                'symmetry': round(symmetry_score * 100, 1),
+                name: values[name] for name in ('activity', 'steps', 'rest_pattern', 'stride', 'symmetry')
+            },
+            'cv_metrics': {
+                name: values[name] for name in ('back_posture_angle', 'head_bob_amplitude', 'stride_regularity',
+                                                'weight_distribution', 'walking_speed_mps')
             },
-            'cv_metrics': cv_metrics,
             'needs_intervention': locomotion_score >= 3,
             'urgency': 'Critical' if locomotion_score >= 4 else ('Warning' if locomotion_score >= 3 else 'Normal'),
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
         }
 
-        self.analysis_history.append(result)
+    def analyze_gait(self, sensor_data):
+        """
+        Analyze gait from sensor data (simulating CV output).
+        
+        In production: input would be video frames → pose estimation → gait metrics.
+        Here: we compute from IoT sensors as a simulation.
+        
+        Args:
+            sensor_data: dict with activity_level, steps_count, lying_time, etc.
+        
+        Returns:
+            dict with gait analysis results
+        """
+        result, = self.analyze_gait_records(sensor_data)
         return result
 
+    def analyze_gait_records(self, readings):
+        """``analyze_gait`` result dicts for several readings, computed in one vectorized pass."""
+        cols = self._compute(readings)
+        return self._attach_trends(self._records(cols), self._track(readings, cols))
+
+    def analyze_gait_batch(self, readings):
+        """
+        Gait analysis for a column-oriented batch.
+
+        Args:
+            readings: DataFrame, {name: array} dict, list of dicts or
+                      structured array, one animal per row
+
+        Returns:
+            pd.DataFrame with one row per animal (index follows a DataFrame
+            input): locomotion score, label, composite and component scores,
+            CV metrics, needs_intervention and urgency, plus ``trend_*``
+            columns when the readings carry ``animal_id``
+        """
+        cols = self._compute(readings)
+        tracked = self._track(readings, cols)
+        score = cols['locomotion_score']
+        frame = pd.DataFrame(cols, index=readings.index if isinstance(readings, pd.DataFrame) else None)
+        frame = frame.round(self.ROUNDING)
+        frame.insert(1, 'label', self._LABELS[score])
+        frame.insert(2, 'description', self._DESCRIPTIONS[score])
+        frame['needs_intervention'] = score >= 3
+        frame['urgency'] = np.select([score >= 4, score >= 3], ['Critical', 'Warning'], 'Normal')
+        return self._trend_frame(frame, tracked)
+
     def get_herd_gait_summary(self, herd_readings):
-        """Analyze gait for an entire herd."""
-        results = [self.analyze_gait(r) for r in herd_readings]
+        """
+        Analyze gait for an entire herd.
 
-        score_counts = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        for r in results:
-            score_counts[r['locomotion_score']] += 1
+        Returns the herd aggregates plus ``individual_results``, the per-animal
+        DataFrame from ``analyze_gait_batch``.
+        """
+        results = self.analyze_gait_batch(herd_readings)
+        counts = np.bincount(results['locomotion_score'].to_numpy(), minlength=6)
+        score_counts = {score: int(counts[score]) for score in range(1, 6)}
 
         total = len(results)
         return {
@@ -135,12 +307,12 @@ class GaitAnalyzer:
             'normal_pct': round((score_counts[1] / total) * 100, 1) if total > 0 else 0,
             'lame_pct': round(((score_counts[3] + score_counts[4] + score_counts[5]) / total) * 100, 1) if total > 0 else 0,
             'critical_count': score_counts[4] + score_counts[5],
-            'avg_locomotion_score': round(np.mean([r['locomotion_score'] for r in results]), 2),
+            'avg_locomotion_score': round(float(results['locomotion_score'].mean()), 2) if total > 0 else 0,
             'individual_results': results,
         }
 
 
-class BehaviorAnalyzer:
+class BehaviorAnalyzer(_TrendTracking):
     """
     Simulates computer vision behavioral analysis.
     
@@ -178,46 +350,63 @@ class BehaviorAnalyzer:
         },
     }
 
-    def __init__(self):
-        self.behavior_history = []
+    # Sensor inputs and the values used when a reading lacks them
+    INPUTS = {
+        'activity_level': 70,
+        'respiratory_rate': 22,
+        'feed_intake': 22,
+        'rumination_min': 450,
+        'body_temp': 38.8,
+    }
 
-    def analyze_behavior(self, sensor_data):
-        """
-        Analyze animal behavior from sensor data (simulating CV output).
-        
-        Args:
-            sensor_data: dict with IoT sensor readings
-        
-        Returns:
-            dict with behavioral analysis results
-        """
-        activity = sensor_data.get('activity_level', 70)
-        respiratory_rate = sensor_data.get('respiratory_rate', 22)
-        feed_intake = sensor_data.get('feed_intake', 22)
-        rumination = sensor_data.get('rumination_min', 450)
-        body_temp = sensor_data.get('body_temp', 38.8)
+    # (flag column, alert type, severity, message template over the metric)
+    ALERT_RULES = (
+        ('alert_respiratory', 'Respiratory Distress', 'HIGH', 'respiratory_distress',
+         'Elevated respiratory distress indicator: {:.0f}/100'),
+        ('alert_isolation', 'Social Isolation', 'MEDIUM', 'social_score',
+         'Animal showing isolation behavior. Social score: {:.0f}/100'),
+        ('alert_feeding', 'Reduced Feeding', 'MEDIUM', 'feeding_frequency',
+         'Feeding frequency significantly reduced: {:.0f}/day'),
+        ('alert_posture', 'Abnormal Posture', 'HIGH', 'posture_score',
+         'Abnormal posture detected. Score: {:.0f}/100'),
+    )
+
+    # Std of the simulated noise on social, feeding, posture and respiratory metrics
+    NOISE_SCALE = np.array([5, 1, 3, 5])
+
+    TRACKED = ('behavior_health_score', 'respiratory_distress')
+    TREND_METRIC = 'behavior_health_score'
+
+    def __init__(self, seed=None, history_capacity=64, max_animals=10_000):
+        self.rng = np.random.default_rng(seed)
+        self._init_history(history_capacity, max_animals)
+
+    def _compute(self, readings):
+        """All behavior outputs as columns (one entry per animal), metrics unrounded."""
+        n, c = _input_columns(readings, self.INPUTS)
+        activity, respiratory_rate = c['activity_level'], c['respiratory_rate']
+        body_temp = c['body_temp']
+        excess_resp = np.maximum(0, respiratory_rate - 25)
+        noise = self.rng.normal(0, self.NOISE_SCALE, (n, len(self.NOISE_SCALE)))
 
         # Derive behavioral metrics from IoT data
-        social_score = np.clip(activity * 1.2 + np.random.normal(0, 5), 0, 100)
-        feeding_freq = np.clip(feed_intake * 0.5 + np.random.normal(0, 1), 1, 20)
+        social_score = np.clip(activity * 1.2 + noise[:, 0], 0, 100)
+        feeding_freq = np.clip(c['feed_intake'] * 0.5 + noise[:, 1], 1, 20)
         posture_score = np.clip(
-            100 - abs(body_temp - 38.85) * 15 - max(0, respiratory_rate - 25) * 1.5 + np.random.normal(0, 3),
+            100 - np.abs(body_temp - 38.85) * 15 - excess_resp * 1.5 + noise[:, 2],
             0, 100
         )
         resp_distress = np.clip(
-            max(0, respiratory_rate - 25) * 3 + max(0, body_temp - 39.5) * 20 + np.random.normal(0, 5),
+            excess_resp * 3 + np.maximum(0, body_temp - 39.5) * 20 + noise[:, 3],
             0, 100
         )
 
-        # Determine behavior pattern
-        if resp_distress > 50:
-            pattern = 'Respiratory_Distress'
-        elif social_score < 30:
-            pattern = 'Isolation'
-        elif activity < 30 and rumination < 300:
-            pattern = 'Lethargy'
-        else:
-            pattern = 'Normal'
+        # Determine behavior pattern (first matching rule wins)
+        pattern = np.select(
+            [resp_distress > 50, social_score < 30, (activity < 30) & (c['rumination_min'] < 300)],
+            ['Respiratory_Distress', 'Isolation', 'Lethargy'],
+            'Normal',
+        ).astype(object)
 
         # Compute overall behavioral health score (0-100)
         behavior_health = np.clip(
@@ -228,70 +417,110 @@ class BehaviorAnalyzer:
             0, 100
         )
 
-        result = {
+        return {
             'behavior_pattern': pattern,
-            'behavior_health_score': round(float(behavior_health), 1),
-            'metrics': {
-                'social_score': round(float(social_score), 1),
-                'feeding_frequency': round(float(feeding_freq), 1),
-                'posture_score': round(float(posture_score), 1),
-                'respiratory_distress': round(float(resp_distress), 1),
-            },
-            'alerts': [],
-            'is_abnormal': pattern != 'Normal',
-            'timestamp': datetime.now().isoformat(),
+            'behavior_health_score': behavior_health,
+            'social_score': social_score,
+            'feeding_frequency': feeding_freq,
+            'posture_score': posture_score,
+            'respiratory_distress': resp_distress,
+            'alert_respiratory': resp_distress > 60,
+            'alert_isolation': social_score < 25,
+            'alert_feeding': feeding_freq < 5,
+            'alert_posture': posture_score < 50,
         }
 
-        # Generate specific alerts
-        if resp_distress > 60:
-            result['alerts'].append({
-                'type': 'Respiratory Distress',
-                'severity': 'HIGH',
-                'message': f'Elevated respiratory distress indicator: {resp_distress:.0f}/100'
-            })
-        if social_score < 25:
-            result['alerts'].append({
-                'type': 'Social Isolation',
-                'severity': 'MEDIUM',
-                'message': f'Animal showing isolation behavior. Social score: {social_score:.0f}/100'
-            })
-        if feeding_freq < 5:
-            result['alerts'].append({
-                'type': 'Reduced Feeding',
-                'severity': 'MEDIUM',
-                'message': f'Feeding frequency significantly reduced: {feeding_freq:.0f}/day'
-            })
-        if posture_score < 50:
-            result['alerts'].append({
-                'type': 'Abnormal Posture',
-                'severity': 'HIGH',
-                'message': f'Abnormal posture detected. Score: {posture_score:.0f}/100'
+    METRICS = ('social_score', 'feeding_frequency', 'posture_score', 'respiratory_distress')
+
+    def _records(self, cols):
+        """Result dicts shaped like ``analyze_behavior`` has always returned, one per animal."""
+        timestamp = datetime.now().isoformat()
+        names = ('behavior_health_score', *self.METRICS)
+        # Python round() on floats, as the scalar code always did
+        rounded = [{name: round(v, 1) for name, v in zip(names, row)}
+                   for row in np.column_stack([cols[name] for name in names]).tolist()]
+        rules = [(cols[flag], alert_type, severity, cols[metric], message)
+                 for flag, alert_type, severity, metric, message in self.ALERT_RULES]
+        any_alert = np.logical_or.reduce([flags for flags, *_ in rules])
+        results = []
+        for i, (pattern, values) in enumerate(zip(cols['behavior_pattern'], rounded)):
+            results.append({
+                'behavior_pattern': pattern,
+                'behavior_health_score': values['behavior_health_score'],
+                'metrics': {name: values[name] for name in self.METRICS},
+                # Generate specific alerts
+                'alerts': [
+                    {'type': alert_type, 'severity': severity, 'message': message.format(metric[i])}
+                    for flags, alert_type, severity, metric, message in rules
+                    if flags[i]
+                ] if any_alert[i] else [],
+                'is_abnormal': pattern != 'Normal',
+                'timestamp': timestamp,
             })
+        return results
 
-        self.behavior_history.append(result)
+    def analyze_behavior(self, sensor_data):
+        """
+        Analyze animal behavior from sensor data (simulating CV output).
+        
+        Args:
+            sensor_data: dict with IoT sensor readings
+        
+        Returns:
+            dict with behavioral analysis results
+        """
+        result, = self.analyze_behavior_records(sensor_data)
         return result
 
+    def analyze_behavior_records(self, readings):
+        """``analyze_behavior`` result dicts for several readings, computed in one vectorized pass."""
+        cols = self._compute(readings)
+        return self._attach_trends(self._records(cols), self._track(readings, cols))
+
+    def analyze_behavior_batch(self, readings):
+        """
+        Behavior analysis for a column-oriented batch.
+
+        Args:
+            readings: DataFrame, {name: array} dict, list of dicts or
+                      structured array, one animal per row
+
+        Returns:
+            pd.DataFrame with one row per animal (index follows a DataFrame
+            input): pattern, health score, the four metrics, one boolean
+            column per alert rule, alert counts and is_abnormal, plus
+            ``trend_*`` columns when the readings carry ``animal_id``
+        """
+        cols = self._compute(readings)
+        tracked = self._track(readings, cols)
+        frame = pd.DataFrame(cols, index=readings.index if isinstance(readings, pd.DataFrame) else None)
+        rounded = ['behavior_health_score', *self.METRICS]
+        frame[rounded] = frame[rounded].round(1)
+        flags = [rule[0] for rule in self.ALERT_RULES]
+        high = [rule[0] for rule in self.ALERT_RULES if rule[2] == 'HIGH']
+        frame['alert_count'] = frame[flags].sum(axis=1)
+        frame['high_alert_count'] = frame[high].sum(axis=1)
+        frame['is_abnormal'] = frame['behavior_pattern'] != 'Normal'
+        return self._trend_frame(frame, tracked)
+
     def analyze_herd_behavior(self, herd_readings):
-        """Analyze behavior patterns across the herd."""
-        results = [self.analyze_behavior(r) for r in herd_readings]
+        """
+        Analyze behavior patterns across the herd.
 
-        pattern_counts = {}
-        for r in results:
-            p = r['behavior_pattern']
-            pattern_counts[p] = pattern_counts.get(p, 0) + 1
+        Returns the herd aggregates plus ``individual_results``, the per-animal
+        DataFrame from ``analyze_behavior_batch``.
+        """
+        results = self.analyze_behavior_batch(herd_readings)
+        pattern_counts = {p: int(n) for p, n in results['behavior_pattern'].value_counts(sort=False).items()}
 
         total = len(results)
-        all_alerts = []
-        for r in results:
-            all_alerts.extend(r['alerts'])
-
         return {
             'total_animals': total,
             'pattern_distribution': pattern_counts,
             'normal_pct': round((pattern_counts.get('Normal', 0) / total) * 100, 1) if total > 0 else 0,
             'abnormal_count': total - pattern_counts.get('Normal', 0),
-            'avg_behavior_health': round(np.mean([r['behavior_health_score'] for r in results]), 1),
-            'total_alerts': len(all_alerts),
-            'high_severity_alerts': len([a for a in all_alerts if a['severity'] == 'HIGH']),
+            'avg_behavior_health': round(float(results['behavior_health_score'].mean()), 1) if total > 0 else 0,
+            'total_alerts': int(results['alert_count'].sum()),
+            'high_severity_alerts': int(results['high_alert_count'].sum()),
             'individual_results': results,
         }
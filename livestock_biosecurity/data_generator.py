@@ -4,8 +4,24 @@ Synthetic Livestock IoT Sensor Data Generator
 Generates realistic IoT sensor data for livestock health monitoring.
 Simulates normal, at-risk, and critical health conditions across
 multiple disease profiles for training ML models.
+
+``generate_dataset`` builds the whole animals × days table column-wise:
+each feature is sampled for every row in one call, disease profiles are
+applied through row masks and illness windows / progression are computed
+with array arithmetic, so millions of rows take seconds. Single readings
+for the dashboard still come from the per-reading helpers.
+
+``generate_sharded`` splits very large herds into fixed-size shards of
+animals. Each shard draws from its own generator spawned from the seed's
+``SeedSequence`` and is written to its own Parquet/CSV partition by a
+process pool; since shard boundaries and seeds depend only on the seed and
+``shard_size``, the output is identical for any number of workers.
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -87,9 +103,19 @@ class LivestockDataGenerator:
         'Severe_Lameness':  {'gait_score': (4.0, 5.0), 'stance_symmetry': (0.30, 0.55), 'stride_length': (0.3, 0.7)},
     }
 
+    SEVERITIES = ['mild', 'moderate', 'severe']
+
+    # Per severity: weight of the disease-range sample in a diseased reading
+    # (the rest is the healthy value) and the noise factor of that sample
+    SEVERITY_BLEND = np.array([0.4, 0.7, 1.0])
+    SEVERITY_NOISE = np.array([0.02, 0.02, 0.05])
+
+    BASE_DATE = datetime(2025, 1, 1)
+
     def __init__(self, seed=42):
         """Initialize the data generator with a random seed for reproducibility."""
         self.seed = seed
+        self.rng = np.random.default_rng(seed)
         np.random.seed(seed)
         random.seed(seed)
 
@@ -99,6 +125,13 @@ class LivestockDataGenerator:
         noise = np.random.normal(0, (high - low) * noise_factor, n)
         return np.clip(values + noise, low * 0.8, high * 1.2)
 
+    @staticmethod
+    def _sample_columns(rng, low, high, n=None, noise_factor=0.02):
+        """Vectorized ``_sample_range``: bounds and noise factor may be per-row arrays."""
+        values = rng.uniform(low, high, n)
+        noise = rng.normal(0, (high - low) * noise_factor, n)
+        return np.clip(values + noise, low * 0.8, high * 1.2)
+
     def _generate_animal_profile(self, animal_id):
         """Generate a static profile for an animal."""
         return {
@@ -176,7 +209,7 @@ class LivestockDataGenerator:
 
         return reading
 
-    def generate_dataset(self, n_animals=200, n_days=30, anomaly_rate=0.20):
+    def generate_dataset(self, n_animals=200, n_days=30, anomaly_rate=0.20, path=None):
         """
         Generate a full synthetic dataset.
 
@@ -184,65 +217,14 @@ class LivestockDataGenerator:
             n_animals: Number of animals
             n_days: Number of days of data
             anomaly_rate: Fraction of readings that are anomalous (diseased)
+            path: Optional output file (``.parquet`` or CSV)
 
         Returns:
             pd.DataFrame with all sensor readings, profiles, and labels
         """
-        records = []
-        diseases = list(self.DISEASE_PROFILES.keys())
-        severities = ['mild', 'moderate', 'severe']
-
-        base_date = datetime(2025, 1, 1)
-
-        for i in range(n_animals):
-            profile = self._generate_animal_profile(i)
-
-            # Decide if this animal will have episodes of illness
-            has_illness = np.random.random() < anomaly_rate * 3  # Some animals more prone
-            illness_days = set()
-            illness_disease = None
-            illness_severity = None
-
-            if has_illness:
-                illness_disease = random.choice(diseases)
-                illness_severity = random.choice(severities)
-                # Illness lasts 3-10 consecutive days
-                onset = np.random.randint(0, max(1, n_days - 10))
-                duration = np.random.randint(3, min(11, n_days - onset + 1))
-                illness_days = set(range(onset, onset + duration))
-
-            for day in range(n_days):
-                timestamp = base_date + timedelta(days=day, hours=np.random.randint(6, 20),
-                                                   minutes=np.random.randint(0, 60))
-
-                if day in illness_days and illness_disease:
-                    # Progressive severity: mild at start, worsening
-                    progress = (day - min(illness_days)) / max(1, len(illness_days) - 1)
-                    if progress < 0.3:
-                        sev = 'mild'
-                    elif progress < 0.7:
-                        sev = 'moderate'
-                    else:
-                        sev = illness_severity
-                    reading = self._generate_diseased_reading(profile, illness_disease, sev)
-                else:
-                    reading = self._generate_healthy_reading(profile)
-
-                # Add profile and timestamp
-                record = {**profile, 'timestamp': timestamp, 'day': day, **reading}
-
-                # Environmental context
-                record['ambient_temp'] = round(np.random.uniform(22, 40), 1)
-                record['humidity_pct'] = round(np.random.uniform(40, 90), 1)
-                record['thi_index'] = round(
-                    0.8 * record['ambient_temp'] + record['humidity_pct'] / 100 *
-                    (record['ambient_temp'] - 14.4) + 46.4, 1
-                )  # Temperature Humidity Index
-
-                records.append(record)
-
-        df = pd.DataFrame(records)
-        df = df.sort_values(['animal_id', 'timestamp']).reset_index(drop=True)
+        df = pd.DataFrame(self._generate_columns(self.rng, n_animals, n_days, anomaly_rate))
+        if path:
+            _write_frame(df, path)
 
         print(f"✅ Generated dataset: {len(df)} records")
         print(f"   Animals: {n_animals} | Days: {n_days}")
@@ -253,6 +235,124 @@ class LivestockDataGenerator:
 
         return df
 
+    def _generate_columns(self, rng, n_animals, n_days, anomaly_rate, first_animal=0):
+        """Columns of ``generate_dataset``, rows sorted by (animal_id, timestamp)."""
+        diseases = list(self.DISEASE_PROFILES.keys())
+        n = n_animals * n_days
+
+        # ── Per-animal profile and illness episode ──
+        # Rows come out in animal_id string order, as the per-record version sorted them
+        animal_ids = np.array(sorted(f"KS-{i:04d}" for i in range(first_animal, first_animal + n_animals)),
+                              dtype=object)
+        breed = np.array(self.BREEDS, dtype=object)[rng.integers(0, len(self.BREEDS), n_animals)]
+        age = rng.uniform(*self.AGE_RANGE, n_animals).round(1)
+        weight = rng.uniform(350, 650, n_animals).round(1)
+        lactation = rng.integers(0, 7, n_animals)
+
+        has_illness = rng.random(n_animals) < anomaly_rate * 3  # Some animals more prone
+        illness_disease = rng.integers(0, len(diseases), n_animals)
+        illness_severity = rng.integers(0, len(self.SEVERITIES), n_animals)
+        # Illness lasts 3-10 consecutive days
+        onset = rng.integers(0, max(1, n_days - 10), n_animals)
+        duration = rng.integers(3, np.maximum(4, np.minimum(11, n_days - onset + 1)))
+
+        # ── Per-row schedule ──
+        animal = np.repeat(np.arange(n_animals), n_days)
+        day = np.tile(np.arange(n_days), n_animals)
+        minutes = (day * 24 + rng.integers(6, 20, n)) * 60 + rng.integers(0, 60, n)
+        timestamp = np.datetime64(self.BASE_DATE, 'ns') + minutes.astype('timedelta64[m]')
+
+        into_illness = day - onset[animal]
+        ill = has_illness[animal] & (into_illness >= 0) & (into_illness < duration[animal])
+        # Progressive severity: mild at start, worsening
+        progress = into_illness / np.maximum(1, duration[animal] - 1)
+        severity = np.select([progress < 0.3, progress < 0.7], [0, 1], illness_severity[animal])
+        disease = np.where(ill, illness_disease[animal], -1)
+
+        # ── Sensor readings: healthy everywhere, then disease overrides ──
+        columns = {
+            'animal_id': animal_ids[animal], 'breed': breed[animal], 'age_years': age[animal],
+            'weight_kg': weight[animal], 'lactation_number': lactation[animal],
+            'timestamp': timestamp, 'day': day,
+        }
+        for feature, (low, high) in self.NORMAL_RANGES.items():
+            columns[feature] = self._sample_columns(rng, low, high, n).round(2)
+
+        for d, name in enumerate(diseases):
+            rows = np.flatnonzero(disease == d)
+            if not len(rows):
+                continue
+            sev = severity[rows]
+            blend = self.SEVERITY_BLEND[sev]
+            for feature, (low, high) in self.DISEASE_PROFILES[name].items():
+                diseased = self._sample_columns(rng, low, high, noise_factor=self.SEVERITY_NOISE[sev])
+                columns[feature][rows] = (blend * diseased + (1 - blend) * columns[feature][rows]).round(2)
+
+        # Gait profile per row: Normal / Mild / Moderate / Severe lameness
+        gait_profile = np.zeros(n, dtype=np.int64)
+        lame = disease == diseases.index('Lameness')
+        gait_profile[lame] = severity[lame] + 1
+        gait_profile[np.isin(disease, [diseases.index('BRD'), diseases.index('Heat_Stress')])] = 1
+        profiles = list(self.GAIT_PROFILES.values())
+        for feature, decimals in (('gait_score', 1), ('stance_symmetry', 3), ('stride_length', 2)):
+            low, high = np.array([p[feature] for p in profiles]).T
+            columns[feature] = self._sample_columns(rng, low[gait_profile], high[gait_profile]).round(decimals)
+
+        # Health labels
+        columns['health_status'] = np.where(ill, np.where(severity == 0, 1, 2), 0)  # Healthy / At-Risk / Critical
+        columns['disease_type'] = np.array(['None'] + diseases, dtype=object)[disease + 1]
+        columns['is_anomaly'] = ill.astype(np.int64)
+
+        # Environmental context
+        ambient = rng.uniform(22, 40, n).round(1)
+        humidity = rng.uniform(40, 90, n).round(1)
+        columns['ambient_temp'] = ambient
+        columns['humidity_pct'] = humidity
+        columns['thi_index'] = (0.8 * ambient + humidity / 100 * (ambient - 14.4) + 46.4).round(1)  # Temperature Humidity Index
+        return columns
+
+    def generate_sharded(self, out_dir, n_animals, n_days=30, anomaly_rate=0.20,
+                         shard_size=1_000, workers=None, fmt='parquet'):
+        """
+        Generate a large dataset as one file per shard of animals.
+
+        Args:
+            out_dir: Directory for the ``part-NNNNN.<fmt>`` partitions
+            n_animals: Number of animals
+            n_days: Number of days of data
+            anomaly_rate: Fraction of readings that are anomalous (diseased)
+            shard_size: Animals per shard (fixes the output; memory per worker
+                        is about shard_size × n_days rows)
+            workers: Worker processes (default: CPU count; 1 runs in-process)
+            fmt: 'parquet' or 'csv'
+
+        Returns:
+            list of {'shard', 'path', 'first_animal', 'animals', 'records', 'anomalies'}
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        n_shards = -(-n_animals // shard_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(n_shards)
+        tasks = [
+            (self, seeds[i], i * shard_size, min(shard_size, n_animals - i * shard_size),
+             n_days, anomaly_rate, out_dir / f"part-{i:05d}.{fmt}")
+            for i in range(n_shards)
+        ]
+
+        workers = min(workers or os.cpu_count() or 1, n_shards)
+        if workers <= 1:
+            shards = [_generate_shard(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                shards = list(pool.map(_generate_shard, tasks))
+
+        records = sum(shard['records'] for shard in shards)
+        anomalies = sum(shard['anomalies'] for shard in shards)
+        print(f"✅ Generated sharded dataset: {records} records in {n_shards} shards → {out_dir}")
+        print(f"   Animals: {n_animals} | Days: {n_days} | Workers: {workers}")
+        print(f"   Anomalies: {anomalies} ({anomalies / max(1, records) * 100:.1f}%)")
+        return shards
+
     def generate_realtime_reading(self, animal_id=None, health='healthy', disease=None, severity='moderate'):
         """
         Generate a single real-time sensor reading (for dashboard simulation).
@@ -286,6 +386,29 @@ class LivestockDataGenerator:
         return {**profile, **reading}
 
 
+def _write_frame(df, path):
+    if str(path).endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _generate_shard(task):
+    """Process-pool worker: generate one shard of animals and write its partition."""
+    generator, seed, first_animal, n_animals, n_days, anomaly_rate, path = task
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(generator._generate_columns(rng, n_animals, n_days, anomaly_rate, first_animal))
+    _write_frame(df, path)
+    return {
+        'shard': int(path.stem.split('-')[1]),
+        'path': str(path),
+        'first_animal': first_animal,
+        'animals': n_animals,
+        'records': len(df),
+        'anomalies': int(df['is_anomaly'].sum()),
+    }
+
+
 if __name__ == "__main__":
     gen = LivestockDataGenerator(seed=42)
     df = gen.generate_dataset(n_animals=200, n_days=30, anomaly_rate=0.20)
@@ -0,0 +1,138 @@
+"""
+Model Distillation
+====================
+Smaller "fast tier" stand-ins for the heavyweight livestock models.
+
+The DiseaseForecaster teacher is a 120-stage, depth-8 gradient-boosting
+classifier over 6 classes — 720 deep trees walked per prediction, which
+dominates scan latency. The student is a shallow gradient-boosting
+classifier fitted on the teacher's ``predict_proba`` rather than on the
+hard labels: every training row is expanded into one (row, class) pair per
+class the teacher gives non-negligible probability, weighted by that
+probability, so the student's log loss is the cross-entropy against the
+teacher's soft targets.
+
+The student keeps the teacher's scaler and label encoder and is itself a
+GradientBoostingClassifier, so it compiles and serializes through the
+existing artifact path. ``distill_disease_forecaster`` reports held-out
+accuracy of both models, their agreement, and compiled single-row / batch
+latency; ``load_models(..., tier='fast')`` serves the student in the
+teacher's place.
+"""
+
+import numpy as np
+
+from .models import DiseaseForecaster, FAST_TIER, _batch_estimator, _scaler_input
+from .features import model_features
+from .tuning import measure_latency
+
+
+STUDENT_PARAMS = {
+    'n_estimators': 30,
+    'max_depth': 3,
+    'learning_rate': 0.2,
+    'random_state': 42,
+}
+
+# Largest held-out accuracy drop at which the student is still shipped
+MAX_ACCURACY_DROP = 0.01
+
+
+def soft_targets(X, proba, min_weight=1e-3):
+    """
+    Expand rows into weighted (row, class) pairs from teacher probabilities.
+
+    Returns (X, class index, weight) with one entry per class whose
+    probability is at least ``min_weight``.
+    """
+    rows, classes = np.nonzero(proba >= min_weight)
+    return X[rows], classes, proba[rows, classes]
+
+
+def distill_disease_forecaster(teacher, df, params=None, max_accuracy_drop=MAX_ACCURACY_DROP):
+    """
+    Fit a shallow student on a trained DiseaseForecaster's probabilities.
+
+    Args:
+        teacher: trained DiseaseForecaster (with its sklearn estimator)
+        df: the teacher's training DataFrame
+        params: GradientBoostingClassifier parameters overriding ``STUDENT_PARAMS``
+        max_accuracy_drop: largest teacher − student accuracy for ``ship``
+
+    Returns:
+        (student DiseaseForecaster, report dict)
+    """
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score, f1_score
+    from .compiled_trees import compile_estimator
+
+    teacher_model = _batch_estimator(teacher)
+    X = _scaler_input(model_features(teacher.columns, df))
+    y = teacher.label_encoder.transform(df['disease_type'].values)
+    # The teacher's own split, so the student is scored on rows neither model saw
+    X_train, X_test, _, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    X_train = teacher.scaler.transform(X_train)
+    X_test = teacher.scaler.transform(X_test)
+
+    X_soft, y_soft, weights = soft_targets(X_train, teacher_model.predict_proba(X_train))
+    student_model = GradientBoostingClassifier(**{**STUDENT_PARAMS, **(params or {})})
+    student_model.fit(X_soft, y_soft, sample_weight=weights)
+    if len(student_model.classes_) != len(teacher.label_encoder.classes_):
+        raise RuntimeError("Distilled student did not see every disease class")
+
+    teacher_pred = teacher_model.predict(X_test)
+    student_pred = student_model.predict(X_test)
+    teacher_single, teacher_batch = measure_latency(compile_estimator(teacher_model), 'predict_proba', X_test)
+    student_single, student_batch = measure_latency(compile_estimator(student_model), 'predict_proba', X_test)
+    report = {
+        'teacher_accuracy': accuracy_score(y_test, teacher_pred),
+        'student_accuracy': accuracy_score(y_test, student_pred),
+        'agreement': float(np.mean(teacher_pred == student_pred)),
+        'teacher_trees': teacher_model.estimators_.size,
+        'student_trees': student_model.estimators_.size,
+        'teacher_single_row_us': teacher_single,
+        'student_single_row_us': student_single,
+        'teacher_batch_us_per_row': teacher_batch,
+        'student_batch_us_per_row': student_batch,
+    }
+    report['accuracy_delta'] = report['student_accuracy'] - report['teacher_accuracy']
+    report['single_row_speedup'] = teacher_single / student_single
+    report['batch_speedup'] = teacher_batch / student_batch
+    report['ship'] = -report['accuracy_delta'] <= max_accuracy_drop
+
+    student = DiseaseForecaster.__new__(DiseaseForecaster)
+    student.model = student_model
+    student.scaler = teacher.scaler
+    student.label_encoder = teacher.label_encoder
+    student.features = teacher.features
+    student.metrics = {
+        'accuracy': report['student_accuracy'],
+        'f1_weighted': f1_score(y_test, student_pred, average='weighted'),
+        'classes': list(teacher.label_encoder.classes_),
+        'distillation': report,
+    }
+    student.is_trained = True
+    return student, report
+
+
+DISTILLERS = {
+    'disease_forecaster': distill_disease_forecaster,
+}
+
+
+def format_report(name, report):
+    """Readable summary of a distillation report."""
+    verdict = "shipped as the fast tier" if report['ship'] else "NOT shipped (accuracy drop too large)"
+    return (
+        f"   🎓 {name} → {FAST_TIER[name]}: {report['teacher_trees']} → {report['student_trees']} trees, "
+        f"{verdict}\n"
+        f"      accuracy  teacher {report['teacher_accuracy']:.4f}  student {report['student_accuracy']:.4f}  "
+        f"(Δ {report['accuracy_delta']:+.4f}, agreement {report['agreement']:.4f})\n"
+        f"      1 row     {report['teacher_single_row_us']:8.1f}µs → {report['student_single_row_us']:7.1f}µs  "
+        f"({report['single_row_speedup']:.1f}× faster)\n"
+        f"      batch     {report['teacher_batch_us_per_row']:8.2f}µs → {report['student_batch_us_per_row']:7.2f}µs "
+        f"per row ({report['batch_speedup']:.1f}× faster)"
+    )
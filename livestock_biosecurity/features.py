@@ -0,0 +1,182 @@
+"""
+Shared Feature Pipeline
+=========================
+Builds the input matrix for all four livestock models in one pass.
+
+Raw readings (a dict, a list of dicts, a dict of columns, a DataFrame or a
+NumPy structured array) are converted once into a single matrix holding every raw, derived
+and THI column any model needs. The column layout is arranged so each
+model's feature list is a contiguous run of columns, which means each model
+gets a plain slice of the matrix — a zero-copy view — instead of building
+its own array from the reading.
+
+The matrix is float64 by default. The trees compare float32 values, but only
+after standard scaling; rounding raw readings to float32 first shifts the
+scaled values enough to flip splits of models trained on float64 inputs.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Engineered features used by HealthPredictor, computed from raw columns
+DERIVED_FEATURES = {
+    'temp_deviation': lambda c: c('body_temp') - 38.85,  # deviation from normal mean
+    'activity_rumination_ratio': lambda c: c('activity_level') / (c('rumination_min') + 1),
+    'feed_water_ratio': lambda c: c('feed_intake') / (c('water_intake') + 1),
+    'cardio_stress': lambda c: c('heart_rate') * c('respiratory_rate') / 1000,
+    'mobility_score': lambda c: (c('activity_level') * c('steps_count')) / 10000,
+    'rest_activity_ratio': lambda c: c('lying_time') / (c('activity_level') + 1),
+}
+
+DEFAULT_AMBIENT_TEMP = 30.0
+DEFAULT_HUMIDITY = 65.0
+
+
+def compute_thi(temp, humidity):
+    """Temperature Humidity Index, rounded to one decimal like the scan endpoints."""
+    return np.round(0.8 * temp + humidity / 100 * (temp - 14.4) + 46.4, 1)
+
+
+def _is_column_dict(readings):
+    return any(isinstance(v, (np.ndarray, pd.Series, list, tuple)) for v in readings.values())
+
+
+def _column_source(readings):
+    """Return (n_rows, getter) where getter(name) gives a float64 column or None if absent."""
+    if isinstance(readings, dict) and _is_column_dict(readings):
+        # {name: column}: already column-oriented
+        columns = readings
+        n_rows = len(next(v for v in columns.values() if np.ndim(v) > 0))
+
+        def get(name):
+            if name not in columns:
+                return None
+            return np.asarray(columns[name], dtype=np.float64)
+        return n_rows, get
+    if isinstance(readings, dict):
+        # Single reading (the scan endpoints): skip building a DataFrame
+        reading = readings
+
+        def get(name):
+            if name not in reading:
+                return None
+            value = reading[name]
+            return np.array([np.nan if value is None else value], dtype=np.float64)
+        return 1, get
+    if isinstance(readings, (list, tuple)):
+        readings = pd.DataFrame(list(readings))
+
+    if isinstance(readings, pd.DataFrame):
+        n_rows = len(readings)
+
+        def get(name):
+            if name not in readings.columns:
+                return None
+            return readings[name].to_numpy(dtype=np.float64, na_value=np.nan)
+        return n_rows, get
+
+    readings = np.asarray(readings)
+    if readings.dtype.names is None:
+        raise TypeError("Readings must be a dict, list of dicts, dict of columns, DataFrame or structured array")
+    readings = np.atleast_1d(readings)
+
+    def get(name):
+        if name not in readings.dtype.names:
+            return None
+        return readings[name].astype(np.float64)
+    return len(readings), get
+
+
+class FeaturePipeline:
+    """
+    One feature matrix for several models.
+
+    Args:
+        feature_sets: {model name: ordered list of input columns}. Columns may
+            be raw reading fields, ``thi_index`` or any of ``DERIVED_FEATURES``.
+        dtype: dtype of the feature matrix
+    """
+
+    def __init__(self, feature_sets, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        columns = []
+        self.slices = {}
+        # Longest lists first, so shorter ones usually land inside them
+        for name, features in sorted(feature_sets.items(), key=lambda kv: -len(kv[1])):
+            features = list(features)
+            start = self._find_run(columns, features)
+            if start is None:
+                start = len(columns)
+                columns.extend(features)
+            self.slices[name] = slice(start, start + len(features))
+        self.columns = columns
+        # Each distinct column is computed once, then copied to every position it occupies
+        self.positions = {}
+        for i, col in enumerate(columns):
+            self.positions.setdefault(col, []).append(i)
+
+    @staticmethod
+    def _find_run(columns, features):
+        n = len(features)
+        for start in range(len(columns) - n + 1):
+            if columns[start:start + n] == features:
+                return start
+        return None
+
+    def transform(self, readings):
+        """Build the feature matrix, shape (n_rows, len(self.columns))."""
+        n_rows, get = _column_source(readings)
+        cache = {}
+
+        def column(name):
+            if name not in cache:
+                values = get(name)
+                if name == 'thi_index':
+                    values = self._thi(values, get, n_rows)
+                elif values is None:
+                    # Missing fields read as 0, as the models always treated them
+                    values = np.zeros(n_rows)
+                cache[name] = values
+            return cache[name]
+
+        X = np.empty((n_rows, len(self.columns)), dtype=self.dtype)
+        for name, idx in self.positions.items():
+            derive = DERIVED_FEATURES.get(name)
+            values = derive(column) if derive is not None else column(name)
+            X[:, idx] = np.asarray(values, dtype=self.dtype)[:, None]
+        return X
+
+    @staticmethod
+    def _thi(values, get, n_rows):
+        """Use the reading's THI where present, computing it from temperature/humidity otherwise."""
+        temp = get('ambient_temp')
+        humidity = get('humidity_pct')
+        computed = compute_thi(
+            temp if temp is not None else np.full(n_rows, DEFAULT_AMBIENT_TEMP),
+            humidity if humidity is not None else np.full(n_rows, DEFAULT_HUMIDITY),
+        )
+        if values is None:
+            return computed
+        return np.where(np.isnan(values), computed, values)
+
+    def view(self, X, name):
+        """Columns of model ``name`` as a view into X (no copy)."""
+        return X[:, self.slices[name]]
+
+    @classmethod
+    def for_models(cls, models):
+        """Pipeline covering every model in a ``load_models`` dict."""
+        return cls({name: model.columns for name, model in models.items()})
+
+
+@lru_cache(maxsize=32)
+def _single_pipeline(columns):
+    return FeaturePipeline({'model': list(columns)})
+
+
+def model_features(columns, readings):
+    """Feature matrix for a single model, with its pipeline cached by column list."""
+    return _single_pipeline(tuple(columns)).transform(readings)
@@ -0,0 +1,213 @@
+"""
+Micro-Batching Scheduler
+==========================
+Coalesces concurrent single-reading scan requests into batched inference.
+
+Requests are queued as they arrive. A background task takes the first
+waiting request, keeps collecting for up to ``max_wait_ms`` or until
+``max_batch_rows`` requests are in hand, runs one batched call in a worker
+thread, and resolves each request's future with its own result. While a
+batch is running, new requests queue up and form the next batch, so batches
+grow naturally under load and stay at one row (plus the window) when idle.
+
+``stats()`` reports the batch size distribution, queue delay (submit →
+batch start) and batch run time.
+
+If the background task ever dies, the requests it was holding fail with its
+exception; the next ``submit`` restarts it on the same queue, so requests
+still waiting there are served.
+"""
+
+import time
+import asyncio
+from collections import deque
+
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class BatchMetrics:
+    """Batch size histogram plus queue delay / run time over a recent window."""
+
+    def __init__(self, window=1000):
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.size_histogram = {bound: 0 for bound in BATCH_SIZE_BUCKETS}
+        self.size_histogram['more'] = 0
+        self.queue_delays_ms = deque(maxlen=window)
+        self.run_times_ms = deque(maxlen=window)
+
+    def record(self, size, queue_delays_ms, run_time_ms, failed=False):
+        self.batches += 1
+        self.rows += size
+        self.errors += int(failed)
+        bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), 'more')
+        self.size_histogram[bucket] += 1
+        self.queue_delays_ms.extend(queue_delays_ms)
+        self.run_times_ms.append(run_time_ms)
+
+    @staticmethod
+    def _summary(values):
+        ordered = sorted(values)
+        return {
+            'mean': round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            'p50': round(_percentile(ordered, 50), 3),
+            'p95': round(_percentile(ordered, 95), 3),
+            'max': round(ordered[-1], 3) if ordered else 0.0,
+        }
+
+    def snapshot(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'errors': self.errors,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'batch_size_histogram': {
+                (f'<={k}' if k != 'more' else f'>{BATCH_SIZE_BUCKETS[-1]}'): v
+                for k, v in self.size_histogram.items()
+            },
+            'queue_delay_ms': self._summary(self.queue_delays_ms),
+            'batch_run_ms': self._summary(self.run_times_ms),
+        }
+
+
+class MicroBatcher:
+    """
+    Async front end that batches single items for a batch function.
+
+    Args:
+        process_batch: sync callable taking a list of items and returning a
+            list of results in the same order; runs in a worker thread
+        max_batch_rows: largest batch handed to ``process_batch``
+        max_wait_ms: how long the first request of a batch waits for company
+    """
+
+    def __init__(self, process_batch, max_batch_rows=64, max_wait_ms=5.0):
+        self.process_batch = process_batch
+        self.max_batch_rows = max(1, int(max_batch_rows))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.metrics = BatchMetrics()
+        self._queue = None
+        self._loop = None
+        self._task = None
+        self._inflight = []   # requests taken off the queue by the current batch
+
+    def _ensure_running(self):
+        # Created lazily so the queue and task belong to the server's event loop
+        if self._task is not None and not self._task.done():
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A queue is bound to its loop: fail what is left in one from a previous loop
+            error = RuntimeError("Micro-batcher restarted on a new event loop")
+            while self._queue is not None and not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                try:
+                    _fail(future, error)
+                except RuntimeError:
+                    pass  # its loop is closed; nobody is waiting on it
+            self._queue = asyncio.Queue()
+            self._loop = loop
+        self._task = loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Queue one item and wait for its result (exceptions from the batch are re-raised)."""
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, batch):
+        """Fill ``batch`` from the queue (``_inflight``, so a dying task can fail it)."""
+        batch.append(await self._queue.get())
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_rows:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        try:
+            while True:
+                self._inflight = []
+                await self._collect(self._inflight)
+                await self._run_batch(self._inflight)
+        except BaseException as e:
+            # Nothing else will resolve the requests this task holds
+            for _, future, _ in self._inflight:
+                _fail(future, e)
+            self._inflight = []
+            raise
+
+    async def _run_batch(self, batch):
+        # Requests whose client went away don't need computing
+        live = [entry for entry in batch if not entry[1].done()]
+        if not live:
+            return
+
+        started = time.perf_counter()
+        delays = [(started - queued) * 1000 for _, _, queued in live]
+        try:
+            results = await asyncio.to_thread(self.process_batch, [item for item, _, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError(f"Batch function returned {len(results)} results for {len(live)} items")
+        except Exception as e:
+            self.metrics.record(len(live), delays, (time.perf_counter() - started) * 1000, failed=True)
+            for _, future, _ in live:
+                _fail(future, e)
+            return
+
+        self.metrics.record(len(live), delays, (time.perf_counter() - started) * 1000)
+        for (_, future, _), result in zip(live, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'max_batch_rows': self.max_batch_rows,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            **self.metrics.snapshot(),
+        }
+
+    async def aclose(self):
+        """Stop the scheduler; queued and in-flight requests fail with CancelledError."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                future.cancel()
+
+
+def _fail(future, error):
+    """Settle a pending future with ``error`` (cancel it for a cancellation)."""
+    if future.done():
+        return
+    if isinstance(error, asyncio.CancelledError):
+        future.cancel()
+    elif isinstance(error, Exception):
+        future.set_exception(error)
+    else:
+        future.set_exception(RuntimeError(f"Micro-batcher stopped: {error!r}"))
@@ -8,21 +8,17 @@ Trained ML models for livestock health monitoring:
   - DiseaseForecaster:  Multi-class classifier for disease type prediction
 """
 
+import copy
 import numpy as np
 import pandas as pd
 import pickle
 from pathlib import Path
-from sklearn.ensemble import (
-    RandomForestClassifier,
-    IsolationForest,
-    GradientBoostingClassifier,
-    GradientBoostingRegressor,
-)
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score, f1_score
 import warnings
+
+from .features import FeaturePipeline, DERIVED_FEATURES, model_features
+from .artifacts import (
+    ArrayScaler, ArrayLabelEncoder, LazyEstimator, write_artifacts, read_manifest, current_version,
+)
 warnings.filterwarnings('ignore')
 
 
@@ -44,6 +40,18 @@ ALL_FEATURES = SENSOR_FEATURES + ['gait_score', 'stance_symmetry', 'stride_lengt
 HEALTH_LABELS = {0: 'Healthy', 1: 'At-Risk', 2: 'Critical'}
 
 
+def _lameness_labels(scores):
+    return np.select(
+        [scores < 2.0, scores < 3.0, scores < 4.0],
+        ['Normal', 'Mild Lameness', 'Moderate Lameness'],
+        default='Severe Lameness',
+    )
+
+
+def _anomaly_severity(scores):
+    return np.where(scores < -0.3, 'High', np.where(scores < -0.1, 'Medium', 'Low'))
+
+
 class HealthPredictor:
     """
     Random Forest classifier for livestock health status prediction.
@@ -51,6 +59,11 @@ class HealthPredictor:
     """
 
     def __init__(self):
+        # sklearn is imported on construction/training only; serving from
+        # saved artifacts never needs it
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+
         self.model = RandomForestClassifier(
             n_estimators=150,
             max_depth=12,
@@ -67,23 +80,17 @@ class HealthPredictor:
         self.is_trained = False
         self.metrics = {}
 
-    def _engineer_features(self, df):
-        """Create additional engineered features."""
-        X = df[self.features].copy()
-
-        # Engineered features
-        X['temp_deviation'] = X['body_temp'] - 38.85  # deviation from normal mean
-        X['activity_rumination_ratio'] = X['activity_level'] / (X['rumination_min'] + 1)
-        X['feed_water_ratio'] = X['feed_intake'] / (X['water_intake'] + 1)
-        X['cardio_stress'] = X['heart_rate'] * X['respiratory_rate'] / 1000
-        X['mobility_score'] = (X['activity_level'] * X['steps_count']) / 10000
-        X['rest_activity_ratio'] = X['lying_time'] / (X['activity_level'] + 1)
-
-        return X
+    @property
+    def columns(self):
+        """Model input columns: raw features plus the engineered ones."""
+        return self.features + list(DERIVED_FEATURES)
 
     def train(self, df):
         """Train the health prediction model."""
-        X = self._engineer_features(df)
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import classification_report, accuracy_score, f1_score
+
+        X = _scaler_input(model_features(self.columns, df))
         y = df['health_status'].values
 
         X_train, X_test, y_train, y_test = train_test_split(
@@ -100,7 +107,7 @@ class HealthPredictor:
             'accuracy': accuracy_score(y_test, y_pred),
             'f1_weighted': f1_score(y_test, y_pred, average='weighted'),
             'report': classification_report(y_test, y_pred, target_names=['Healthy', 'At-Risk', 'Critical']),
-            'feature_importance': dict(zip(X.columns, self.model.feature_importances_)),
+            'feature_importance': dict(zip(self.columns, self.model.feature_importances_)),
         }
 
         self.is_trained = True
@@ -108,40 +115,51 @@ class HealthPredictor:
               f"F1: {self.metrics['f1_weighted']:.3f}")
         return self.metrics
 
-    def predict(self, reading_dict):
-        """Predict health status from a single reading dict."""
+    def _outputs(self, X):
+        """(predicted status, class probabilities) for a feature matrix."""
         if not self.is_trained:
             raise RuntimeError("Model not trained. Call train() first or load a saved model.")
-
-        df = pd.DataFrame([reading_dict])
-        X = self._engineer_features(df)
-        X_scaled = self.scaler.transform(X)
-
-        prediction = self.model.predict(X_scaled)[0]
-        probabilities = self.model.predict_proba(X_scaled)[0]
-
+        model = _estimator_for(self, len(X))
+        probas = model.predict_proba(self.scaler.transform(_scaler_input(X)))
+        # RandomForestClassifier.predict is the argmax of predict_proba
+        return model.classes_.take(probas.argmax(axis=1)), probas
+
+    def predict_each(self, X):
+        """One ``predict``-style dict per row of a feature matrix (see ``FeaturePipeline``)."""
+        predictions, probas = self._outputs(X)
+        return [
+            {
+                'status': int(prediction),
+                'status_label': HEALTH_LABELS[prediction],
+                'confidence': float(max(probabilities)),
+                'probabilities': {
+                    HEALTH_LABELS[i]: round(float(p), 4)
+                    for i, p in enumerate(probabilities)
+                },
+            }
+            for prediction, probabilities in zip(predictions, probas)
+        ]
+
+    def predict_row(self, X):
+        """Prediction dict for a single-row feature matrix."""
+        return self.predict_each(X)[0]
+
+    def predict_rows(self, X):
+        """Output columns for every row of a feature matrix."""
+        predictions, probas = self._outputs(X)
         return {
-            'status': int(prediction),
-            'status_label': HEALTH_LABELS[prediction],
-            'confidence': float(max(probabilities)),
-            'probabilities': {
-                HEALTH_LABELS[i]: round(float(p), 4)
-                for i, p in enumerate(probabilities)
-            },
+            'predicted_status': predictions,
+            'predicted_label': [HEALTH_LABELS[p] for p in predictions],
+            'confidence': probas.max(axis=1),
         }
 
+    def predict(self, reading_dict):
+        """Predict health status from a single reading dict."""
+        return self.predict_row(model_features(self.columns, reading_dict))
+
     def predict_batch(self, df):
         """Predict health status for a DataFrame."""
-        X = self._engineer_features(df)
-        X_scaled = self.scaler.transform(X)
-        predictions = self.model.predict(X_scaled)
-        probas = self.model.predict_proba(X_scaled)
-
-        results = df.copy()
-        results['predicted_status'] = predictions
-        results['predicted_label'] = [HEALTH_LABELS[p] for p in predictions]
-        results['confidence'] = probas.max(axis=1)
-        return results
+        return df.assign(**self.predict_rows(model_features(self.columns, df)))
 
 
 class AnomalyDetector:
@@ -151,6 +169,9 @@ class AnomalyDetector:
     """
 
     def __init__(self, contamination=0.05):
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
         self.model = IsolationForest(
             n_estimators=200,
             contamination=contamination,
@@ -162,16 +183,20 @@ class AnomalyDetector:
         self.features = SENSOR_FEATURES + ['gait_score', 'stance_symmetry', 'stride_length']
         self.is_trained = False
 
+    @property
+    def columns(self):
+        return self.features
+
     def train(self, df):
         """Train on healthy data only."""
         healthy_data = df[df['health_status'] == 0]
-        X = healthy_data[self.features].values
+        X = _scaler_input(model_features(self.columns, healthy_data))
         X_scaled = self.scaler.fit_transform(X)
         self.model.fit(X_scaled)
         self.is_trained = True
 
         # Evaluate on full dataset
-        X_all = self.scaler.transform(df[self.features].values)
+        X_all = self.scaler.transform(_scaler_input(model_features(self.columns, df)))
         scores = self.model.decision_function(X_all)
         predictions = self.model.predict(X_all)
 
@@ -198,23 +223,45 @@ class AnomalyDetector:
               f"Recall: {recall:.3f} | F1: {self.metrics['f1']:.3f}")
         return self.metrics
 
-    def predict(self, reading_dict):
-        """Check if a reading is anomalous."""
+    def _outputs(self, X):
+        """Isolation Forest decision scores; negative means anomalous."""
         if not self.is_trained:
             raise RuntimeError("Model not trained.")
-
-        X = np.array([[reading_dict.get(f, 0) for f in self.features]])
-        X_scaled = self.scaler.transform(X)
-
-        prediction = self.model.predict(X_scaled)[0]
-        score = self.model.decision_function(X_scaled)[0]
-
+        # IsolationForest.predict is decision_function < 0 → -1
+        return _estimator_for(self, len(X)).decision_function(self.scaler.transform(_scaler_input(X)))
+
+    def predict_each(self, X):
+        """One ``predict``-style dict per row of a feature matrix (see ``FeaturePipeline``)."""
+        return [
+            {
+                'is_anomaly': bool(score < 0),
+                'anomaly_score': round(float(-score), 4),  # Higher = more anomalous
+                'severity': 'High' if score < -0.3 else ('Medium' if score < -0.1 else 'Low'),
+            }
+            for score in self._outputs(X)
+        ]
+
+    def predict_row(self, X):
+        """Prediction dict for a single-row feature matrix."""
+        return self.predict_each(X)[0]
+
+    def predict_rows(self, X):
+        """Output columns for every row of a feature matrix."""
+        scores = self._outputs(X)
         return {
-            'is_anomaly': prediction == -1,
-            'anomaly_score': round(float(-score), 4),  # Higher = more anomalous
-            'severity': 'High' if score < -0.3 else ('Medium' if score < -0.1 else 'Low'),
+            'predicted_anomaly': scores < 0,
+            'anomaly_score': np.round(-scores, 4),
+            'anomaly_severity': _anomaly_severity(scores),
         }
 
+    def predict(self, reading_dict):
+        """Check if a reading is anomalous."""
+        return self.predict_row(model_features(self.columns, reading_dict))
+
+    def predict_batch(self, df):
+        """Check every row of a DataFrame for anomalies in one pass."""
+        return df.assign(**self.predict_rows(model_features(self.columns, df)))
+
 
 class GaitPredictor:
     """
@@ -223,6 +270,9 @@ class GaitPredictor:
     """
 
     def __init__(self):
+        from sklearn.ensemble import GradientBoostingRegressor
+        from sklearn.preprocessing import StandardScaler
+
         self.model = GradientBoostingRegressor(
             n_estimators=100,
             max_depth=5,
@@ -233,9 +283,15 @@ class GaitPredictor:
         self.features = GAIT_FEATURES
         self.is_trained = False
 
+    @property
+    def columns(self):
+        return self.features
+
     def train(self, df):
         """Train gait score predictor."""
-        X = df[self.features].values
+        from sklearn.model_selection import train_test_split
+
+        X = _scaler_input(model_features(self.columns, df))
         y = df['gait_score'].values
 
         X_train, X_test, y_train, y_test = train_test_split(
@@ -260,30 +316,46 @@ class GaitPredictor:
               f"R²: {self.metrics['r2']:.3f}")
         return self.metrics
 
-    def predict(self, reading_dict):
-        """Predict gait score from a single reading."""
+    def _outputs(self, X):
+        """Gait scores clipped to the 1–5 scale."""
         if not self.is_trained:
             raise RuntimeError("Model not trained.")
-
-        X = np.array([[reading_dict.get(f, 0) for f in self.features]])
-        X_scaled = self.scaler.transform(X)
-        score = float(np.clip(self.model.predict(X_scaled)[0], 1.0, 5.0))
-
-        if score < 2.0:
-            label = 'Normal'
-        elif score < 3.0:
-            label = 'Mild Lameness'
-        elif score < 4.0:
-            label = 'Moderate Lameness'
-        else:
-            label = 'Severe Lameness'
-
+        scores = _estimator_for(self, len(X)).predict(self.scaler.transform(_scaler_input(X)))
+        return np.clip(scores, 1.0, 5.0)
+
+    def predict_each(self, X):
+        """One ``predict``-style dict per row of a feature matrix (see ``FeaturePipeline``)."""
+        scores = self._outputs(X)
+        return [
+            {
+                'gait_score': round(float(score), 2),
+                'lameness_label': str(label),
+                'needs_attention': bool(score >= 2.5),
+            }
+            for score, label in zip(scores, _lameness_labels(scores))
+        ]
+
+    def predict_row(self, X):
+        """Prediction dict for a single-row feature matrix."""
+        return self.predict_each(X)[0]
+
+    def predict_rows(self, X):
+        """Output columns for every row of a feature matrix."""
+        scores = self._outputs(X)
         return {
-            'gait_score': round(score, 2),
-            'lameness_label': label,
-            'needs_attention': score >= 2.5,
+            'predicted_gait_score': np.round(scores, 2),
+            'lameness_label': _lameness_labels(scores),
+            'needs_attention': scores >= 2.5,
         }
 
+    def predict(self, reading_dict):
+        """Predict gait score from a single reading."""
+        return self.predict_row(model_features(self.columns, reading_dict))
+
+    def predict_batch(self, df):
+        """Predict gait scores for every row of a DataFrame."""
+        return df.assign(**self.predict_rows(model_features(self.columns, df)))
+
 
 class DiseaseForecaster:
     """
@@ -292,6 +364,9 @@ class DiseaseForecaster:
     """
 
     def __init__(self):
+        from sklearn.ensemble import GradientBoostingClassifier
+        from sklearn.preprocessing import StandardScaler, LabelEncoder
+
         self.model = GradientBoostingClassifier(
             n_estimators=120,
             max_depth=8,
@@ -303,10 +378,17 @@ class DiseaseForecaster:
         self.features = ALL_FEATURES
         self.is_trained = False
 
+    @property
+    def columns(self):
+        return self.features
+
     def train(self, df):
         """Train disease type predictor on diseased records only."""
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score, f1_score
+
         # Include all records — 'None' means healthy
-        X = df[self.features].values
+        X = _scaler_input(model_features(self.columns, df))
         y = self.label_encoder.fit_transform(df['disease_type'].values)
 
         X_train, X_test, y_train, y_test = train_test_split(
@@ -330,61 +412,290 @@ class DiseaseForecaster:
               f"F1: {self.metrics['f1_weighted']:.3f}")
         return self.metrics
 
-    def predict(self, reading_dict):
-        """Predict potential disease type."""
+    def _outputs(self, X):
+        """(disease labels, class probabilities) for a feature matrix."""
         if not self.is_trained:
             raise RuntimeError("Model not trained.")
+        probas = _estimator_for(self, len(X)).predict_proba(self.scaler.transform(_scaler_input(X)))
+        # GradientBoostingClassifier.predict is the argmax of predict_proba
+        return self.label_encoder.classes_[probas.argmax(axis=1)], probas
+
+    def predict_each(self, X):
+        """One ``predict``-style dict per row of a feature matrix (see ``FeaturePipeline``)."""
+        labels, probas = self._outputs(X)
+        classes = [str(c) for c in self.label_encoder.classes_]
+        return [
+            {
+                'predicted_disease': str(disease_label),
+                'confidence': float(max(probabilities)),
+                'disease_probabilities': {
+                    label: round(float(p), 4) for label, p in zip(classes, probabilities)
+                },
+                'is_healthy': disease_label == 'None',
+            }
+            for disease_label, probabilities in zip(labels, probas)
+        ]
+
+    def predict_row(self, X):
+        """Prediction dict for a single-row feature matrix."""
+        return self.predict_each(X)[0]
+
+    def predict_rows(self, X):
+        """Output columns for every row of a feature matrix."""
+        labels, probas = self._outputs(X)
+        return {
+            'predicted_disease': labels,
+            'disease_confidence': probas.max(axis=1),
+            'is_healthy': labels == 'None',
+        }
 
-        X = np.array([[reading_dict.get(f, 0) for f in self.features]])
-        X_scaled = self.scaler.transform(X)
+    def predict(self, reading_dict):
+        """Predict potential disease type."""
+        return self.predict_row(model_features(self.columns, reading_dict))
 
-        prediction = self.model.predict(X_scaled)[0]
-        probabilities = self.model.predict_proba(X_scaled)[0]
+    def predict_batch(self, df):
+        """Predict disease types for every row of a DataFrame."""
+        return df.assign(**self.predict_rows(model_features(self.columns, df)))
 
-        disease_label = self.label_encoder.inverse_transform([prediction])[0]
-        prob_dict = {
-            self.label_encoder.inverse_transform([i])[0]: round(float(p), 4)
-            for i, p in enumerate(probabilities)
-        }
 
-        return {
-            'predicted_disease': disease_label,
-            'confidence': float(max(probabilities)),
-            'disease_probabilities': prob_dict,
-            'is_healthy': disease_label == 'None',
-        }
+# ── Shared Feature Matrix ───────────────────────────────────────────────────
+
+def predict_readings(models, readings, pipeline=None):
+    """
+    Run every model on a list of readings with one inference per model.
+
+    Returns:
+        list with one dict per reading, keyed like ``models``, holding each
+        model's ``predict`` result
+    """
+    pipeline = pipeline or FeaturePipeline.for_models(models)
+    X = pipeline.transform(readings)
+    per_model = {name: model.predict_each(pipeline.view(X, name)) for name, model in models.items()}
+    return [{name: rows[i] for name, rows in per_model.items()} for i in range(len(X))]
+
+
+def predict_reading(models, reading, pipeline=None):
+    """Run every model on one reading, building the feature matrix only once."""
+    return predict_readings(models, reading, pipeline)[0]
+
+
+# ── Inference Backends ──────────────────────────────────────────────────────
+
+# Below this many rows the compiled trees beat sklearn's thread-pool dispatch
+SMALL_BATCH_ROWS = 64
+
+
+def _scaler_input(X):
+    """Scalers work in float64, as they were fitted."""
+    return np.asarray(X, dtype=np.float64)
+
+
+def _estimator_for(wrapper, n_rows):
+    """The compiled trees for small inputs, the batch estimator for large ones."""
+    return wrapper.model if n_rows <= SMALL_BATCH_ROWS else _batch_estimator(wrapper)
+
+
+def _batch_estimator(wrapper):
+    """
+    Estimator used by predict_batch. When pickled models are compiled at load
+    time, large batches stay on sklearn's multithreaded trees; models loaded
+    from artifacts only have the compiled trees.
+    """
+    original = getattr(wrapper, 'sklearn_model', None)
+    return original if original is not None else wrapper.model
+
+
+def compile_models(models, probe_rows=512, seed=0):
+    """
+    Swap each wrapper's tree ensemble for its compiled equivalent.
+
+    The compiled estimator is checked against sklearn on random probe inputs
+    in the scaled feature space; a model is only switched over if every
+    output matches. The original stays available as ``sklearn_model``.
+    """
+    from .compiled_trees import compile_estimator, verify_compiled
+
+    rng = np.random.default_rng(seed)
+    for name, wrapper in models.items():
+        original = _batch_estimator(wrapper)
+        try:
+            compiled = compile_estimator(original)
+        except TypeError as e:
+            print(f"   ⚠️  {name}: {e}, keeping sklearn")
+            continue
+        X_probe = rng.normal(scale=2.0, size=(probe_rows, original.n_features_in_))
+        ok, max_diff = verify_compiled(original, compiled, X_probe)
+        if not ok:
+            print(f"   ⚠️  {name}: compiled output differs from sklearn "
+                  f"(max diff {max_diff:.2e}), keeping sklearn")
+            continue
+        wrapper.sklearn_model = original
+        wrapper.model = compiled
+        print(f"   ⚡ Compiled {name} ({compiled.forest.n_trees} trees, max diff {max_diff:.1e})")
+    return models
 
 
 # ── Save / Load Utilities ───────────────────────────────────────────────────
 
-def save_models(models_dict, save_dir='trained_models'):
-    """Save all trained models to disk."""
-    save_path = Path(save_dir)
-    save_path.mkdir(exist_ok=True)
+MODEL_CLASSES = {
+    'health_predictor': HealthPredictor,
+    'anomaly_detector': AnomalyDetector,
+    'gait_predictor': GaitPredictor,
+    'disease_forecaster': DiseaseForecaster,
+}
+
+# Distilled students (see ``distillation``) that the 'fast' tier serves in place of a model
+FAST_TIER = {
+    'disease_forecaster': 'disease_forecaster_fast',
+}
+
+
+def artifact_entry(name, wrapper, rng=None, probe_rows=512):
+    """Compile a wrapper's estimator (verified against sklearn) into an artifact entry."""
+    from .compiled_trees import CompiledEstimator, compile_estimator, verify_compiled
+
+    rng = np.random.default_rng(0) if rng is None else rng
+    estimator = _batch_estimator(wrapper)
+    if isinstance(estimator, LazyEstimator):
+        estimator = estimator.load()
+    if not isinstance(estimator, CompiledEstimator):
+        compiled = compile_estimator(estimator)
+        X_probe = rng.normal(scale=2.0, size=(probe_rows, estimator.n_features_in_))
+        ok, max_diff = verify_compiled(estimator, compiled, X_probe)
+        if not ok:
+            raise RuntimeError(f"{name}: compiled trees differ from sklearn (max diff {max_diff:.2e})")
+        estimator = compiled
+
+    # The classification report is a long display string; keep numeric metrics only
+    metrics = {k: v for k, v in getattr(wrapper, 'metrics', {}).items() if k != 'report'}
+    label_encoder = getattr(wrapper, 'label_encoder', None)
+    return {
+        'class': type(wrapper).__name__,
+        'features': wrapper.features,
+        'scaler': wrapper.scaler,
+        'label_classes': None if label_encoder is None else label_encoder.classes_,
+        'metrics': metrics,
+        'estimator': estimator,
+    }
 
-    for name, model in models_dict.items():
-        filepath = save_path / f"{name}.pkl"
-        with open(filepath, 'wb') as f:
-            pickle.dump(model, f)
-        print(f"   💾 Saved {name} → {filepath}")
 
-    print(f"\n✅ All models saved to {save_path}/")
+def _sklearn_wrapper(wrapper):
+    """The wrapper with its sklearn estimator as ``model``, or None if it only has compiled trees."""
+    from .compiled_trees import CompiledEstimator
 
+    estimator = _batch_estimator(wrapper)
+    if isinstance(estimator, (LazyEstimator, CompiledEstimator)):
+        return None
+    if estimator is wrapper.model and not hasattr(wrapper, 'sklearn_model'):
+        return wrapper
+    plain = copy.copy(wrapper)
+    plain.model = estimator
+    plain.__dict__.pop('sklearn_model', None)
+    return plain
+
+
+def save_models(models_dict, save_dir='trained_models', entries=None):
+    """
+    Save all trained models to disk as a new version in the artifact format
+    (``manifest.json`` + per-model ``.npy`` tree arrays, see ``artifacts``),
+    with each sklearn wrapper pickled alongside for ``backend='sklearn'``.
 
-def load_models(save_dir='trained_models'):
-    """Load all trained models from disk."""
+    ``entries`` may hold artifact entries already compiled elsewhere (e.g.
+    by training workers); only the remaining models are compiled here.
+    """
     save_path = Path(save_dir)
-    models = {}
+    rng = np.random.default_rng(0)
 
-    model_files = {
-        'health_predictor': HealthPredictor,
-        'anomaly_detector': AnomalyDetector,
-        'gait_predictor': GaitPredictor,
-        'disease_forecaster': DiseaseForecaster,
+    precompiled = entries or {}
+    entries = {
+        name: precompiled[name] if name in precompiled else artifact_entry(name, model, rng)
+        for name, model in models_dict.items()
     }
+    pickles = {name: _sklearn_wrapper(model) for name, model in models_dict.items()}
+    for name in [name for name, wrapper in pickles.items() if wrapper is None]:
+        print(f"   ⚠️  {name} has no sklearn estimator; saved for the compiled backend only")
+        del pickles[name]
+    write_artifacts(entries, save_path, pickles)
+    version_path = current_version(save_path)
+    for name in entries:
+        print(f"   💾 Saved {name} → {version_path / name}/")
+
+    print(f"\n✅ All models saved to {version_path}/")
+
+
+def _wrapper_from_artifact(cls, directory, spec):
+    """Rebuild a model wrapper from its manifest entry without running __init__."""
+    wrapper = cls.__new__(cls)
+    wrapper.model = LazyEstimator(directory, spec['estimator'])
+    wrapper.scaler = ArrayScaler(spec['scaler']['mean'], spec['scaler']['scale'])
+    wrapper.features = spec['features']
+    wrapper.metrics = spec['metrics']
+    if spec['label_classes'] is not None:
+        wrapper.label_encoder = ArrayLabelEncoder(spec['label_classes'])
+    wrapper.is_trained = True
+    return wrapper
+
+
+def load_models(save_dir='trained_models', backend='compiled', tier='full'):
+    """
+    Load all trained models from disk.
+
+    Args:
+        save_dir: directory written by ``save_models``
+        backend: 'compiled' to serve from the artifact manifest — startup
+                 reads only JSON and tree arrays are memory-mapped on first
+                 use. Directories that only hold legacy ``.pkl`` files are
+                 unpickled and compiled (see ``compile_models``).
+                 'sklearn' loads the pickled wrappers and predicts with them as-is.
+        tier: 'full' serves the trained models; 'fast' serves the distilled
+              students of ``FAST_TIER`` under their teachers' names where
+              the save has them (else the full model, with a warning)
+
+    The live version of ``save_dir`` is resolved once, so every model comes
+    from the same save even if a new one is published meanwhile.
+    """
+    if backend not in ('sklearn', 'compiled'):
+        raise ValueError(f"Unknown inference backend: {backend!r}")
+    if tier not in ('full', 'fast'):
+        raise ValueError(f"Unknown model tier: {tier!r}")
+    save_path = current_version(save_dir)
+    models = {}
 
-    for name, cls in model_files.items():
+    if backend == 'sklearn' and not any((save_path / f"{name}.pkl").exists() for name in MODEL_CLASSES):
+        if read_manifest(save_path) is not None:
+            print(f"   ⚠️  No pickled models in {save_path}, serving the compiled artifacts")
+            backend = 'compiled'
+
+    manifest = read_manifest(save_path) if backend == 'compiled' else None
+    if manifest is not None:
+        specs = manifest['models']
+        students = set(FAST_TIER.values())
+        for name, spec in specs.items():
+            if name in students:
+                continue
+            cls = MODEL_CLASSES.get(name)
+            if cls is None or spec['class'] != cls.__name__:
+                print(f"   ⚠️  Skipping unknown model {name} ({spec['class']}) in manifest")
+                continue
+            source = name
+            if tier == 'fast':
+                if FAST_TIER.get(name) in specs:
+                    source = FAST_TIER[name]
+                    spec = specs[source]
+                elif name in FAST_TIER:
+                    print(f"   ⚠️  No distilled {FAST_TIER[name]} in {save_path}, serving the full model")
+            models[name] = _wrapper_from_artifact(cls, save_path / source, spec)
+            print(f"   📂 Loaded {name} ← {save_path / source}/ (lazy)")
+        return models
+
+    for name, cls in MODEL_CLASSES.items():
         filepath = save_path / f"{name}.pkl"
+        if tier == 'fast' and name in FAST_TIER:
+            student_path = save_path / f"{FAST_TIER[name]}.pkl"
+            if student_path.exists():
+                filepath = student_path
+            else:
+                print(f"   ⚠️  No distilled {FAST_TIER[name]} in {save_path}, serving the full model")
         if filepath.exists():
             with open(filepath, 'rb') as f:
                 models[name] = pickle.load(f)
@@ -392,4 +703,6 @@ def load_models(save_dir='trained_models'):
         else:
             print(f"   ⚠️  {name} not found at {filepath}")
 
+    if backend == 'compiled':
+        compile_models(models)
     return models
@@ -0,0 +1,93 @@
+"""
+Shared DataFrames
+===================
+Hands DataFrames and arrays to worker processes without pickling a copy
+per task.
+
+``SharedFrame.create`` writes each column once as a ``.npy`` file in a
+scratch directory; ``load`` in a worker memory-maps those files read-only,
+so every process reads the same pages through the OS page cache. String
+columns are stored as integer codes and come back as categoricals. The
+handle passed to the workers is just the directory and the column list.
+``SharedArrays`` does the same for a dict of plain arrays.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame stored as memory-mappable column files."""
+
+    def __init__(self, directory, columns):
+        self.directory = str(directory)
+        self.columns = columns          # [(name, categories or None)]
+
+    @classmethod
+    def create(cls, df, directory=None):
+        """Write ``df`` column by column to ``directory`` (default: a new temp dir)."""
+        directory = Path(directory or tempfile.mkdtemp(prefix='shared_frame_'))
+        directory.mkdir(parents=True, exist_ok=True)
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series):
+                values, categories = series.to_numpy(), None
+            else:
+                values, uniques = pd.factorize(series)
+                categories = uniques.tolist()
+            np.save(directory / f"{i}.npy", np.ascontiguousarray(values), allow_pickle=False)
+            columns.append((name, categories))
+        return cls(directory, columns)
+
+    def load(self):
+        """The DataFrame, backed by read-only memory maps of the column files."""
+        data = {}
+        for i, (name, categories) in enumerate(self.columns):
+            values = np.load(Path(self.directory) / f"{i}.npy", mmap_mode='r')
+            data[name] = values if categories is None else pd.Categorical.from_codes(values, categories)
+        return pd.DataFrame(data, copy=False)
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+class SharedArrays:
+    """Picklable handle to named arrays stored as memory-mappable ``.npy`` files."""
+
+    def __init__(self, directory, names):
+        self.directory = str(directory)
+        self.names = names
+
+    @classmethod
+    def create(cls, arrays, directory=None):
+        """Write ``{name: array}`` to ``directory`` (default: a new temp dir)."""
+        directory = Path(directory or tempfile.mkdtemp(prefix='shared_arrays_'))
+        directory.mkdir(parents=True, exist_ok=True)
+        for i, array in enumerate(arrays.values()):
+            np.save(directory / f"{i}.npy", np.ascontiguousarray(array), allow_pickle=False)
+        return cls(directory, list(arrays))
+
+    def load(self):
+        """``{name: read-only memory map}``."""
+        return {name: np.load(Path(self.directory) / f"{i}.npy", mmap_mode='r')
+                for i, name in enumerate(self.names)}
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
@@ -0,0 +1,376 @@
+"""
+Real-Time Herd Simulator
+==========================
+Continuous stream of sensor readings from a herd whose animals keep their
+state between readings.
+
+Each animal has a fixed physiological baseline (its place within the
+normal ranges), a gait baseline and an illness state. Every reading moves
+the current values a step toward the animal's target plus noise (a mean-
+reverting random walk), so consecutive readings are correlated instead of
+resampled from scratch. Illnesses start at random, progress mild →
+moderate → their final severity over 3-10 days and then clear; while ill,
+the target is pulled toward the disease profile by the severity's blend
+weight, as in ``LivestockDataGenerator``.
+
+All state lives in per-animal arrays and every step is vectorized over the
+animals being read, so a single process emits tens of thousands of
+readings per second. Readings come out as DataFrame batches (the columns of
+``generate_realtime_reading``), ready for ``score_herd`` / ``scan_readings``:
+
+- ``step(n)``       next reading of the next ``n`` animals (round-robin)
+- ``stream(rate)``  async iterator of batches paced to ``rate`` readings/s
+- ``feed(queue)``   the same stream into an ``asyncio.Queue`` (a bounded
+                    queue applies backpressure)
+- ``serve(port)``   the stream as NDJSON lines on a local TCP socket
+
+Run ``python -m livestock_biosecurity.simulator --rate 10000 --seconds 10``
+for a throughput benchmark (add ``--models trained_models`` to score the
+stream as well).
+"""
+
+import time
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .data_generator import LivestockDataGenerator
+
+
+DAY = 86_400.0
+MEAN_ILLNESS_DAYS = 6.5     # durations are 3-10 days
+
+
+class HerdSimulator:
+    """
+    Stateful simulated herd.
+
+    Args:
+        n_animals: herd size
+        seed: seed for reproducible streams
+        interval: simulated seconds between two readings of the same animal
+        sick_fraction: long-run share of animals that are ill at any time
+                       (the herd also starts with this share ill)
+        reversion: fraction of the gap to the target closed per reading
+        start: simulated time of the first reading (datetime or epoch
+               seconds; default now)
+    """
+
+    FEATURES = list(LivestockDataGenerator.NORMAL_RANGES)
+    GAIT_FEATURES = (('gait_score', 1), ('stance_symmetry', 3), ('stride_length', 2))
+
+    def __init__(self, n_animals=1000, seed=None, interval=3600.0, sick_fraction=0.15,
+                 reversion=0.5, start=None):
+        gen = LivestockDataGenerator
+        self.n_animals = int(n_animals)
+        self.interval = float(interval)
+        self.reversion = float(reversion)
+        self.rng = rng = np.random.default_rng(seed)
+        self.diseases = list(gen.DISEASE_PROFILES)
+        n, n_features = self.n_animals, len(self.FEATURES)
+
+        # ── Range tables ──
+        normal = np.array([gen.NORMAL_RANGES[f] for f in self.FEATURES], dtype=np.float64)
+        self.normal_low, self.normal_width = normal[:, 0], normal[:, 1] - normal[:, 0]
+        self.affected = np.array([[f in gen.DISEASE_PROFILES[d] for f in self.FEATURES] for d in self.diseases])
+        disease = np.array([[gen.DISEASE_PROFILES[d].get(f, gen.NORMAL_RANGES[f]) for f in self.FEATURES]
+                            for d in self.diseases], dtype=np.float64)
+        self.disease_low, self.disease_width = disease[..., 0], disease[..., 1] - disease[..., 0]
+        self.lower = np.minimum(normal[:, 0], disease[..., 0].min(axis=0)) * 0.8
+        self.upper = np.maximum(normal[:, 1], disease[..., 1].max(axis=0)) * 1.2
+        gait = np.array([[p[f] for f, _ in self.GAIT_FEATURES] for p in gen.GAIT_PROFILES.values()])
+        self.gait_low, self.gait_width = gait[..., 0], gait[..., 1] - gait[..., 0]
+        self.lameness = self.diseases.index('Lameness')
+        self.respiratory = [self.diseases.index('BRD'), self.diseases.index('Heat_Stress')]
+
+        # ── Static profiles ──
+        self.animal_ids = np.array([f"KS-{i:04d}" for i in range(n)], dtype=object)
+        self.breed = np.array(gen.BREEDS, dtype=object)[rng.integers(0, len(gen.BREEDS), n)]
+        self.age = rng.uniform(*gen.AGE_RANGE, n).round(1)
+        self.weight = rng.uniform(350, 650, n).round(1)
+        self.lactation = rng.integers(0, 7, n)
+
+        # ── Evolving state ──
+        self.baseline = rng.random((n_features, n))       # position within each normal range
+        self.gait_baseline = rng.random((len(self.GAIT_FEATURES), n))
+        self.disease = np.full(n, -1)                     # -1 = healthy
+        self.final_severity = np.zeros(n, dtype=np.int64)
+        self.elapsed = np.zeros(n)
+        self.duration = np.ones(n)
+        self.disease_point = np.zeros((n_features, n))    # position within the disease range
+
+        # Onset rate that holds the ill share at sick_fraction in the long run
+        sick_fraction = min(max(sick_fraction, 0.0), 0.99)
+        rate = sick_fraction / ((1 - sick_fraction) * MEAN_ILLNESS_DAYS * DAY)
+        self.onset_probability = 1 - np.exp(-rate * self.interval)
+
+        # Start from the stationary state: some animals already part-way into an illness
+        everyone = np.arange(n)
+        sick = everyone[rng.random(n) < sick_fraction]
+        self._start_illness(sick)
+        self.elapsed[sick] = rng.random(len(sick)) * self.duration[sick]
+        self.values, self.gait, _, _ = self._targets(everyone)
+
+        start = start.timestamp() if isinstance(start, datetime) else (time.time() if start is None else start)
+        # Readings of one pass are spread evenly over the interval
+        self.clock = start - self.interval + everyone / max(n, 1) * self.interval
+        self._cursor = 0
+
+    # ── State transitions ──
+
+    def _start_illness(self, rows):
+        rng = self.rng
+        self.disease[rows] = rng.integers(0, len(self.diseases), len(rows))
+        self.final_severity[rows] = rng.integers(0, 3, len(rows))
+        self.duration[rows] = rng.integers(3, 11, len(rows)) * DAY
+        self.elapsed[rows] = 0.0
+        self.disease_point[:, rows] = rng.random((len(self.FEATURES), len(rows)))
+
+    def _advance_illness(self, rows):
+        ill = self.disease[rows] >= 0
+        self.elapsed[rows] += np.where(ill, self.interval, 0.0)
+        self.disease[rows[ill & (self.elapsed[rows] >= self.duration[rows])]] = -1
+        self._start_illness(rows[~ill & (self.rng.random(len(rows)) < self.onset_probability)])
+
+    def _targets(self, rows):
+        """Target feature / gait values, current severity and the ill mask for ``rows``."""
+        disease = self.disease[rows]
+        ill = disease >= 0
+        # Progressive severity: mild at start, worsening
+        progress = self.elapsed[rows] / self.duration[rows]
+        severity = np.select([progress < 0.3, progress < 0.7], [0, 1], self.final_severity[rows])
+
+        target = self.normal_low[:, None] + self.baseline[:, rows] * self.normal_width[:, None]
+        d = np.where(ill, disease, 0)
+        diseased = self.disease_low[d].T + self.disease_point[:, rows] * self.disease_width[d].T
+        blend = np.where(ill & self.affected[d].T, LivestockDataGenerator.SEVERITY_BLEND[severity], 0.0)
+        target = blend * diseased + (1 - blend) * target
+
+        profile = np.zeros(len(rows), dtype=np.int64)
+        lame = disease == self.lameness
+        profile[lame] = severity[lame] + 1
+        profile[np.isin(disease, self.respiratory)] = 1
+        gait = self.gait_low[profile].T + self.gait_baseline[:, rows] * self.gait_width[profile].T
+        return target, gait, severity, ill
+
+    # ── Readings ──
+
+    def step(self, n=None):
+        """
+        Advance the next ``n`` animals (default: the whole herd) by one
+        reading interval and return their readings.
+
+        Returns:
+            pd.DataFrame with one row per animal, columns as
+            ``generate_realtime_reading``
+        """
+        n = self.n_animals if n is None else min(int(n), self.n_animals)
+        rows = (self._cursor + np.arange(n)) % self.n_animals
+        self._cursor = (self._cursor + n) % self.n_animals
+        return self._read(rows)
+
+    def _read(self, rows):
+        rng = self.rng
+        self._advance_illness(rows)
+        self.clock[rows] += self.interval
+        target, gait_target, severity, ill = self._targets(rows)
+
+        # Mean-reverting walk toward the target
+        values = self.values[:, rows]
+        values += self.reversion * (target - values) + rng.normal(0, 0.05, values.shape) * self.normal_width[:, None]
+        self.values[:, rows] = values
+        gait = self.gait[:, rows]
+        gait += self.reversion * (gait_target - gait) + rng.normal(0, 0.02, gait.shape) * self.gait_width[0][:, None]
+        self.gait[:, rows] = gait
+
+        columns = {
+            'animal_id': self.animal_ids[rows], 'breed': self.breed[rows], 'age_years': self.age[rows],
+            'weight_kg': self.weight[rows], 'lactation_number': self.lactation[rows],
+        }
+        readings = np.clip(values, self.lower[:, None], self.upper[:, None]).round(2)
+        columns.update(zip(self.FEATURES, readings))
+        for (feature, decimals), column in zip(self.GAIT_FEATURES, gait):
+            columns[feature] = column.round(decimals)
+
+        disease = self.disease[rows]
+        columns['health_status'] = np.where(ill, np.where(severity == 0, 1, 2), 0)
+        columns['disease_type'] = np.array(['None'] + self.diseases, dtype=object)[disease + 1]
+        columns['is_anomaly'] = ill.astype(np.int64)
+
+        # Environment follows the time of day
+        clock = self.clock[rows]
+        daily = np.sin(2 * np.pi * ((clock % DAY) / DAY - 9 / 24))
+        ambient = np.clip(31 + 7 * daily + rng.normal(0, 1.5, len(rows)), 22, 40).round(1)
+        humidity = np.clip(65 - 20 * daily + rng.normal(0, 4, len(rows)), 40, 90).round(1)
+        columns['timestamp'] = (clock * 1000).astype('datetime64[ms]')
+        columns['ambient_temp'] = ambient
+        columns['humidity_pct'] = humidity
+        columns['thi_index'] = (0.8 * ambient + humidity / 100 * (ambient - 14.4) + 46.4).round(1)
+        return pd.DataFrame(columns)
+
+    # ── Streaming ──
+
+    async def stream(self, rate=1000.0, batch_size=500, duration=None, stats=None):
+        """
+        Async iterator of reading batches paced to ``rate`` readings per second.
+
+        A consumer that falls behind is caught up by emitting without
+        sleeping; ``stats`` (a ``StreamStats``) records how far behind
+        schedule the stream got.
+        """
+        loop = asyncio.get_running_loop()
+        stats = stats or StreamStats()
+        period = batch_size / rate
+        started = loop.time()
+        stats.start(started)
+        batches = 0
+        while duration is None or batches * period < duration:
+            due = started + batches * period
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                stats.lag(-delay)
+            batch = self.step(batch_size)
+            batches += 1
+            stats.emitted(len(batch), loop.time())
+            yield batch
+
+    async def feed(self, queue, rate=1000.0, batch_size=500, duration=None, stats=None):
+        """Put ``(emit_time, batch)`` pairs on ``queue``, then ``None`` when ``duration`` runs out."""
+        loop = asyncio.get_running_loop()
+        stats = stats or StreamStats()
+        async for batch in self.stream(rate, batch_size, duration, stats):
+            emitted = loop.time()
+            await queue.put((emitted, batch))
+            stats.blocked(loop.time() - emitted)
+        await queue.put(None)
+        return stats
+
+    async def serve(self, host='127.0.0.1', port=8765, rate=1000.0, batch_size=100, duration=None):
+        """Broadcast the stream to every connected client as NDJSON lines (one reading per line)."""
+        clients = set()
+
+        async def handle(reader, writer):
+            clients.add(writer)
+            try:
+                await reader.read()         # until the client disconnects
+            finally:
+                clients.discard(writer)
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        async with server:
+            async for batch in self.stream(rate, batch_size, duration):
+                if not clients:
+                    continue
+                payload = batch.to_json(orient='records', lines=True, date_format='iso').rstrip('\n') + '\n'
+                data = payload.encode()
+                writers = list(clients)
+                for writer in writers:
+                    writer.write(data)
+                # Slow clients hold the stream back rather than buffering without bound
+                results = await asyncio.gather(*(w.drain() for w in writers), return_exceptions=True)
+                for writer, result in zip(writers, results):
+                    if isinstance(result, Exception):
+                        clients.discard(writer)
+
+
+class StreamStats:
+    """Emission counters for a simulator stream."""
+
+    def __init__(self):
+        self.readings = 0
+        self.batches = 0
+        self.started = None
+        self.last = None
+        self.max_lag = 0.0
+        self.blocked_time = 0.0
+
+    def start(self, now):
+        self.started = self.last = now
+
+    def emitted(self, n, now):
+        self.readings += n
+        self.batches += 1
+        self.last = now
+
+    def lag(self, seconds):
+        self.max_lag = max(self.max_lag, seconds)
+
+    def blocked(self, seconds):
+        self.blocked_time += seconds
+
+    def snapshot(self):
+        elapsed = (self.last - self.started) if self.started is not None else 0.0
+        return {
+            'readings': self.readings,
+            'batches': self.batches,
+            'elapsed_s': round(elapsed, 3),
+            'readings_per_s': round(self.readings / elapsed, 1) if elapsed > 0 else 0.0,
+            'max_lag_ms': round(self.max_lag * 1000, 3),
+            'queue_blocked_ms': round(self.blocked_time * 1000, 3),
+        }
+
+
+async def _benchmark(simulator, rate, batch_size, seconds, models=None, queue_size=64):
+    """Stream into a bounded queue; optionally score every batch with ``score_herd``."""
+    from .batch_inference import score_herd
+    from .features import FeaturePipeline
+
+    pipeline = FeaturePipeline.for_models(models) if models else None
+    queue = asyncio.Queue(maxsize=queue_size)
+    stats = StreamStats()
+    producer = asyncio.create_task(simulator.feed(queue, rate, batch_size, seconds, stats))
+
+    loop = asyncio.get_running_loop()
+    latencies, scored, busy = [], 0, 0.0
+    while (item := await queue.get()) is not None:
+        emitted, batch = item
+        if models:
+            t = time.perf_counter()
+            await asyncio.to_thread(score_herd, models, batch, pipeline)
+            busy += time.perf_counter() - t
+        scored += len(batch)
+        latencies.append((loop.time() - emitted) * 1000)
+    await producer
+
+    report = {'target_readings_per_s': rate, 'batch_size': batch_size, **stats.snapshot()}
+    if models:
+        report['scored_readings'] = scored
+        report['scoring_readings_per_s'] = round(scored / busy, 1) if busy else 0.0
+        report['end_to_end_ms'] = {
+            'mean': round(float(np.mean(latencies)), 3),
+            'p95': round(float(np.percentile(latencies, 95)), 3),
+            'max': round(float(np.max(latencies)), 3),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream simulated herd readings")
+    parser.add_argument('--animals', type=int, default=10_000)
+    parser.add_argument('--rate', type=float, default=10_000, help="readings per second")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--models', help="trained model directory: score the stream while benchmarking")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="serve NDJSON on a local socket instead")
+    args = parser.parse_args()
+
+    sim = HerdSimulator(args.animals, seed=args.seed)
+    if args.serve:
+        print(f"📡 Streaming {args.rate:.0f} readings/s on 127.0.0.1:{args.serve}")
+        asyncio.run(sim.serve(port=args.serve, rate=args.rate, batch_size=args.batch_size))
+    else:
+        livestock_models = None
+        if args.models:
+            from .models import load_models
+            livestock_models = load_models(args.models)
+        print(json.dumps(asyncio.run(_benchmark(sim, args.rate, args.batch_size, args.seconds, livestock_models)),
+                         indent=2))
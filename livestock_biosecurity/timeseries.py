@@ -0,0 +1,246 @@
+"""
+Per-Animal Time Series
+========================
+Bounded history of analyzer scores with rolling statistics.
+
+Each tracked animal owns one row of fixed-capacity ring buffers, stored
+struct-of-arrays: one ``(animals, capacity)`` array per metric plus one for
+timestamps. Alongside the buffers the store keeps running sums over the
+window, so every update and every statistic is O(1) per animal:
+
+- rolling mean      Σy / n
+- trend slope       least-squares slope of y against sample position,
+                    from Σy and Σxy (Σx, Σx² are closed-form in n). When the
+                    window is full and slides by one, every position drops by
+                    one, i.e. Σxy -= Σy.
+- EWMA              e ← α·y + (1 − α)·e
+
+Running sums drift slightly under repeated add/subtract, so each animal's
+sums are recomputed exactly from its buffer once per ``capacity`` updates
+(amortized O(1)). Updates for many animals at once are vectorized.
+
+Memory is bounded by ``max_animals × capacity``; when full, the animals
+updated least recently are dropped (never ones in the update being applied).
+"""
+
+import time
+import threading
+
+import numpy as np
+
+
+class AnimalSeriesStore:
+    """
+    Fixed-capacity per-animal ring buffers for a set of metrics.
+
+    Args:
+        metrics: names of the tracked values
+        capacity: samples kept per animal (the rolling window)
+        alpha: EWMA smoothing factor
+        max_animals: animals tracked at most
+    """
+
+    def __init__(self, metrics, capacity=64, alpha=0.2, max_animals=10_000):
+        self.metrics = tuple(metrics)
+        self.capacity = int(capacity)
+        self.alpha = float(alpha)
+        self.max_animals = int(max_animals)
+        self.slots = {}                      # animal_id -> row
+        self._ids = []                       # row -> animal_id (None when free)
+        self._free = []
+        self._lock = threading.Lock()
+        self._allocate(min(64, self.max_animals))
+
+    def _allocate(self, rows):
+        m, cap = len(self.metrics), self.capacity
+        old_rows = len(self._ids)
+        if old_rows:
+            self.values = np.concatenate([self.values, np.zeros((m, rows - old_rows, cap))], axis=1)
+            self.times = np.concatenate([self.times, np.zeros((rows - old_rows, cap))])
+            for name in ('head', 'count', 'updates'):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(rows - old_rows, np.int64)]))
+            for name in ('sum_y', 'sum_xy', 'ewma'):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros((m, rows - old_rows))], axis=1))
+            self.last_update = np.concatenate([self.last_update, np.zeros(rows - old_rows)])
+        else:
+            self.values = np.zeros((m, rows, cap))      # one plane per metric
+            self.times = np.zeros((rows, cap))
+            self.head = np.zeros(rows, np.int64)        # next write position
+            self.count = np.zeros(rows, np.int64)       # samples in the window
+            self.updates = np.zeros(rows, np.int64)     # since the last exact resum
+            self.sum_y = np.zeros((m, rows))
+            self.sum_xy = np.zeros((m, rows))           # x = position in window, 0 = oldest
+            self.ewma = np.zeros((m, rows))
+            self.last_update = np.zeros(rows)
+        self._free.extend(range(rows - 1, old_rows - 1, -1))
+        self._ids.extend([None] * (rows - old_rows))
+
+    def __contains__(self, animal_id):
+        return animal_id in self.slots
+
+    # ── Slots ──
+
+    def _row(self, animal_id, claimed):
+        """Row of ``animal_id``, assigning one if needed; rows in ``claimed`` (this update's) are never evicted."""
+        row = self.slots.get(animal_id)
+        if row is None:
+            if not self._free:
+                if len(self._ids) < self.max_animals:
+                    self._allocate(min(2 * len(self._ids), self.max_animals))
+                else:
+                    self._evict(claimed)
+            row = self._free.pop()
+            self.slots[animal_id] = row
+            self._ids[row] = animal_id
+        claimed.add(row)
+        return row
+
+    def _evict(self, keep):
+        """Free the least recently updated tenth of the rows not in ``keep`` (amortized O(1) per new animal)."""
+        age = self.last_update.copy()
+        age[list(keep)] = np.inf
+        n = min(max(1, len(self._ids) // 10), len(self._ids) - len(keep))
+        for row in np.argpartition(age, n - 1)[:n].tolist():
+            del self.slots[self._ids[row]]
+            self._ids[row] = None
+            self._reset(row)
+            self._free.append(row)
+
+    def _reset(self, row):
+        self.head[row] = self.count[row] = self.updates[row] = 0
+        self.sum_y[:, row] = self.sum_xy[:, row] = self.ewma[:, row] = 0
+        self.last_update[row] = 0
+
+    # ── Updates ──
+
+    def update(self, animal_ids, values, timestamp=None):
+        """
+        Append one sample per animal.
+
+        Args:
+            animal_ids: sequence of ids (an id may repeat; its samples are
+                        applied in order)
+            values: {metric: array aligned with animal_ids}
+            timestamp: sample time in seconds (default now)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if len(animal_ids) > self.max_animals and len(set(animal_ids)) > self.max_animals:
+            raise ValueError(f"More than max_animals={self.max_animals} animals in one update")
+        y = np.array([np.asarray(values[m], dtype=np.float64) for m in self.metrics]).reshape(len(self.metrics), -1)
+        with self._lock:
+            claimed = set()
+            row_list = [self._row(a, claimed) for a in animal_ids]
+            rows = np.array(row_list, dtype=np.int64)
+            if len(set(row_list)) == len(row_list):
+                self._append(rows, y, timestamp)
+                return
+            # Vectorized steps need distinct rows: round k applies each id's k-th sample
+            order = np.argsort(rows, kind='stable')
+            idx = np.arange(len(rows))
+            starts = np.r_[True, rows[order][1:] != rows[order][:-1]]
+            occurrence = np.empty_like(idx)
+            occurrence[order] = idx - np.maximum.accumulate(np.where(starts, idx, 0))
+            by_round = np.argsort(occurrence, kind='stable')
+            bounds = np.cumsum(np.bincount(occurrence))
+            for step in np.split(by_round, bounds[:-1]):
+                self._append(rows[step], y[:, step], timestamp)
+
+    def _append(self, rows, y, timestamp):
+        cap = self.capacity
+        n_old = self.count[rows]
+        head = self.head[rows]
+        full = n_old == cap
+
+        # Slide a full window: drop the oldest (position 0), shift the rest down by one
+        oldest = np.where(full, self.values[:, rows, head], 0.0)
+        self.sum_y[:, rows] -= oldest
+        self.sum_xy[:, rows] -= np.where(full, self.sum_y[:, rows], 0.0)
+        position = np.where(full, cap - 1, n_old)
+        self.sum_y[:, rows] += y
+        self.sum_xy[:, rows] += position * y
+
+        self.ewma[:, rows] = np.where(n_old == 0, y, self.alpha * y + (1 - self.alpha) * self.ewma[:, rows])
+        self.values[:, rows, head] = y
+        self.times[rows, head] = timestamp
+        self.head[rows] = (head + 1) % cap
+        self.count[rows] = np.minimum(n_old + 1, cap)
+        self.last_update[rows] = timestamp
+
+        self.updates[rows] += 1
+        stale = rows[self.updates[rows] >= cap]
+        if len(stale):
+            self._resum(stale)
+
+    def _window(self, rows):
+        """Buffered values of ``rows`` ordered oldest → newest, shape (metrics, rows, capacity), plus a validity mask."""
+        cap = self.capacity
+        count = self.count[rows]
+        start = (self.head[rows] - count) % cap
+        idx = (start[:, None] + np.arange(cap)) % cap
+        valid = np.arange(cap) < count[:, None]
+        return self.values[:, rows[:, None], idx], valid
+
+    def _resum(self, rows):
+        window, valid = self._window(rows)
+        window = np.where(valid, window, 0.0)
+        self.sum_y[:, rows] = window.sum(axis=2)
+        self.sum_xy[:, rows] = (window * np.arange(self.capacity)).sum(axis=2)
+        self.updates[rows] = 0
+
+    # ── Queries ──
+
+    def stats(self, animal_ids):
+        """
+        Rolling statistics for each animal (untracked animals get 0 samples).
+
+        Returns:
+            {'samples': int array, metric: {'mean', 'slope', 'ewma'} arrays}
+        """
+        with self._lock:
+            rows = np.array([self.slots.get(a, -1) for a in animal_ids], dtype=np.int64)
+            known = rows >= 0
+            safe = np.where(known, rows, 0)
+            n = np.where(known, self.count[safe], 0).astype(np.float64)
+            sum_y = self.sum_y[:, safe]
+            sum_xy = self.sum_xy[:, safe]
+            ewma = self.ewma[:, safe]
+
+        # Positions 0..n-1: Σx and Σx² in closed form
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        denom = n * sum_xx - sum_x ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, sum_y / n, np.nan)
+            slope = np.where(n >= 2, (n * sum_xy - sum_x * sum_y) / denom, 0.0)
+        out = {'samples': n.astype(np.int64)}
+        for i, metric in enumerate(self.metrics):
+            out[metric] = {
+                'mean': mean[i],
+                'slope': slope[i],
+                'ewma': np.where(n > 0, ewma[i], np.nan),
+            }
+        return out
+
+    def series(self, animal_id):
+        """Buffered samples of one animal, oldest first: {'timestamp': array, metric: array}."""
+        with self._lock:
+            row = self.slots.get(animal_id)
+            if row is None:
+                return None
+            rows = np.array([row])
+            window, valid = self._window(rows)
+            n = int(valid.sum())
+            idx = (self.head[row] - n + np.arange(n)) % self.capacity
+            out = {'timestamp': self.times[row, idx].copy()}
+            for i, metric in enumerate(self.metrics):
+                out[metric] = window[i, 0, :n].copy()
+            return out
+
+
+TREND_LABELS = np.array(['Stable', 'Improving', 'Worsening', 'Insufficient data'], dtype=object)
+
+
+def trend_direction(slope, samples, threshold, min_samples=3):
+    """'Improving' / 'Worsening' / 'Stable' for a higher-is-better metric's slope."""
+    code = (slope > threshold) + 2 * (slope < -threshold)
+    return TREND_LABELS[np.where(samples < min_samples, 3, code)]
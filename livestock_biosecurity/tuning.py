@@ -0,0 +1,325 @@
+"""
+Hyperparameter Search
+=======================
+Successive-halving search over the livestock models' hyperparameters,
+scored on accuracy and on serving latency.
+
+- each model's scaled train/test folds are computed once and cached as
+  memory-mapped arrays (``SharedArrays``) that every worker opens, rather
+  than being re-scaled or pickled per candidate
+- every rung fits the surviving candidates on a growing share of the
+  training rows, in parallel across a process pool; fitted estimators come
+  back compiled, i.e. as the trees the scan endpoint serves
+- the parent process then times single-row and batch inference of each
+  candidate one after another, so timings are not skewed by concurrent fits
+- survivors are promoted by Pareto rank over (score, single-row latency,
+  batch latency), then by score, keeping 1/eta of them per rung
+- the last rung's Pareto front is reported with a recommended point: the
+  fastest candidate whose score is within ``tolerance`` of the best
+
+Scores are higher-is-better: accuracy for the classifiers, R² for the gait
+regressor and anomaly F1 for the Isolation Forest.
+"""
+
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .models import MODEL_CLASSES, _scaler_input
+from .features import model_features
+from .shared_frame import SharedArrays
+
+
+SEARCH_SPACES = {
+    'health_predictor': {
+        'n_estimators': [50, 100, 150, 250],
+        'max_depth': [6, 8, 12, 16, None],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.5],
+    },
+    'anomaly_detector': {
+        'n_estimators': [50, 100, 200, 300],
+        'max_features': [0.6, 0.8, 1.0],
+        'max_samples': ['auto', 512],
+    },
+    'gait_predictor': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [3, 4, 5, 7],
+        'learning_rate': [0.05, 0.1, 0.2],
+        'subsample': [0.8, 1.0],
+    },
+    'disease_forecaster': {
+        'n_estimators': [40, 80, 120, 200],
+        'max_depth': [3, 5, 8],
+        'learning_rate': [0.05, 0.1, 0.2],
+        'subsample': [0.8, 1.0],
+    },
+}
+
+# Estimator method the scan endpoint calls, per model
+SERVING_METHODS = {
+    'health_predictor': 'predict_proba',
+    'anomaly_detector': 'decision_function',
+    'gait_predictor': 'predict',
+    'disease_forecaster': 'predict_proba',
+}
+
+
+# ── Fold cache ──
+
+def _model_data(name, df):
+    """Unscaled features, target, stratification labels and the training-row mask of one model."""
+    wrapper = MODEL_CLASSES[name]()
+    X = _scaler_input(model_features(wrapper.columns, df))
+    if name == 'health_predictor':
+        y = df['health_status'].to_numpy()
+        return X, y, y, np.ones(len(y), bool)
+    if name == 'disease_forecaster':
+        y = wrapper.label_encoder.fit_transform(np.asarray(df['disease_type'], dtype=object))
+        return X, y, y, np.ones(len(y), bool)
+    if name == 'gait_predictor':
+        y = df['gait_score'].to_numpy(dtype=np.float64)
+        return X, y, None, np.ones(len(y), bool)
+    # Isolation Forest: fitted on healthy rows, scored on detecting is_anomaly
+    y = df['is_anomaly'].to_numpy()
+    return X, y, y, df['health_status'].to_numpy() == 0
+
+
+def prepare_folds(df, names, n_splits=3, seed=42, directory=None):
+    """
+    Scale every model's cross-validation folds once and cache them.
+
+    Returns:
+        ``SharedArrays`` with ``<model>.<fold>.<part>`` entries, parts being
+        X_train / y_train / X_test / y_test plus ``order``, a fixed random
+        order of the training rows that rung subsamples are taken from
+    """
+    from sklearn.model_selection import KFold, StratifiedKFold
+    from sklearn.preprocessing import StandardScaler
+
+    arrays = {}
+    rng = np.random.default_rng(seed)
+    for name in names:
+        X, y, strata, trainable = _model_data(name, df)
+        if strata is None:
+            splits = KFold(n_splits, shuffle=True, random_state=seed).split(X)
+        else:
+            splits = StratifiedKFold(n_splits, shuffle=True, random_state=seed).split(X, strata)
+        for k, (train, test) in enumerate(splits):
+            train = train[trainable[train]]
+            scaler = StandardScaler().fit(X[train])
+            arrays[f"{name}.{k}.X_train"] = scaler.transform(X[train])
+            arrays[f"{name}.{k}.y_train"] = y[train]
+            arrays[f"{name}.{k}.X_test"] = scaler.transform(X[test])
+            arrays[f"{name}.{k}.y_test"] = y[test]
+            arrays[f"{name}.{k}.order"] = rng.permutation(len(train))
+    return SharedArrays.create(arrays, directory)
+
+
+# ── Candidate evaluation (worker side) ──
+
+def _score(name, estimator, X_test, y_test):
+    if name == 'gait_predictor':
+        from sklearn.metrics import r2_score
+        return r2_score(y_test, estimator.predict(X_test))
+    if name == 'anomaly_detector':
+        from sklearn.metrics import f1_score
+        return f1_score(y_test, (estimator.predict(X_test) == -1).astype(int), zero_division=0)
+    return float(np.mean(estimator.predict(X_test) == y_test))
+
+
+def _evaluate(task):
+    """Fit one candidate on every fold at one rung's data share (runs in a worker process)."""
+    from sklearn.base import clone
+    from .compiled_trees import compile_estimator
+
+    name, params, fraction, folds, n_splits, n_jobs = task
+    arrays = folds.load()
+    base = MODEL_CLASSES[name]().model
+    if n_jobs is not None and 'n_jobs' in base.get_params():
+        base.set_params(n_jobs=n_jobs)
+
+    started = time.perf_counter()
+    scores = []
+    for k in range(n_splits):
+        order = arrays[f"{name}.{k}.order"]
+        rows = np.sort(order[:max(2, int(math.ceil(len(order) * fraction)))])
+        X_train = arrays[f"{name}.{k}.X_train"][rows]
+        y_train = arrays[f"{name}.{k}.y_train"][rows]
+        estimator = clone(base).set_params(**params)
+        if name == 'anomaly_detector':
+            estimator.fit(X_train)
+        else:
+            estimator.fit(X_train, y_train)
+        scores.append(_score(name, estimator, arrays[f"{name}.{k}.X_test"], arrays[f"{name}.{k}.y_test"]))
+    return {
+        'model': name,
+        'params': params,
+        'fraction': fraction,
+        'score': float(np.mean(scores)),
+        'score_std': float(np.std(scores)),
+        'fit_s': time.perf_counter() - started,
+        'estimator': compile_estimator(estimator),
+    }
+
+
+# ── Latency and selection (parent side) ──
+
+def measure_latency(estimator, method, X, repeats=200, batch_rows=1024):
+    """Median single-row latency (µs) and batch latency per row (µs) of ``estimator.method``."""
+    predict = getattr(estimator, method)
+    row = np.ascontiguousarray(X[:1])
+    batch = np.ascontiguousarray(np.resize(np.asarray(X), (batch_rows, X.shape[1])))
+    predict(row)
+    predict(batch)
+    single = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        predict(row)
+        single.append(time.perf_counter() - t)
+    batched = []
+    for _ in range(5):
+        t = time.perf_counter()
+        predict(batch)
+        batched.append(time.perf_counter() - t)
+    return float(np.median(single) * 1e6), float(np.median(batched) / batch_rows * 1e6)
+
+
+OBJECTIVES = (('score', 1), ('single_row_us', -1), ('batch_us_per_row', -1))
+
+
+def _dominates(a, b):
+    better = [sign * (a[key] - b[key]) for key, sign in OBJECTIVES]
+    return all(d >= 0 for d in better) and any(d > 0 for d in better)
+
+
+def pareto_ranks(results):
+    """Non-dominated sorting rank of each result (0 = Pareto front)."""
+    ranks = [0] * len(results)
+    remaining = set(range(len(results)))
+    rank = 0
+    while remaining:
+        front = {i for i in remaining
+                 if not any(_dominates(results[j], results[i]) for j in remaining if j != i)}
+        for i in front:
+            ranks[i] = rank
+        remaining -= front
+        rank += 1
+    return ranks
+
+
+def sample_candidates(space, n, rng):
+    """Up to ``n`` distinct random configurations from a grid."""
+    keys = list(space)
+    total = math.prod(len(space[k]) for k in keys)
+    if total <= n:
+        picks = range(total)
+    else:
+        picks = rng.choice(total, size=n, replace=False)
+    candidates = []
+    for index in picks:
+        params = {}
+        for key in keys:
+            index, choice = divmod(int(index), len(space[key]))
+            params[key] = space[key][choice]
+        candidates.append(params)
+    return candidates
+
+
+def successive_halving(df, names=None, n_candidates=27, eta=3, n_splits=3, workers=None,
+                       tolerance=0.005, seed=42, log=print):
+    """
+    Search the hyperparameters of several models at once.
+
+    Args:
+        df: training DataFrame (as produced by the data generator)
+        names: models to tune (default: all four)
+        n_candidates: random configurations per model in the first rung
+        eta: halving factor; each rung keeps 1/eta of the candidates and
+             gives them eta times the training rows
+        n_splits: cross-validation folds
+        workers: worker processes (default: CPU count)
+        tolerance: score slack for the recommended (fastest) point
+
+    Returns:
+        {model: {'evaluations': [...], 'pareto_front': [...], 'recommended': {...}}}
+        with estimators stripped, ready for ``save_results``
+    """
+    names = list(names or SEARCH_SPACES)
+    rng = np.random.default_rng(seed)
+    cpus = os.cpu_count() or 1
+    workers = workers or cpus
+    n_jobs = max(1, cpus // workers)
+    n_rungs = max(1, math.ceil(math.log(n_candidates, eta)))
+    survivors = {name: sample_candidates(SEARCH_SPACES[name], n_candidates, rng) for name in names}
+    history = {name: [] for name in names}
+    final = {}
+
+    with prepare_folds(df, names, n_splits, seed) as folds, ProcessPoolExecutor(max_workers=workers) as pool:
+        latency_X = {name: folds.load()[f"{name}.0.X_test"] for name in names}
+        for rung in range(n_rungs):
+            fraction = eta ** (rung - n_rungs + 1)
+            tasks = [(name, params, fraction, folds, n_splits, n_jobs)
+                     for name in names for params in survivors[name]]
+            log(f"   🔎 Rung {rung + 1}/{n_rungs}: {len(tasks)} fits on {fraction:.0%} of the training rows")
+            results = list(pool.map(_evaluate, tasks))
+
+            by_model = {name: [] for name in names}
+            for result in results:
+                estimator = result.pop('estimator')
+                result['single_row_us'], result['batch_us_per_row'] = measure_latency(
+                    estimator, SERVING_METHODS[result['model']], latency_X[result['model']])
+                result['rung'] = rung
+                by_model[result['model']].append(result)
+
+            for name, rung_results in by_model.items():
+                history[name].extend(rung_results)
+                ranks = pareto_ranks(rung_results)
+                ordered = sorted(range(len(rung_results)), key=lambda i: (ranks[i], -rung_results[i]['score']))
+                if rung == n_rungs - 1:
+                    final[name] = [rung_results[i] for i in ordered if ranks[i] == 0]
+                else:
+                    keep = max(1, math.ceil(len(ordered) / eta))
+                    survivors[name] = [rung_results[i]['params'] for i in ordered[:keep]]
+        del latency_X
+
+    report = {}
+    for name in names:
+        front = sorted(final[name], key=lambda r: -r['score'])
+        best = front[0]['score']
+        recommended = min((r for r in front if r['score'] >= best - tolerance), key=lambda r: r['single_row_us'])
+        report[name] = {'evaluations': history[name], 'pareto_front': front, 'recommended': recommended}
+    return report
+
+
+def recommended_params(report):
+    """``{model: params}`` of each model's recommended point."""
+    return {name: entry['recommended']['params'] for name, entry in report.items()}
+
+
+def save_results(report, path):
+    """Write a search report as JSON (temp file + rename)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(report, f, indent=2, default=lambda v: v.item() if hasattr(v, 'item') else str(v))
+    os.replace(tmp, path)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_front(name, entry):
+    """Printable table of one model's Pareto front."""
+    lines = [f"   {name}: {len(entry['pareto_front'])} Pareto-optimal of {len(entry['evaluations'])} evaluations"]
+    for result in entry['pareto_front']:
+        marker = '→' if result == entry['recommended'] else ' '
+        params = ', '.join(f"{k}={v}" for k, v in result['params'].items())
+        lines.append(f"    {marker} score {result['score']:.4f}  single {result['single_row_us']:7.1f}µs  "
+                     f"batch {result['batch_us_per_row']:6.2f}µs/row  {params}")
+    return "\n".join(lines)
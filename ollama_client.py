@@ -0,0 +1,93 @@
+# ollama_client.py
+"""Shared non-blocking Ollama client for the FastAPI servers.
+
+One pooled ``httpx.AsyncClient`` (keep-alive connections) is created lazily on
+the running event loop and reused for chat, streaming chat, embeddings, tags
+and vision calls. Every call takes its own timeout; for streaming calls the
+timeout bounds the wait for each chunk rather than the whole generation.
+
+Streaming responses are consumed inside ``async with`` blocks, so when the
+SSE client disconnects and Starlette cancels the response generator, the
+upstream connection to Ollama is closed and generation stops there too.
+"""
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+
+class AsyncOllamaClient:
+    """Async wrapper around the Ollama REST API."""
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, max_connections: int = 32,
+                 max_keepalive: int = 16, connect_timeout: float = 5.0):
+        self.base_url = base_url.rstrip('/')
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive)
+        self.connect_timeout = connect_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=self.limits,
+                                             timeout=self._timeout(60.0))
+        return self._client
+
+    def _timeout(self, seconds: float) -> httpx.Timeout:
+        return httpx.Timeout(seconds, connect=min(self.connect_timeout, seconds))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ── Model listing ──
+    async def tags(self, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """Return the installed models as reported by ``/api/tags``."""
+        r = await self.client.get("/api/tags", timeout=self._timeout(timeout))
+        r.raise_for_status()
+        return r.json().get("models", [])
+
+    async def is_up(self, timeout: float = 5.0) -> bool:
+        try:
+            r = await self.client.get("/api/tags", timeout=self._timeout(timeout))
+            return r.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    # ── Embeddings ──
+    async def embed(self, text: str, model: str = "nomic-embed-text", timeout: float = 30.0) -> List[float]:
+        r = await self.client.post("/api/embeddings", json={"model": model, "prompt": text},
+                                   timeout=self._timeout(timeout))
+        r.raise_for_status()
+        return r.json()["embedding"]
+
+    # ── Chat / vision ──
+    async def chat(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict] = None,
+                   timeout: float = 120.0) -> Dict[str, Any]:
+        """Non-streaming chat; vision models take ``images`` inside the messages."""
+        payload = {"model": model, "messages": messages, "stream": False, "options": options or {}}
+        r = await self.client.post("/api/chat", json=payload, timeout=self._timeout(timeout))
+        r.raise_for_status()
+        return r.json()
+
+    async def chat_stream(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict] = None,
+                          timeout: float = 120.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield parsed NDJSON chunks from a streaming chat until ``done``."""
+        payload = {"model": model, "messages": messages, "stream": True, "options": options or {}}
+        async with self.client.stream("POST", "/api/chat", json=payload,
+                                      timeout=self._timeout(timeout)) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    continue
+                yield chunk
+                if chunk.get("done"):
+                    break
@@ -0,0 +1,64 @@
+# query_cache.py
+"""In-process TTL + LRU caches for chat retrieval (query embeddings and top-k hits)."""
+import re
+import time
+import string
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# ASCII punctuation plus the Devanagari danda; letters and combining marks are kept
+_PUNCT_TABLE = str.maketrans({ch: ' ' for ch in string.punctuation + '।॥'})
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a farmer question so trivially different phrasings share a cache key."""
+    text = unicodedata.normalize('NFKC', text).casefold().translate(_PUNCT_TABLE)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value), least recent first
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl_s': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
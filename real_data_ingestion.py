@@ -1,75 +1,322 @@
 # real_data_ingestion.py
 import os
+import sys
 import pandas as pd
 import numpy as np
 import faiss
 import pickle
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
 import requests
 import json
 import PyPDF2
-from sentence_transformers import SentenceTransformer
 import re
 from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import time
+import zlib
+from collections import defaultdict
+from itertools import chain, groupby, islice
+from concurrent.futures import ProcessPoolExecutor
 import logging
+from embedding_engine import BatchEmbeddingEngine
+from embedding_cache import get_embedding_cache, DEFAULT_CACHE_DIR
+from ingestion_pipeline import Pipeline, ordered_map, batched
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentence boundary: whitespace after terminal punctuation
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
 class SemanticChunker:
-    """Handles semantic chunking of text using sentence similarity."""
+    """Handles semantic chunking of text using sentence similarity.
+    
+    Every sentence gets a vector, and each boundary between two sentences is
+    scored by the cosine similarity of the mean vectors of the ``window``
+    sentences before and after it (all boundaries of a batch in one vectorized
+    pass). A chunk ends early where the score drops more than
+    ``breakpoint_std`` standard deviations below the document's mean so far,
+    once it holds ``min_chunk_size`` characters; window scores fall over a few
+    boundaries around a topic change, so the cut goes at the bottom of the
+    drop rather than at its first boundary. When a chunk would outgrow
+    ``chunk_size``, it is cut at its weakest boundary past ``min_chunk_size``,
+    and the sentences after that boundary start the next chunk.
+    
+    Modes:
+        'semantic': sentence-transformer embeddings (``model_name``), loaded on first use
+        'fast':     hashed bag-of-words vectors; never loads SentenceTransformer
+        'length':   no vectors; chunks are packed purely by length
+    """
+    
+    MODES = ('semantic', 'fast', 'length')
+    HASH_DIM = 512
     
-    def __init__(self, chunk_size: int = 2000, overlap: int = 200):
+    def __init__(self, chunk_size: int = 2000, overlap: int = 200, encode_batch_size: int = 64,
+                 mode: str = 'semantic', window: int = 3, breakpoint_std: float = 1.5,
+                 min_chunk_size: int = None, model_name: str = 'all-MiniLM-L6-v2'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown chunker mode: {mode!r}")
         self.chunk_size = chunk_size
         self.overlap = overlap
-        # Using a lightweight sentence transformer for semantic similarity
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.encode_batch_size = encode_batch_size
+        self.mode = mode
+        self.window = max(1, window)
+        self.breakpoint_std = breakpoint_std
+        self.min_chunk_size = chunk_size // 4 if min_chunk_size is None else min_chunk_size
+        self.model_name = model_name
+        self._sentence_model = None
+    
+    @property
+    def sentence_model(self):
+        """The sentence transformer, loaded on first use ('semantic' mode only)."""
+        if self._sentence_model is None:
+            from sentence_transformers import SentenceTransformer
+            # Using a lightweight sentence transformer for semantic similarity
+            self._sentence_model = SentenceTransformer(self.model_name)
+        return self._sentence_model
         
     def split_into_sentences(self, text: str) -> List[str]:
         """Split text into sentences using regex."""
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = SENTENCE_END.split(text)
         return [s.strip() for s in sentences if s.strip()]
     
-    def semantic_chunk(self, text: str) -> List[str]:
-        """Create semantic chunks based on sentence similarity."""
-        sentences = self.split_into_sentences(text)
+    def iter_sentences(self, pages: Iterable[str]) -> Iterator[str]:
+        """Sentences of a stream of page texts, split as ``split_into_sentences`` splits their concatenation.
+        
+        Only the unfinished sentence at the end of a page is carried over, so
+        each page is scanned once however long a sentence runs.
+        """
+        tail = []        # pieces of the sentence still open at the end of the last page
+        last_char = ''   # lookbehind context for a boundary right at the page start
+        for page in pages:
+            if not page:
+                continue
+            pieces = SENTENCE_END.split(last_char + page)
+            pieces[0] = pieces[0][len(last_char):]
+            last_char = page[-1]
+            if len(pieces) == 1:
+                tail.append(pieces[0])
+                continue
+            pieces[0] = ''.join(tail) + pieces[0]
+            tail = [pieces.pop()]
+            for sentence in pieces:
+                sentence = sentence.strip()
+                if sentence:
+                    yield sentence
+        sentence = ''.join(tail).strip()
+        if sentence:
+            yield sentence
+    
+    # ── Sentence vectors and boundary scores ──
+    
+    def _hashed_vectors(self, sentences: List[str]) -> np.ndarray:
+        """Term counts of words of 3+ letters, hashed into ``HASH_DIM`` buckets."""
+        rows, cols = [], []
+        for i, sentence in enumerate(sentences):
+            for word in re.findall(r'\w{3,}', sentence.lower()):
+                rows.append(i)
+                cols.append(zlib.crc32(word.encode('utf-8')) % self.HASH_DIM)
+        flat = np.asarray(rows, dtype=np.int64) * self.HASH_DIM + np.asarray(cols, dtype=np.int64)
+        counts = np.bincount(flat, minlength=len(sentences) * self.HASH_DIM)
+        return counts.reshape(len(sentences), self.HASH_DIM).astype(np.float32)
+    
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        """L2-normalized sentence vectors for the chunker's mode (``None`` in 'length' mode)."""
+        if self.mode == 'length':
+            return None
+        if self.mode == 'fast':
+            vectors = self._hashed_vectors(sentences)
+        else:
+            vectors = np.asarray(self.sentence_model.encode(sentences, batch_size=self.encode_batch_size),
+                                 dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+    
+    def _boundary_scores(self, vectors: np.ndarray, start: int, stop: int, first: bool) -> np.ndarray:
+        """Window similarity of the boundaries before sentences ``start..stop-1`` of ``vectors``.
+        
+        Window sums come from one cumulative sum, so every boundary costs O(dim).
+        ``first`` marks ``vectors[0]`` as the document's first sentence (score 1).
+        """
+        w = self.window
+        csum = np.vstack([np.zeros((1, vectors.shape[1]), dtype=np.float64), np.cumsum(vectors, axis=0)])
+        b = np.arange(start, stop)
+        left = csum[b] - csum[np.maximum(b - w, 0)]
+        right = csum[np.minimum(b + w, len(vectors))] - csum[b]
+        norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = np.einsum('ij,ij->i', left, right) / norms
+        scores = np.where(norms > 0, scores, 1.0)
+        if first and start == 0:
+            scores[0] = 1.0
+        return scores
+    
+    def _scored(self, sentences: Iterable[str]) -> Iterator[Tuple[str, float]]:
+        """(sentence, score of the boundary before it), encoding ``encode_batch_size`` sentences per call.
+        
+        A boundary needs ``window`` sentences of lookahead, so the last
+        ``window`` sentences of a batch are scored with the next one; the
+        buffer keeps ``window`` sentences of context behind them.
+        """
+        if self.mode == 'length':
+            for sentence in sentences:
+                yield sentence, None
+            return
+        w = self.window
+        buffer, vectors = [], None
+        start, first = 0, True     # buffer index of the first unscored sentence
+        for batch in batched(sentences, self.encode_batch_size):
+            encoded = self.encode(batch)
+            buffer.extend(batch)
+            vectors = encoded if vectors is None else np.vstack([vectors, encoded])
+            ready = len(buffer) - w
+            if ready > start:
+                scores = self._boundary_scores(vectors, start, ready, first)
+                yield from zip(buffer[start:ready], scores.tolist())
+                first = False
+                keep = max(0, ready - w)
+                buffer, vectors, start = buffer[keep:], vectors[keep:], ready - keep
+        if len(buffer) > start:
+            scores = self._boundary_scores(vectors, start, len(buffer), first)
+            yield from zip(buffer[start:], scores.tolist())
+    
+    # ── Chunking ──
+    
+    def semantic_chunk(self, text: str, sentences: List[str] = None,
+                       sentence_embeddings: np.ndarray = None) -> List[str]:
+        """Create semantic chunks based on sentence similarity.
+        
+        ``sentences`` / ``sentence_embeddings`` (normalized, as from ``encode``)
+        may be passed in when they were computed already (see ``chunk_documents``).
+        """
+        if sentences is None:
+            sentences = self.split_into_sentences(text)
         if len(sentences) <= 1:
             return [text]
+        if sentence_embeddings is None:
+            return list(self._pack(self._scored(sentences)))
+        scores = self._boundary_scores(np.asarray(sentence_embeddings), 0, len(sentences), True)
+        return list(self._pack(zip(sentences, scores.tolist())))
+    
+    def chunk_pages(self, pages: Iterable[str]) -> Iterator[str]:
+        """Chunk a document from its pages, yielding each chunk once it is complete.
         
-        # Get sentence embeddings
-        sentence_embeddings = self.sentence_model.encode(sentences)
+        The document text is the concatenation of ``pages``; they are consumed
+        lazily, so that text is never built. As in ``semantic_chunk``, a
+        single-sentence document comes back as-is.
+        """
+        raw = {'pages': []}  # kept only until a second sentence shows up
         
-        chunks = []
-        current_chunk = []
+        def recorded():
+            for page in pages:
+                if raw['pages'] is not None:
+                    raw['pages'].append(page)
+                yield page
+        
+        sentences = self.iter_sentences(recorded())
+        first = list(islice(sentences, 2))
+        if len(first) < 2:
+            if first:
+                yield ''.join(raw['pages'])
+            return
+        raw['pages'] = None
+        yield from self._pack(self._scored(chain(first, sentences)))
+    
+    def _pack(self, scored: Iterable[Tuple[str, Optional[float]]]) -> Iterator[str]:
+        """Pack (sentence, boundary score) pairs into chunks of at most ``chunk_size`` characters."""
+        current_chunk, scores = [], []   # scores[i]: boundary before current_chunk[i]
         current_length = 0
+        n_scores, mean, m2 = 0, 0.0, 0.0  # running boundary-score statistics (Welford)
+        dip = None         # index of the lowest boundary of a similarity drop still going down
+        last_score = None
         
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i]
+        for sentence, score in scored:
             sentence_length = len(sentence)
+            if score is not None:
+                n_scores += 1
+                delta = score - mean
+                mean += delta / n_scores
+                m2 += delta * (score - mean)
             
-            # If adding this sentence would exceed chunk size
+            # Semantic break: once a drop bottoms out, cut at its lowest boundary
+            if dip is not None and score >= scores[dip]:
+                yield ' '.join(current_chunk[:dip])
+                current_chunk, scores = self._carry_over(current_chunk, scores, dip)
+                current_length = sum(len(s) for s in current_chunk)
+                dip = None
+            
+            # A drop starts where similarity falls well below what this document usually shows
+            if dip is not None:
+                dip = len(current_chunk)
+            elif (score is not None and current_chunk and n_scores >= 2 * self.window
+                    and current_length >= self.min_chunk_size
+                    and (last_score is None or score < last_score)
+                    and score < mean - self.breakpoint_std * np.sqrt(m2 / n_scores)):
+                dip = len(current_chunk)
+            last_score = score
+            
+            # Size break: cut at the weakest boundary that leaves a big enough chunk
             if current_length + sentence_length > self.chunk_size and current_chunk:
-                # Find the best breaking point using semantic similarity
-                chunk_text = ' '.join(current_chunk)
-                chunks.append(chunk_text)
+                cut = self._weakest_boundary(current_chunk, scores)
+                carried = cut < len(current_chunk)
+                yield ' '.join(current_chunk[:cut])
                 
                 # Create overlap by including some previous sentences
-                overlap_sentences = self._get_overlap_sentences(current_chunk)
-                current_chunk = overlap_sentences
+                current_chunk, scores = self._carry_over(current_chunk, scores, cut)
                 current_length = sum(len(s) for s in current_chunk)
+                if carried and current_length + sentence_length > self.chunk_size:
+                    # The carried-over sentences don't leave room: fall back to a plain cut
+                    yield ' '.join(current_chunk)
+                    current_chunk, scores = self._carry_over(current_chunk, scores, len(current_chunk))
+                    current_length = sum(len(s) for s in current_chunk)
+                dip = None
             
             current_chunk.append(sentence)
+            scores.append(float('inf') if score is None else score)
             current_length += sentence_length
-            i += 1
+        
+        # The document ended inside a drop: cut at its lowest boundary so far
+        if dip is not None:
+            yield ' '.join(current_chunk[:dip])
+            current_chunk, scores = self._carry_over(current_chunk, scores, dip)
         
         # Add the last chunk if it exists
         if current_chunk:
-            chunks.append(' '.join(current_chunk))
+            yield ' '.join(current_chunk)
+    
+    def _carry_over(self, sentences: List[str], scores: List[float], cut: int) -> Tuple[List[str], List[float]]:
+        """The start of the next chunk after cutting at ``cut``: overlap sentences, then those past the cut."""
+        overlap = self._get_overlap_sentences(sentences[:cut])
+        return overlap + sentences[cut:], [float('inf')] * len(overlap) + scores[cut:]
+    
+    def _weakest_boundary(self, sentences: List[str], scores: List[float]) -> int:
+        """Index to cut ``sentences`` at: the lowest-scoring boundary past ``min_chunk_size`` (else the end)."""
+        lengths = np.cumsum([len(s) for s in sentences])
+        candidates = np.nonzero(lengths[:-1] >= self.min_chunk_size)[0] + 1
+        if not len(candidates):
+            return len(sentences)
+        candidate_scores = np.asarray(scores)[candidates]
+        if not np.isfinite(candidate_scores).any():
+            return len(sentences)
+        return int(candidates[np.argmin(candidate_scores)])
+    
+    def chunk_documents(self, texts: List[str]) -> List[List[str]]:
+        """Chunk several documents, encoding all of their sentences in one batched call."""
+        split = [self.split_into_sentences(text) for text in texts]
+        flat = [s for sentences in split if len(sentences) > 1 for s in sentences]
+        embeddings = self.encode(flat) if flat and self.mode != 'length' else None
         
-        return chunks
+        results, offset = [], 0
+        for text, sentences in zip(texts, split):
+            if len(sentences) <= 1:
+                results.append([text])
+                continue
+            doc_embeddings = None if embeddings is None else embeddings[offset:offset + len(sentences)]
+            offset += len(sentences)
+            results.append(self.semantic_chunk(text, sentences, doc_embeddings))
+        return results
     
     def _get_overlap_sentences(self, sentences: List[str]) -> List[str]:
         """Get sentences for overlap based on the overlap size."""
@@ -88,57 +335,164 @@ class SemanticChunker:
 class OllamaEmbedder:
     """Handles embedding generation using Ollama API."""
     
-    def __init__(self, model_name: str = "nomic-embed-text", base_url: str = "http://localhost:11434"):
+    def __init__(self, model_name: str = "nomic-embed-text", base_url: str = "http://localhost:11434",
+                 batch_size: int = 16, max_workers: int = 4, cache_dir: str = DEFAULT_CACHE_DIR):
         self.model_name = model_name
         self.base_url = base_url
+        # Pass cache_dir=None to always hit Ollama
+        cache = get_embedding_cache(model_name, cache_dir) if cache_dir else None
+        self.engine = BatchEmbeddingEngine(model_name, base_url,
+                                           batch_size=batch_size, max_workers=max_workers, cache=cache)
         
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text using Ollama."""
-        try:
-            response = requests.post(
-                f"{self.base_url}/api/embeddings",
-                json={
-                    "model": self.model_name,
-                    "prompt": text
-                },
-                timeout=60
-            )
-            response.raise_for_status()
-            return response.json()["embedding"]
-        except requests.RequestException as e:
-            logger.error(f"Error generating embedding: {e}")
-            # Fallback to zero vector if Ollama fails
-            return [0.0] * 768  # Default embedding size
+        # Falls back to a zero vector if Ollama fails
+        return self.engine.embed_one(text)
     
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
-        embeddings = []
-        for i, text in enumerate(texts):
-            logger.info(f"Generating embedding {i+1}/{len(texts)}")
-            embedding = self.generate_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+        """Generate embeddings for multiple texts in concurrent batches, preserving order (``None`` if one failed)."""
+        return self.engine.embed(texts)
+    
+    def generate_embeddings_stream(self, batches, key=None):
+        """Embed a stream of batches with several in flight; yields ``(batch, embeddings)`` in order."""
+        return self.engine.embed_stream(batches, key)
+
+DEFAULT_PAGE_CACHE_DIR = "page_cache"
+
+class PageCache:
+    """Extracted PDF page texts on disk, keyed by file hash and page number.
+    
+    ``<cache_dir>/<file sha256>/pages.json`` holds the page count and
+    ``<page>.txt`` the text of each extracted page. Files are written via a
+    temp file and rename, so extraction workers in several processes can fill
+    the same cache.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_PAGE_CACHE_DIR):
+        self.path = Path(cache_dir)
+    
+    def _write(self, path: Path, text: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding='utf-8')
+        os.replace(tmp, path)
+    
+    def page_count(self, digest: str) -> Optional[int]:
+        try:
+            return json.loads((self.path / digest / "pages.json").read_text())['pages']
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def set_page_count(self, digest: str, pages: int):
+        self._write(self.path / digest / "pages.json", json.dumps({'pages': pages}))
+    
+    def get(self, digest: str, page: int) -> Optional[str]:
+        try:
+            return (self.path / digest / f"{page}.txt").read_text(encoding='utf-8')
+        except OSError:
+            return None
+    
+    def put(self, digest: str, page: int, text: str):
+        self._write(self.path / digest / f"{page}.txt", text)
+
+def extract_pages(task: Tuple) -> List[str]:
+    """Text of one extraction task: pages [start, stop) of a PDF, or a CSV's text as one page.
+    
+    Module-level so it can run in a process pool. PDF pages already in the
+    page cache are read from it; newly extracted pages are added to it.
+    """
+    kind, path, digest, start, stop, cache_dir = task
+    if kind == 'csv':
+        return [DocumentProcessor.process_csv(Path(path))]
+    cache = PageCache(cache_dir) if cache_dir else None
+    pages = [cache.get(digest, i) if cache else None for i in range(start, stop)]
+    if all(page is not None for page in pages):
+        return pages
+    try:
+        with open(path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for i, page in enumerate(pages):
+                if page is None:
+                    pages[i] = pdf_reader.pages[start + i].extract_text() or ""
+                    if cache:
+                        cache.put(digest, start + i, pages[i])
+    except Exception as e:
+        logger.error(f"Error reading pages {start}-{stop - 1} of PDF {path}: {e}")
+        pages = [page or "" for page in pages]
+    return pages
 
 class DocumentProcessor:
-    """Handles processing of PDF and CSV files."""
+    """Handles processing of PDF and CSV files.
     
-    def __init__(self, source_path: str):
+    PDFs are read page by page: ``iter_page_batches`` splits every file into
+    page ranges, fans the ranges of all files out over an optional process
+    pool, and yields the page texts back in order. Opening a PDF parses its
+    whole page tree, so a file is split into at most as many ranges as there
+    are tasks in flight, and none shorter than ``pages_per_task``. Pages
+    are cached by file hash and page number (``page_cache_dir``, ``None`` to
+    disable), so re-extracting an unchanged PDF doesn't parse it again.
+    """
+    
+    def __init__(self, source_path: str, page_cache_dir: Optional[str] = DEFAULT_PAGE_CACHE_DIR,
+                 pages_per_task: int = 8):
         self.source_path = Path(source_path)
-        
-    def extract_pdf_text(self, pdf_path: Path) -> str:
-        """Extract text from PDF file."""
+        self.page_cache_dir = page_cache_dir
+        self.page_cache = PageCache(page_cache_dir) if page_cache_dir else None
+        self.pages_per_task = max(1, pages_per_task)
+    
+    def _pdf_page_count(self, pdf_path: Path, digest: str) -> int:
+        if self.page_cache:
+            count = self.page_cache.page_count(digest)
+            if count is not None:
+                return count
         try:
             with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+                count = len(PyPDF2.PdfReader(file).pages)
         except Exception as e:
             logger.error(f"Error reading PDF {pdf_path}: {e}")
-            return ""
+            return 0
+        if self.page_cache:
+            self.page_cache.set_page_count(digest, count)
+        return count
+    
+    def _extraction_tasks(self, file_path: Path, max_tasks: int) -> Iterator[Tuple]:
+        """Extraction tasks of one file; always at least one, so every file yields a batch."""
+        if file_path.suffix.lower() != '.pdf':
+            yield ('csv', str(file_path), None, 0, 1, None)
+            return
+        digest = file_hash(file_path)
+        count = self._pdf_page_count(file_path, digest)
+        size = max(self.pages_per_task, -(-count // max_tasks))
+        for start in range(0, max(count, 1), size):
+            yield ('pdf', str(file_path), digest, start, min(start + size, count), self.page_cache_dir)
+    
+    def iter_page_batches(self, items: Iterable, executor=None, key=None,
+                          window: int = None) -> Iterator[Tuple[Any, List[str]]]:
+        """Extract many files, yielding ``(item, page texts)`` batches in file and page order.
+        
+        ``key(item)`` is the file path (default: the item itself). With an
+        ``executor`` (a process pool) up to ``window`` page ranges, across file
+        boundaries, are extracted at once.
+        """
+        key = key or (lambda item: item)
+        window = 1 if executor is None else window or 2 * (os.cpu_count() or 1)
+        tasks = ((item, task) for item in items for task in self._extraction_tasks(Path(key(item)), window))
+        if executor is None:
+            return ((item, extract_pages(task)) for item, task in tasks)
+        return ((item, pages) for (item, _), pages in
+                ordered_map(executor, extract_pages, tasks, window, key=lambda pair: pair[1]))
+    
+    def iter_pdf_pages(self, pdf_path: Path, executor=None) -> Iterator[str]:
+        """Yield the text of each page of a PDF, in order."""
+        for _, pages in self.iter_page_batches([pdf_path], executor):
+            yield from pages
+    
+    def extract_pdf_text(self, pdf_path: Path, executor=None) -> str:
+        """Extract text from PDF file."""
+        return ''.join(page + "\n" for page in self.iter_pdf_pages(pdf_path, executor))
     
-    def process_csv(self, csv_path: Path) -> str:
+    @staticmethod
+    def process_csv(csv_path: Path) -> str:
         """Process CSV file and convert to text format."""
         try:
             df = pd.read_csv(csv_path)
@@ -174,60 +528,123 @@ class DocumentProcessor:
             logger.error(f"Error processing CSV {csv_path}: {e}")
             return ""
     
-    def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get all PDF and CSV documents from the source path."""
-        documents = []
-        
+    def list_source_files(self) -> List[Path]:
+        """List all PDF and CSV files in the source path."""
         if not self.source_path.exists():
             logger.error(f"Source path does not exist: {self.source_path}")
-            return documents
-        
-        # Process PDF files
-        for pdf_file in self.source_path.glob("*.pdf"):
-            logger.info(f"Processing PDF: {pdf_file.name}")
-            text = self.extract_pdf_text(pdf_file)
-            if text.strip():
-                documents.append({
-                    'filename': pdf_file.name,
-                    'file_type': 'pdf',
-                    'content': text,
-                    'path': str(pdf_file)
-                })
-        
-        # Process CSV files
-        for csv_file in self.source_path.glob("*.csv"):
-            logger.info(f"Processing CSV: {csv_file.name}")
-            text = self.process_csv(csv_file)
-            if text.strip():
-                documents.append({
-                    'filename': csv_file.name,
-                    'file_type': 'csv',
-                    'content': text,
-                    'path': str(csv_file)
-                })
-        
+            return []
+        return sorted(self.source_path.glob("*.pdf")) + sorted(self.source_path.glob("*.csv"))
+    
+    def process_file(self, file_path: Path, executor=None) -> Dict[str, Any]:
+        """Extract a single PDF or CSV file into a document dict (None if empty)."""
+        file_type = file_path.suffix.lower().lstrip('.')
+        logger.info(f"Processing {file_type.upper()}: {file_path.name}")
+        if file_type == 'pdf':
+            text = self.extract_pdf_text(file_path, executor)
+        else:
+            text = self.process_csv(file_path)
+        if not text.strip():
+            return None
+        return {
+            'filename': file_path.name,
+            'file_type': file_type,
+            'content': text,
+            'path': str(file_path)
+        }
+    
+    def get_all_documents(self, executor=None) -> List[Dict[str, Any]]:
+        """Get all PDF and CSV documents from the source path."""
+        documents = []
+        for file_path in self.list_source_files():
+            doc = self.process_file(file_path, executor)
+            if doc:
+                documents.append(doc)
         return documents
 
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's contents, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a text chunk."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
 class FAISSVectorStore:
-    """FAISS vector store for document embeddings."""
+    """FAISS vector store for document embeddings.
+    
+    Vectors live in an ``IndexIDMap2`` so chunks keep stable integer IDs and can
+    be removed individually. ``ids[i]`` is the vector ID of ``documents[i]``.
+    """
     
     def __init__(self, dimension: int = 768):
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+        self.index = self._new_index(dimension)
         self.documents = []
         self.chunks_metadata = []
+        self.ids = []
+        self.next_id = 0
+        self._id_to_pos = {}
+    
+    @staticmethod
+    def _new_index(dimension: int):
+        # Inner product over L2-normalized vectors == cosine similarity
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
     
-    def add_documents(self, chunks: List[str], embeddings: List[List[float]], metadata: List[Dict]):
-        """Add document chunks and embeddings to the vector store."""
+    @property
+    def supports_ids(self) -> bool:
+        """False for legacy stores saved as a bare IndexFlatIP."""
+        return isinstance(self.index, (faiss.IndexIDMap, faiss.IndexIDMap2))
+    
+    def _reindex_positions(self):
+        self._id_to_pos = {vid: pos for pos, vid in enumerate(self.ids)}
+    
+    def add_documents(self, chunks: List[str], embeddings: List[List[float]], metadata: List[Dict],
+                      ids: List[int] = None) -> List[int]:
+        """Add document chunks and embeddings to the vector store; returns their IDs."""
+        if not chunks:
+            return []
         # Normalize embeddings for cosine similarity
         embeddings_array = np.array(embeddings).astype('float32')
         faiss.normalize_L2(embeddings_array)
         
-        self.index.add(embeddings_array)
+        if self.index.ntotal == 0 and embeddings_array.shape[1] != self.dimension:
+            self.dimension = embeddings_array.shape[1]
+            self.index = self._new_index(self.dimension)
+        
+        if ids is None:
+            ids = list(range(self.next_id, self.next_id + len(chunks)))
+        self.next_id = max(self.next_id, max(ids) + 1)
+        
+        self.index.add_with_ids(embeddings_array, np.array(ids, dtype='int64'))
+        for vid in ids:
+            self._id_to_pos[vid] = len(self.ids)
+            self.ids.append(vid)
         self.documents.extend(chunks)
         self.chunks_metadata.extend(metadata)
         
         logger.info(f"Added {len(chunks)} chunks to vector store. Total: {self.index.ntotal}")
+        return ids
+    
+    def remove_ids(self, ids: List[int]):
+        """Remove vectors and their chunks by ID."""
+        if not ids:
+            return
+        drop = set(ids)
+        self.index.remove_ids(np.array(sorted(drop), dtype='int64'))
+        keep = [pos for pos, vid in enumerate(self.ids) if vid not in drop]
+        self.ids = [self.ids[pos] for pos in keep]
+        self.documents = [self.documents[pos] for pos in keep]
+        self.chunks_metadata = [self.chunks_metadata[pos] for pos in keep]
+        self._reindex_positions()
+        logger.info(f"Removed {len(drop)} chunks from vector store. Total: {self.index.ntotal}")
+    
+    def update_metadata(self, vid: int, metadata: Dict):
+        """Replace the metadata of an existing chunk."""
+        self.chunks_metadata[self._id_to_pos[vid]] = metadata
     
     def search(self, query_embedding: List[float], k: int = 5) -> List[Dict]:
         """Search for similar documents."""
@@ -237,13 +654,14 @@ class FAISSVectorStore:
         scores, indices = self.index.search(query_array, k)
         
         results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < len(self.documents):
+        for i, (score, vid) in enumerate(zip(scores[0], indices[0])):
+            pos = self._id_to_pos.get(int(vid))
+            if pos is not None:
                 results.append({
                     'rank': i + 1,
                     'score': float(score),
-                    'content': self.documents[idx],
-                    'metadata': self.chunks_metadata[idx]
+                    'content': self.documents[pos],
+                    'metadata': self.chunks_metadata[pos]
                 })
         
         return results
@@ -256,7 +674,9 @@ class FAISSVectorStore:
             pickle.dump({
                 'documents': self.documents,
                 'chunks_metadata': self.chunks_metadata,
-                'dimension': self.dimension
+                'dimension': self.dimension,
+                'ids': self.ids,
+                'next_id': self.next_id
             }, f)
         
         logger.info(f"Vector store saved to {index_path} and {metadata_path}")
@@ -270,72 +690,244 @@ class FAISSVectorStore:
             self.documents = data['documents']
             self.chunks_metadata = data['chunks_metadata']
             self.dimension = data['dimension']
+            # Legacy stores have no IDs: vector IDs are positions
+            self.ids = data.get('ids', list(range(len(self.documents))))
+            self.next_id = data.get('next_id', len(self.ids))
+        self._reindex_positions()
         
         logger.info(f"Vector store loaded from {index_path} and {metadata_path}")
 
 class DocumentIndexer:
-    """Main class to orchestrate the indexing process."""
+    """Main class to orchestrate the indexing process.
+    
+    ``create_index`` streams the corpus through a staged pipeline (see
+    ``ingestion_pipeline``), every stage in its own thread behind a bounded
+    queue, so parsing, chunking, embedding and indexing overlap and only a few
+    pages' worth of text is in flight at once:
     
-    def __init__(self, source_path: str, chunk_size: int = 2000, overlap: int = 200):
+    - source:  lists the files, skipping unchanged ones (size/mtime, then hash)
+    - extract: parses PDF page ranges of all files (and CSVs) in a pool of
+               ``extract_workers`` processes, through the page cache
+    - chunk:   chunks each file as its pages arrive (``chunk_mode``, see
+               ``SemanticChunker``); chunks whose text is already indexed
+               keep their vector
+    - embed:   Ollama batches of ``embed_batch_size`` with ``embed_workers``
+               requests in flight
+    - add:     appends each embedded batch to the FAISS index as it arrives
+    
+    Per-stage throughput and backpressure are logged when a run finishes and
+    kept in ``last_stats``.
+    """
+    
+    MANIFEST_VERSION = 1
+    
+    def __init__(self, source_path: str, chunk_size: int = 2000, overlap: int = 200,
+                 embed_batch_size: int = 16, embed_workers: int = 4,
+                 extract_workers: int = None, queue_size: int = 8,
+                 page_cache_dir: Optional[str] = DEFAULT_PAGE_CACHE_DIR, chunk_mode: str = 'semantic'):
         self.source_path = source_path
-        self.doc_processor = DocumentProcessor(source_path)
-        self.chunker = SemanticChunker(chunk_size, overlap)
-        self.embedder = OllamaEmbedder()
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.chunk_mode = chunk_mode
+        self.embed_batch_size = embed_batch_size
+        self.extract_workers = extract_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.doc_processor = DocumentProcessor(source_path, page_cache_dir)
+        self.chunker = SemanticChunker(chunk_size, overlap, mode=chunk_mode)
+        self.embedder = OllamaEmbedder(batch_size=embed_batch_size, max_workers=embed_workers)
         self.vector_store = FAISSVectorStore()
+        self.last_stats = []
+    
+    def _chunk_metadata(self, file_path: Path, chunks: List[str]) -> List[Dict]:
+        """Per-chunk metadata for a chunked file."""
+        logger.info(f"Created {len(chunks)} chunks from {file_path.name}")
+        metadata = [{
+            'filename': file_path.name,
+            'file_type': file_path.suffix.lower().lstrip('.'),
+            'chunk_index': i,
+            'total_chunks': len(chunks),
+            'path': str(file_path),
+            'chunk_length': len(chunk)
+        } for i, chunk in enumerate(chunks)]
+        return metadata
     
-    def create_index(self, output_dir: str = "vector_store"):
-        """Create the complete vector store index."""
+    def _load_manifest(self, output_path: Path) -> Dict[str, Any]:
+        """Load the manifest and existing store if they match the current settings."""
+        manifest_path = output_path / "manifest.json"
+        index_path = output_path / "faiss_index.bin"
+        metadata_path = output_path / "metadata.pkl"
+        if not (manifest_path.exists() and index_path.exists() and metadata_path.exists()):
+            return None
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        settings = {'version': self.MANIFEST_VERSION, 'embedding_model': self.embedder.model_name,
+                    'chunk_size': self.chunk_size, 'overlap': self.overlap, 'chunk_mode': self.chunk_mode}
+        if any(manifest.get(key) != value for key, value in settings.items()):
+            logger.info("Index settings changed since last run; rebuilding from scratch")
+            return None
+        self.vector_store.load(str(index_path), str(metadata_path))
+        if not self.vector_store.supports_ids:
+            logger.info("Existing index has no vector IDs; rebuilding from scratch")
+            self.vector_store = FAISSVectorStore()
+            return None
+        return manifest
+    
+    def _save(self, output_path: Path, files: Dict[str, Any]):
+        """Save the vector store and manifest."""
+        index_path = output_path / "faiss_index.bin"
+        metadata_path = output_path / "metadata.pkl"
+        self.vector_store.save(str(index_path), str(metadata_path))
+        manifest = {
+            'version': self.MANIFEST_VERSION,
+            'embedding_model': self.embedder.model_name,
+            'chunk_size': self.chunk_size,
+            'overlap': self.overlap,
+            'chunk_mode': self.chunk_mode,
+            'files': files
+        }
+        tmp_path = output_path / "manifest.json.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, output_path / "manifest.json")
+    
+    def create_index(self, output_dir: str = "vector_store", incremental: bool = False):
+        """Create the complete vector store index.
+        
+        With ``incremental=True`` an existing store in ``output_dir`` is updated
+        in place: unchanged files (by content hash) are skipped, deleted files
+        have their vectors removed, and for changed files only chunks whose text
+        hash is new are embedded.
+        """
         logger.info("Starting document indexing process...")
         
         # Create output directory
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         
-        # Get all documents
-        documents = self.doc_processor.get_all_documents()
-        if not documents:
+        manifest = self._load_manifest(output_path) if incremental else None
+        old_files = manifest['files'] if manifest else {}
+        if not manifest:
+            self.vector_store = FAISSVectorStore()
+        
+        source_files = self.doc_processor.list_source_files()
+        if not source_files and not old_files:
             logger.error("No documents found to process!")
             return
         
-        logger.info(f"Found {len(documents)} documents to process")
+        files = {}
+        removed_ids = []
+        metadata_updates = []
+        failed = defaultdict(int)  # filename -> chunks that failed to embed
         
-        all_chunks = []
-        all_metadata = []
+        # Drop vectors of files that no longer exist
+        current_names = {p.name for p in source_files}
+        for name, entry in old_files.items():
+            if name not in current_names:
+                logger.info(f"Removing deleted file {name}")
+                removed_ids.extend(c['id'] for c in entry['chunks'])
         
-        # Process each document
-        for doc in documents:
-            logger.info(f"Processing {doc['filename']}")
-            
-            # Create semantic chunks
-            chunks = self.chunker.semantic_chunk(doc['content'])
-            logger.info(f"Created {len(chunks)} chunks from {doc['filename']}")
+        def changed_files():
+            """Source stage: (path, entry, old entry) of every new or changed file."""
+            for file_path in source_files:
+                stat = file_path.stat()
+                old_entry = old_files.get(file_path.name)
+                # Size + mtime match: trust the stored hash instead of re-reading the file
+                if old_entry and (old_entry.get('size'), old_entry.get('mtime')) == (stat.st_size, stat.st_mtime):
+                    files[file_path.name] = old_entry
+                    continue
+                digest = file_hash(file_path)
+                if old_entry and old_entry['hash'] == digest:
+                    files[file_path.name] = {**old_entry, 'size': stat.st_size, 'mtime': stat.st_mtime}
+                    continue
+                entry = {'hash': digest, 'size': stat.st_size, 'mtime': stat.st_mtime, 'chunks': []}
+                files[file_path.name] = entry
+                yield file_path, entry, old_entry
+        
+        def extract(tasks):
+            """Extract page ranges of all files in the process pool; yields (task, pages) in order."""
+            yield from self.doc_processor.iter_page_batches(tasks, pool, key=lambda task: task[0],
+                                                            window=2 * self.extract_workers)
+        
+        def chunk(page_batches):
+            """Chunk each file as its pages arrive; yields each file's chunks that need embedding."""
+            for _, file_batches in groupby(page_batches, key=lambda item: item[0][0]):
+                first = next(file_batches)
+                file_path, entry, old_entry = first[0]
+                # The text process_file would build: each PDF page ends with a newline
+                end = "\n" if file_path.suffix.lower() == '.pdf' else ""
+                pages = (page + end for _, batch in chain([first], file_batches) for page in batch)
+                # total_chunks is only known at the end of the file, so its chunks are collected
+                chunks = list(self.chunker.chunk_pages(pages))
+                old_chunks = defaultdict(list)
+                for c in (old_entry['chunks'] if old_entry else []):
+                    old_chunks[c['hash']].append(c['id'])
+                pending = []
+                for chunk_text, meta in zip(chunks, self._chunk_metadata(file_path, chunks)):
+                    chunk_digest = text_hash(chunk_text)
+                    vid = old_chunks[chunk_digest].pop() if old_chunks.get(chunk_digest) else None
+                    # Unchanged chunks keep their vector; their position metadata is refreshed
+                    entry['chunks'].append({'hash': chunk_digest, 'id': vid})
+                    if vid is not None:
+                        metadata_updates.append((vid, meta))
+                    else:
+                        pending.append((chunk_text, meta, entry['chunks'][-1]))
+                removed_ids.extend(vid for vids in old_chunks.values() for vid in vids)
+                if pending:
+                    yield pending
+        
+        def embed(pending):
+            """Re-batch chunks to the embedding batch size; several batches are in flight."""
+            records = (record for doc_records in pending for record in doc_records)
+            yield from self.embedder.generate_embeddings_stream(
+                batched(records, self.embed_batch_size),
+                key=lambda batch: [text for text, _, _ in batch])
+        
+        def add(embedded):
+            """Append each embedded batch to the index and record its vector IDs.
             
-            # Create metadata for each chunk
-            for i, chunk in enumerate(chunks):
-                metadata = {
-                    'filename': doc['filename'],
-                    'file_type': doc['file_type'],
-                    'chunk_index': i,
-                    'total_chunks': len(chunks),
-                    'path': doc['path'],
-                    'chunk_length': len(chunk)
-                }
-                all_chunks.append(chunk)
-                all_metadata.append(metadata)
-        
-        logger.info(f"Total chunks to embed: {len(all_chunks)}")
-        
-        # Generate embeddings
-        logger.info("Generating embeddings...")
-        embeddings = self.embedder.generate_embeddings_batch(all_chunks)
-        
-        # Add to vector store
-        self.vector_store.add_documents(all_chunks, embeddings, all_metadata)
+            Chunks that failed to embed are kept out of the index and the
+            manifest, and their file's hash is cleared, so the next incremental
+            run chunks the file again and embeds just those chunks.
+            """
+            for batch, embeddings in embedded:
+                done = [(record, emb) for record, emb in zip(batch, embeddings) if emb is not None]
+                if done:
+                    ids = self.vector_store.add_documents([text for (text, _, _), _ in done],
+                                                          [emb for _, emb in done],
+                                                          [meta for (_, meta, _), _ in done])
+                    for vid, ((_, _, manifest_chunk), _) in zip(ids, done):
+                        manifest_chunk['id'] = vid
+                for _, meta, manifest_chunk in (r for r, emb in zip(batch, embeddings) if emb is None):
+                    entry = files[meta['filename']]
+                    entry['chunks'] = [c for c in entry['chunks'] if c is not manifest_chunk]
+                    entry.update(hash=None, size=None, mtime=None)
+                    failed[meta['filename']] += 1
+                yield batch
+        
+        pipeline = (Pipeline(changed_files(), self.queue_size)
+                    .stage('extract', extract, units=lambda item: len(item[1]))
+                    .stage('chunk', chunk, units=len)
+                    .stage('embed', embed, units=lambda item: len(item[0]))
+                    .stage('add', add, units=len))
+        with ProcessPoolExecutor(max_workers=self.extract_workers) as pool:
+            # Fork the workers now, before the stage threads exist
+            pool.submit(os.getpid).result()
+            self.last_stats = pipeline.run()
+        logger.info("Ingestion pipeline stages:")
+        pipeline.log_stats()
+        for name, count in failed.items():
+            logger.warning(f"{count} chunks of {name} failed to embed; they will be retried on the next run")
+        
+        self.vector_store.remove_ids(removed_ids)
+        for vid, meta in metadata_updates:
+            self.vector_store.update_metadata(vid, meta)
+        
+        if manifest and files == old_files:
+            logger.info("Index is already up to date")
+            return self.vector_store
         
         # Save vector store
-        index_path = output_path / "faiss_index.bin"
-        metadata_path = output_path / "metadata.pkl"
-        self.vector_store.save(str(index_path), str(metadata_path))
+        self._save(output_path, files)
         
         logger.info("Indexing complete!")
         return self.vector_store
@@ -345,6 +937,82 @@ class DocumentIndexer:
         query_embedding = self.embedder.generate_embedding(query)
         return self.vector_store.search(query_embedding, k)
 
+def benchmark_chunkers(source_path: str, chunk_size: int = 2000, overlap: int = 200,
+                       modes: Iterable[str] = SemanticChunker.MODES,
+                       page_cache_dir: Optional[str] = DEFAULT_PAGE_CACHE_DIR) -> List[Dict[str, Any]]:
+    """Chunk the corpus in each chunker mode and compare speed and chunk coherence.
+    
+    Documents are extracted once (through the page cache) and every mode
+    chunks the same texts. Coherence is scored with one reference encoder for
+    all modes (the sentence transformer if it is installed, else hashed
+    vectors): ``coherence`` is the mean similarity of adjacent sentences within
+    a chunk, ``boundary_similarity`` that of the two sentences either side of
+    a chunk boundary. Higher coherence and lower boundary similarity mean the
+    chunks follow topic shifts; overlap is excluded from both.
+    """
+    documents = DocumentProcessor(source_path, page_cache_dir).get_all_documents()
+    texts = [doc['content'] for doc in documents]
+    try:
+        import sentence_transformers  # noqa: F401
+        reference = SemanticChunker(chunk_size, overlap, mode='semantic')
+    except ImportError:
+        reference = SemanticChunker(chunk_size, overlap, mode='fast')
+    
+    results = []
+    for mode in modes:
+        chunker = SemanticChunker(chunk_size, overlap, mode=mode)
+        start = time.perf_counter()
+        if mode == 'semantic':
+            chunker.sentence_model
+        load_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        chunked = [list(chunker.chunk_pages([text])) for text in texts]
+        chunk_s = time.perf_counter() - start
+        
+        within, across = [], []
+        for chunks in chunked:
+            # Each chunk's own sentences, with the overlap carried in from the previous chunk dropped
+            owned, previous = [], []
+            for chunk in chunks:
+                sentences = chunker.split_into_sentences(chunk)
+                carried = chunker._get_overlap_sentences(previous)
+                if carried and sentences[:len(carried)] == carried and len(sentences) > len(carried):
+                    owned.append(sentences[len(carried):])
+                else:
+                    owned.append(sentences)
+                previous = sentences
+            flat = [s for sentences in owned for s in sentences]
+            if len(flat) < 2:
+                continue
+            vectors = reference.encode(flat)
+            similarity = np.einsum('ij,ij->i', vectors[:-1], vectors[1:])
+            ends = set(np.cumsum([len(sentences) for sentences in owned])[:-1] - 1)
+            for i, value in enumerate(similarity.tolist()):
+                (across if i in ends else within).append(value)
+        
+        n_sentences = sum(len(chunker.split_into_sentences(text)) for text in texts)
+        n_chunks = sum(len(chunks) for chunks in chunked)
+        results.append({
+            'mode': mode,
+            'load_s': round(load_s, 3),
+            'chunk_s': round(chunk_s, 3),
+            'sentences_per_s': round(n_sentences / chunk_s, 1) if chunk_s > 0 else 0.0,
+            'chunks': n_chunks,
+            'mean_chunk_chars': round(np.mean([len(c) for chunks in chunked for c in chunks]), 1) if n_chunks else 0.0,
+            'coherence': round(float(np.mean(within)), 4) if within else float('nan'),
+            'boundary_similarity': round(float(np.mean(across)), 4) if across else float('nan'),
+        })
+    
+    print(f"\nChunker benchmark: {len(texts)} documents, coherence scored with '{reference.mode}' vectors")
+    print(f"{'mode':<10} {'load s':>7} {'chunk s':>8} {'sent/s':>9} {'chunks':>7} {'mean len':>9} "
+          f"{'coherence':>10} {'boundary':>9}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['load_s']:>7.2f} {r['chunk_s']:>8.2f} {r['sentences_per_s']:>9.1f} "
+              f"{r['chunks']:>7} {r['mean_chunk_chars']:>9.1f} {r['coherence']:>10.4f} "
+              f"{r['boundary_similarity']:>9.4f}")
+    return results
+
 def main():
     """Main function to run the indexing process."""
     # Configuration
@@ -352,13 +1020,26 @@ def main():
     CHUNK_SIZE = 2000
     OVERLAP = 200
     OUTPUT_DIR = "agricultural_vector_store"
+    EMBED_BATCH_SIZE = 16
+    EMBED_WORKERS = 4
+    EXTRACT_WORKERS = None  # PDF/CSV parsing processes (default: CPU count)
+    PAGE_CACHE_DIR = "page_cache"  # extracted PDF pages by file hash + page number
+    QUEUE_SIZE = 8
+    CHUNK_MODE = "semantic"  # 'semantic', 'fast' (no sentence transformer) or 'length'
+    INCREMENTAL = "--full" not in sys.argv
+    
+    if "--benchmark-chunkers" in sys.argv:
+        benchmark_chunkers(SOURCE_PATH, CHUNK_SIZE, OVERLAP, page_cache_dir=PAGE_CACHE_DIR)
+        return
     
     # Create indexer
-    indexer = DocumentIndexer(SOURCE_PATH, CHUNK_SIZE, OVERLAP)
+    indexer = DocumentIndexer(SOURCE_PATH, CHUNK_SIZE, OVERLAP, EMBED_BATCH_SIZE, EMBED_WORKERS,
+                              extract_workers=EXTRACT_WORKERS, queue_size=QUEUE_SIZE,
+                              page_cache_dir=PAGE_CACHE_DIR, chunk_mode=CHUNK_MODE)
     
     try:
         # Create the vector store
-        vector_store = indexer.create_index(OUTPUT_DIR)
+        vector_store = indexer.create_index(OUTPUT_DIR, incremental=INCREMENTAL)
         
         # Example search
         if vector_store and vector_store.index.ntotal > 0:
@@ -3,7 +3,8 @@ KrishiSakhiAI — FastAPI Backend Server
 Replaces Streamlit; serves HTML/CSS/JS frontend + REST API
 """
 
-import os, sys, json, base64, requests, pickle, numpy as np, pandas as pd
+import os, sys, json, base64, pickle, numpy as np, pandas as pd
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Dict, List, Optional
 from fastapi import FastAPI, UploadFile, File, HTTPException
@@ -11,6 +12,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import httpx
 import uvicorn
 
 # ── Project imports ──
@@ -18,13 +20,26 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
     from livestock_biosecurity.models import load_models as load_livestock_models, HEALTH_LABELS
     from livestock_biosecurity.cv_module import GaitAnalyzer, BehaviorAnalyzer
+    from livestock_biosecurity.batch_inference import score_herd, to_scan_rows, stream_scan_events, scan_readings
+    from livestock_biosecurity.micro_batching import MicroBatcher
+    from livestock_biosecurity.alert_system import BiosecurityAlertSystem
+    from livestock_biosecurity.alert_db import SQLiteAlertStore
     LIVESTOCK_AVAILABLE = True
 except ImportError:
     LIVESTOCK_AVAILABLE = False
 
+from ollama_client import AsyncOllamaClient
+
 # ── Config ──
 OLLAMA_URL = "http://localhost:11434"
+ollama = AsyncOllamaClient(OLLAMA_URL)
 VECTOR_STORE_DIR = "vector_store"
+LIVESTOCK_BACKEND = "compiled"  # or "sklearn"
+LIVESTOCK_TIER = "full"  # or "fast" (distilled disease forecaster, see train_livestock_models.py)
+# /api/livestock/scan micro-batching: wait up to this long / this many readings per batch
+SCAN_BATCH_WINDOW_MS = 5.0
+SCAN_BATCH_MAX_ROWS = 64
+ALERT_DB_PATH = "alerts.db"  # shared by all workers and the Streamlit dashboard
 
 # ══════════════════════════════════════════
 # CROP & DISEASE DATA (same as Streamlit)
@@ -134,11 +149,29 @@ VET_RESOURCES = [
 livestock_models = None
 if LIVESTOCK_AVAILABLE:
     try:
-        livestock_models = load_livestock_models('trained_models')
+        livestock_models = load_livestock_models('trained_models', backend=LIVESTOCK_BACKEND, tier=LIVESTOCK_TIER)
         print(f"   ✅ Loaded {len(livestock_models)} livestock ML models")
     except Exception as e:
         print(f"   ⚠️ Could not load models: {e}")
 
+# ── Biosecurity alerts (SQLite, shared across workers) ──
+alert_system = None
+if LIVESTOCK_AVAILABLE:
+    try:
+        alert_system = BiosecurityAlertSystem(store=SQLiteAlertStore(ALERT_DB_PATH))
+    except Exception as e:
+        print(f"   ⚠️ Alert store not available: {e}")
+
+# Concurrent single-reading scans share one batched inference (and one alert write);
+# the CV analyzers live as long as the server so per-animal trends accumulate
+scan_batcher = None
+if livestock_models:
+    gait_analyzer, behavior_analyzer = GaitAnalyzer(), BehaviorAnalyzer()
+    scan_batcher = MicroBatcher(lambda readings: scan_readings(livestock_models, readings, alert_system=alert_system,
+                                                               gait_analyzer=gait_analyzer,
+                                                               behavior_analyzer=behavior_analyzer),
+                                max_batch_rows=SCAN_BATCH_MAX_ROWS, max_wait_ms=SCAN_BATCH_WINDOW_MS)
+
 # ── Vector Store (simple) ──
 vector_store_data = None
 try:
@@ -158,7 +191,16 @@ except Exception as e:
 # ══════════════════════════════════════════
 # FASTAPI APP
 # ══════════════════════════════════════════
-app = FastAPI(title="KrishiSakhiAI", version="2.0")
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    if scan_batcher:
+        await scan_batcher.aclose()
+    if alert_system:
+        alert_system.store.close()
+    await ollama.aclose()
+
+app = FastAPI(title="KrishiSakhiAI", version="2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -197,6 +239,7 @@ LANG_INSTRUCTIONS = {
 }
 
 class LivestockReading(BaseModel):
+    animal_id: Optional[str] = None  # set to raise/track alerts for this animal
     body_temp: float = 38.8
     heart_rate: int = 60
     respiratory_rate: int = 22
@@ -225,11 +268,7 @@ async def serve_index():
 
 @app.get("/api/health")
 async def health():
-    ollama_ok = False
-    try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=3)
-        ollama_ok = r.status_code == 200
-    except: pass
+    ollama_ok = await ollama.is_up(timeout=3)
     return {
         "status": "ok",
         "ollama": ollama_ok,
@@ -240,9 +279,7 @@ async def health():
 @app.get("/api/models")
 async def get_models():
     try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        if r.status_code == 200:
-            return {"models": [m["name"] for m in r.json().get("models", [])]}
+        return {"models": [m["name"] for m in await ollama.tags(timeout=5)]}
     except: pass
     return {"models": []}
 
@@ -333,23 +370,16 @@ async def chat(req: ChatRequest):
         messages.append(msg)
     messages.append({"role": "user", "content": req.message})
 
-    def stream():
+    async def stream():
+        # Cancelled by Starlette on client disconnect, which also closes the Ollama stream
         try:
-            resp = requests.post(
-                f"{OLLAMA_URL}/api/chat",
-                json={"model": req.model, "messages": messages, "stream": True,
-                      "options": {"temperature": req.temperature}},
-                stream=True, timeout=120
-            )
-            for line in resp.iter_lines():
-                if line:
-                    data = json.loads(line)
-                    token = data.get("message", {}).get("content", "")
-                    if token:
-                        yield f"data: {json.dumps({'token': token})}\n\n"
-                    if data.get("done"):
-                        yield f"data: {json.dumps({'done': True})}\n\n"
-                        break
+            async for data in ollama.chat_stream(req.model, messages, {"temperature": req.temperature},
+                                                 timeout=120):
+                token = data.get("message", {}).get("content", "")
+                if token:
+                    yield f"data: {json.dumps({'token': token})}\n\n"
+                if data.get("done"):
+                    yield f"data: {json.dumps({'done': True})}\n\n"
         except Exception as e:
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
@@ -378,18 +408,12 @@ Provide your response in this format:
 {lang_note}"""
 
     try:
-        resp = requests.post(
-            f"{OLLAMA_URL}/api/chat",
-            json={"model": model, "messages": [{"role": "user", "content": full_question, "images": [img_b64]}],
-                  "stream": False, "options": {"temperature": 0.3}},
-            timeout=120
-        )
-        if resp.status_code == 200:
-            result = resp.json()
-            answer = result.get("message", {}).get("content", "Could not analyze the image.")
-            return {"analysis": answer, "model_used": model}
-        else:
-            return {"analysis": "⚠️ Vision model (llava) not available. Install with: ollama pull llava", "model_used": "none"}
+        result = await ollama.chat(model, [{"role": "user", "content": full_question, "images": [img_b64]}],
+                                   {"temperature": 0.3}, timeout=120)
+        answer = result.get("message", {}).get("content", "Could not analyze the image.")
+        return {"analysis": answer, "model_used": model}
+    except httpx.HTTPStatusError:
+        return {"analysis": "⚠️ Vision model (llava) not available. Install with: ollama pull llava", "model_used": "none"}
     except Exception as e:
         raise HTTPException(500, f"Image analysis failed: {str(e)}")
 
@@ -403,52 +427,79 @@ async def livestock_scan(reading: LivestockReading):
     rd = reading.model_dump()
     rd['thi_index'] = round(0.8 * rd['ambient_temp'] + rd['humidity_pct'] / 100 * (rd['ambient_temp'] - 14.4) + 46.4, 1)
 
-    health = livestock_models['health_predictor'].predict(rd)
-    anomaly = livestock_models['anomaly_detector'].predict(rd)
-    gait = livestock_models['gait_predictor'].predict(rd)
-    disease = livestock_models['disease_forecaster'].predict(rd)
+    # Batched with other in-flight scans: models + analyzers run once per batch
+    result = await scan_batcher.submit(rd)
+    return {**result, "reading": rd}
 
-    gait_analyzer = GaitAnalyzer()
-    gait_cv = gait_analyzer.analyze_gait(rd)
-    behavior_analyzer = BehaviorAnalyzer()
-    behavior = behavior_analyzer.analyze_behavior(rd)
-
-    return {
-        "health": health,
-        "anomaly": anomaly,
-        "gait": gait,
-        "disease": disease,
-        "gait_cv": gait_cv,
-        "behavior": behavior,
-        "reading": rd,
-    }
+@app.get("/api/livestock/scan/stats")
+async def livestock_scan_stats():
+    """Micro-batching metrics: batch size histogram, queue delay, batch run time."""
+    if not scan_batcher:
+        raise HTTPException(503, "Livestock models not loaded")
+    return scan_batcher.stats()
+
+# ── Biosecurity Alerts ──
+def _require_alerts():
+    if not alert_system:
+        raise HTTPException(503, "Alert store not available")
+    return alert_system
+
+@app.get("/api/alerts")
+def list_alerts(severity: Optional[str] = None, category: Optional[str] = None, limit: int = 50, offset: int = 0):
+    """Active alerts, highest severity first, one page at a time."""
+    limit, offset = min(max(limit, 1), 500), max(offset, 0)
+    alerts = _require_alerts().get_active_alerts(severity=severity, category=category, limit=limit, offset=offset)
+    return {"alerts": alerts, "limit": limit, "offset": offset}
+
+@app.get("/api/alerts/summary")
+def alerts_summary():
+    return _require_alerts().get_alert_summary()
+
+@app.get("/api/alerts/history")
+def alerts_history(animal_id: Optional[str] = None, since: Optional[str] = None, limit: int = 50, offset: int = 0):
+    """Alerts of any status, newest first; ``since`` is an ISO timestamp."""
+    limit, offset = min(max(limit, 1), 500), max(offset, 0)
+    alerts = _require_alerts().get_alert_history(animal_id=animal_id, since=since, limit=limit, offset=offset)
+    return {"alerts": alerts, "limit": limit, "offset": offset}
+
+@app.post("/api/alerts/{alert_id}/acknowledge")
+def acknowledge_alert(alert_id: str):
+    if not _require_alerts().acknowledge_alert(alert_id):
+        raise HTTPException(404, f"Unknown alert {alert_id}")
+    return {"alert_id": alert_id, "acknowledged": True}
+
+@app.post("/api/alerts/{alert_id}/resolve")
+def resolve_alert(alert_id: str, note: str = ""):
+    if not _require_alerts().resolve_alert(alert_id, resolution_note=note):
+        raise HTTPException(404, f"Unknown alert {alert_id}")
+    return {"alert_id": alert_id, "status": "RESOLVED"}
 
 @app.post("/api/livestock/scan-csv")
-async def livestock_scan_csv(file: UploadFile = File(...)):
+def livestock_scan_csv(file: UploadFile = File(...)):
+    # Plain def: parsing and scoring run in the threadpool, off the event loop
     if not livestock_models:
         raise HTTPException(503, "Livestock models not loaded")
     try:
         df = pd.read_csv(file.file)
-        results = []
-        for idx, row in df.iterrows():
-            rd = row.to_dict()
-            h = livestock_models['health_predictor'].predict(rd)
-            d = livestock_models['disease_forecaster'].predict(rd)
-            g = livestock_models['gait_predictor'].predict(rd)
-            a = livestock_models['anomaly_detector'].predict(rd)
-            results.append({
-                'id': idx + 1,
-                'animal_id': rd.get('animal_id', f'A-{idx+1}'),
-                'health': h['status_label'],
-                'confidence': f"{h['confidence']*100:.0f}%",
-                'disease': d['predicted_disease'].replace('_', ' '),
-                'gait': f"{g['gait_score']:.1f}",
-                'anomaly': a['is_anomaly'],
-            })
+        # One vectorized inference per model over the whole upload
+        results = to_scan_rows(score_herd(livestock_models, df))
         return {"results": results, "total": len(results)}
     except Exception as e:
         raise HTTPException(400, str(e))
 
+@app.post("/api/livestock/scan-csv/stream")
+def livestock_scan_csv_stream(file: UploadFile = File(...), format: str = "ndjson", chunk_size: int = 500):
+    """Chunked scan for large herds: NDJSON (default) or SSE results + progress events."""
+    if not livestock_models:
+        raise HTTPException(503, "Livestock models not loaded")
+    fmt = "sse" if format == "sse" else "ndjson"
+    # Sync generator → Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse(
+        stream_scan_events(livestock_models, file.file, max(1, chunk_size), fmt),
+        media_type="text/event-stream" if fmt == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 # ══════════════════════════════════════════
 # RUN
@@ -0,0 +1,30 @@
+"""Shared fixtures: small livestock models trained once per test session."""
+
+import pytest
+
+from livestock_biosecurity.data_generator import LivestockDataGenerator
+from livestock_biosecurity.models import (
+    HealthPredictor, AnomalyDetector, GaitPredictor, DiseaseForecaster,
+)
+
+
+@pytest.fixture(scope='session')
+def herd_df():
+    return LivestockDataGenerator(seed=0).generate_dataset(n_animals=40, n_days=10, anomaly_rate=0.2)
+
+
+@pytest.fixture(scope='session')
+def trained_models(herd_df):
+    """The four livestock wrappers, trained on ``herd_df`` with 10-tree ensembles."""
+    models = {
+        'health_predictor': HealthPredictor(),
+        'anomaly_detector': AnomalyDetector(),
+        'gait_predictor': GaitPredictor(),
+        'disease_forecaster': DiseaseForecaster(),
+    }
+    for model in models.values():
+        model.model.set_params(n_estimators=10)
+        if hasattr(model.model, 'n_jobs'):
+            model.model.n_jobs = 1
+        model.train(herd_df)
+    return models
@@ -0,0 +1,175 @@
+import threading
+
+import pytest
+
+from livestock_biosecurity.alert_db import SQLiteAlertStore
+from livestock_biosecurity.alert_store import AlertStore
+from livestock_biosecurity.alert_system import BiosecurityAlertSystem
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def signal(system, severity='HIGH', animal='COW-1'):
+    return system.generate_alert(animal, 'HEALTH_RISK', severity, f"{severity} signal",
+                                 model_source='HealthPredictor')
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def system(request, tmp_path):
+    store = AlertStore() if request.param == 'memory' else SQLiteAlertStore(tmp_path / 'alerts.db')
+    return BiosecurityAlertSystem(store=store, clock=FakeClock())
+
+
+def test_repeats_coalesce_into_one_alert(system):
+    first = signal(system, 'MEDIUM')
+    repeat = signal(system, 'MEDIUM')
+    other_animal = signal(system, 'MEDIUM', animal='COW-2')
+
+    assert repeat['alert_id'] == first['alert_id']
+    assert repeat['occurrences'] == 2
+    assert other_animal['alert_id'] != first['alert_id']
+    assert len(system.get_active_alerts()) == 2
+    assert system.coalescer.stats()['coalesced_signals'] == 1
+
+
+def test_more_severe_repeat_escalates_in_place(system):
+    first = signal(system, 'MEDIUM')
+    system.acknowledge_alert(first['alert_id'])
+    escalated = signal(system, 'CRITICAL')
+    milder = signal(system, 'LOW')
+
+    assert escalated['alert_id'] == first['alert_id']
+    assert escalated['severity'] == 'CRITICAL' and escalated['escalated_from'] == 'MEDIUM'
+    assert escalated['acknowledged'] is False
+    assert milder['severity'] == 'CRITICAL' and milder['occurrences'] == 3
+    assert system.coalescer.stats()['escalations'] == 1
+
+
+def test_repeats_after_resolve_are_suppressed_unless_more_severe(system):
+    first = signal(system, 'HIGH')
+    assert system.resolve_alert(first['alert_id'])
+    assert system.get_active_alerts() == []
+
+    suppressed = signal(system, 'HIGH')
+    assert suppressed['alert_id'] == first['alert_id']
+    assert suppressed['status'] == 'RESOLVED'
+    assert system.get_active_alerts() == []
+    assert system.coalescer.stats()['suppressed_signals'] == 1
+
+    worse = signal(system, 'CRITICAL')
+    assert worse['alert_id'] != first['alert_id'] and worse['status'] == 'ACTIVE'
+
+
+def test_signal_after_the_window_starts_a_new_alert(system):
+    first = signal(system, 'HIGH')
+    system.resolve_alert(first['alert_id'])
+    system.coalescer.clock.now += system.coalescer.window_for('HEALTH_RISK') + 1
+
+    fresh = signal(system, 'HIGH')
+    assert fresh['alert_id'] != first['alert_id']
+    assert [alert['alert_id'] for alert in system.get_active_alerts()] == [fresh['alert_id']]
+
+
+def test_quiet_active_alert_is_not_extended_after_the_window(system):
+    first = signal(system, 'HIGH')
+    system.coalescer.clock.now += system.coalescer.window_for('HEALTH_RISK') + 1
+
+    assert signal(system, 'HIGH')['alert_id'] != first['alert_id']
+
+
+def test_escalation_after_another_process_resolved_raises_a_new_alert(tmp_path):
+    db = tmp_path / 'alerts.db'
+    a = BiosecurityAlertSystem(store=SQLiteAlertStore(db), clock=FakeClock())
+    b = BiosecurityAlertSystem(store=SQLiteAlertStore(db), clock=FakeClock())
+
+    first = signal(a, 'HIGH')
+    assert b.resolve_alert(first['alert_id'])
+    with a.batch():
+        escalated = signal(a, 'CRITICAL')
+
+    assert escalated['alert_id'] != first['alert_id']
+    assert escalated['status'] == 'ACTIVE' and escalated['severity'] == 'CRITICAL'
+    old = a.store.get(first['alert_id'])
+    assert (old['status'], old['severity']) == ('RESOLVED', 'HIGH')
+    assert [alert['alert_id'] for alert in b.get_active_alerts()] == [escalated['alert_id']]
+
+
+def test_coalescing_builds_on_writes_from_other_processes(tmp_path):
+    db = tmp_path / 'alerts.db'
+    a = BiosecurityAlertSystem(store=SQLiteAlertStore(db), clock=FakeClock())
+    first = signal(a, 'MEDIUM')
+    # Another process escalates the same alert, then ours sees a milder repeat
+    other = SQLiteAlertStore(db)
+    other.modify_active(first['alert_id'], lambda alert: {'severity': 'CRITICAL',
+                                                          'occurrences': alert['occurrences'] + 1})
+    repeat = signal(a, 'HIGH')
+
+    assert repeat['alert_id'] == first['alert_id']
+    stored = other.get(first['alert_id'])
+    assert stored['severity'] == 'CRITICAL'    # not downgraded
+    assert stored['occurrences'] == 3
+
+
+def test_clear_resolves_active_alerts_and_keeps_history(system):
+    first = signal(system, 'HIGH')
+    second = signal(system, 'LOW', animal='COW-2')
+    system.resolve_alert(second['alert_id'])
+    system.clear_all_alerts()
+
+    assert system.get_active_alerts() == []
+    assert system.get_alert_summary()['total_active'] == 0
+    history = {alert['alert_id']: alert for alert in system.get_alert_history()}
+    assert set(history) == {first['alert_id'], second['alert_id']}
+    assert history[first['alert_id']]['status'] == 'RESOLVED'
+    assert history[first['alert_id']]['resolution_note'] == 'Cleared'
+    assert history[second['alert_id']]['resolution_note'] == ''
+
+
+def test_batch_writes_commit_together_including_coalesced_signals(tmp_path):
+    db = tmp_path / 'alerts.db'
+    system = BiosecurityAlertSystem(store=SQLiteAlertStore(db), clock=FakeClock())
+    other = SQLiteAlertStore(db)
+
+    with system.batch():
+        first = signal(system, 'MEDIUM')
+        signal(system, 'HIGH')
+        assert first['alert_id'] in system.store
+        assert other.get(first['alert_id']) is None
+    stored = other.get(first['alert_id'])
+    assert (stored['severity'], stored['occurrences']) == ('HIGH', 2)
+
+
+def test_coalesced_patch_does_not_revive_an_alert_resolved_during_the_batch(tmp_path):
+    db = tmp_path / 'alerts.db'
+    system = BiosecurityAlertSystem(store=SQLiteAlertStore(db), clock=FakeClock())
+    other = SQLiteAlertStore(db)
+    first = signal(system, 'MEDIUM')
+
+    with system.batch():
+        signal(system, 'CRITICAL')
+        other.resolve(first['alert_id'])
+    stored = other.get(first['alert_id'])
+    assert (stored['status'], stored['severity']) == ('RESOLVED', 'MEDIUM')
+
+
+def test_other_threads_write_outside_an_open_batch(tmp_path):
+    db = tmp_path / 'alerts.db'
+    system = BiosecurityAlertSystem(store=SQLiteAlertStore(db), clock=FakeClock())
+    first = signal(system, 'HIGH')
+    other = SQLiteAlertStore(db)
+
+    with pytest.raises(RuntimeError), system.batch():
+        signal(system, 'LOW', animal='COW-2')
+        thread = threading.Thread(target=system.resolve_alert, args=(first['alert_id'],))
+        thread.start()
+        thread.join()
+        # Committed by its own thread, not queued behind this batch
+        assert other.get(first['alert_id'])['status'] == 'RESOLVED'
+        raise RuntimeError("scan failed")
+    assert other.get(first['alert_id'])['status'] == 'RESOLVED'
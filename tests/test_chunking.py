@@ -0,0 +1,91 @@
+import random
+import sys
+
+import pytest
+
+from real_data_ingestion import SemanticChunker
+
+WORDS = ("cattle herd fever milk yield lameness vaccine pasture feed water barn "
+         "rumen calf heifer dairy soil crop rain irrigation").split()
+
+
+def document(n_sentences, seed=0):
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(n_sentences):
+        words = rng.choices(WORDS, k=rng.randint(3, 40))
+        sentences.append(' '.join(words).capitalize() + rng.choice('.!?'))
+    return ' '.join(sentences)
+
+
+def greedy_chunks(sentences, chunk_size, overlap):
+    """The length-only packing the chunker used before boundaries were scored."""
+    def overlap_sentences(chunk):
+        kept, text = [], ''
+        for sentence in reversed(chunk):
+            if len(text) + len(sentence) > overlap:
+                break
+            kept.insert(0, sentence)
+            text += sentence
+        return kept
+
+    chunks, current, length = [], [], 0
+    for sentence in sentences:
+        if length + len(sentence) > chunk_size and current:
+            chunks.append(' '.join(current))
+            current = overlap_sentences(current)
+            length = sum(len(s) for s in current)
+        current.append(sentence)
+        length += len(sentence)
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('chunk_size, overlap', [(300, 60), (1000, 200), (2000, 200)])
+def test_length_mode_matches_greedy_packing(seed, chunk_size, overlap):
+    chunker = SemanticChunker(chunk_size=chunk_size, overlap=overlap, mode='length')
+    text = document(120, seed)
+
+    expected = greedy_chunks(chunker.split_into_sentences(text), chunk_size, overlap)
+    assert chunker.semantic_chunk(text) == expected
+
+
+def test_chunk_pages_matches_whole_text():
+    chunker = SemanticChunker(chunk_size=500, overlap=100, mode='length')
+    text = document(200, seed=7)
+    cuts = sorted(random.Random(7).sample(range(1, len(text)), 40))
+    pages = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+    assert list(chunker.chunk_pages(pages)) == chunker.semantic_chunk(text)
+
+
+def test_single_sentence_document_is_returned_as_is():
+    chunker = SemanticChunker(mode='length')
+    assert chunker.semantic_chunk("  Only one sentence here. ") == ["  Only one sentence here. "]
+    assert list(chunker.chunk_pages(["  Only one ", "sentence here. "])) == ["  Only one sentence here. "]
+
+
+def test_fast_mode_never_loads_sentence_transformers(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'sentence_transformers', None)
+    chunker = SemanticChunker(chunk_size=400, overlap=0, mode='fast')
+
+    chunks = chunker.semantic_chunk(document(60))
+    assert len(chunks) > 1
+    # Like the length packing, chunk_size counts sentence characters, not the joining spaces
+    assert all(sum(map(len, chunker.split_into_sentences(chunk))) <= 400 for chunk in chunks)
+
+
+def test_fast_mode_breaks_at_the_topic_change():
+    rng = random.Random(0)
+
+    def topic(words):
+        return ' '.join(' '.join(rng.choices(words.split(), k=rng.randint(15, 25))).capitalize() + '.'
+                        for _ in range(15))
+
+    dairy = topic("dairy cows milk parlour udder mastitis heifer calving lactation teat")
+    crops = topic("wheat seedlings irrigation drought field tillage fertilizer harvest sowing rainfall")
+    chunker = SemanticChunker(chunk_size=50_000, overlap=0, mode='fast', min_chunk_size=500)
+
+    assert chunker.semantic_chunk(dairy + ' ' + crops) == [dairy, crops]
@@ -0,0 +1,42 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from livestock_biosecurity.compiled_trees import compile_estimator, verify_compiled
+from livestock_biosecurity.models import SMALL_BATCH_ROWS, compile_models
+
+
+@pytest.mark.parametrize('name', ['health_predictor', 'anomaly_detector',
+                                  'gait_predictor', 'disease_forecaster'])
+def test_compiled_estimator_matches_sklearn(trained_models, name):
+    original = trained_models[name].model
+    compiled = compile_estimator(original)
+    X = np.random.default_rng(1).normal(scale=2.0, size=(3000, original.n_features_in_))
+
+    ok, max_diff = verify_compiled(original, compiled, X)
+    assert ok, f"max diff {max_diff}"
+    np.testing.assert_array_equal(compiled.predict(X), original.predict(X))
+
+
+def test_compiled_models_predict_like_sklearn(trained_models, herd_df):
+    compiled = compile_models(copy.deepcopy(trained_models))
+    # Batches this small are served by the compiled trees, not the kept sklearn model
+    rows = herd_df.head(SMALL_BATCH_ROWS)
+
+    for name, wrapper in trained_models.items():
+        assert type(compiled[name].model).__name__.startswith('Compiled')
+        expected = wrapper.predict_batch(rows)
+        got = compiled[name].predict_batch(rows)
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(got, expected)
+        else:
+            assert got == expected
+
+
+def test_unsupported_estimator_is_rejected():
+    from sklearn.linear_model import LogisticRegression
+
+    with pytest.raises(TypeError):
+        compile_estimator(LogisticRegression())
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pandas as pd
+
+from livestock_biosecurity.data_generator import LivestockDataGenerator
+
+
+def generate(out_dir, workers):
+    return LivestockDataGenerator(seed=3).generate_sharded(
+        out_dir, n_animals=50, n_days=3, shard_size=20, workers=workers, fmt='csv')
+
+
+def test_sharded_output_does_not_depend_on_worker_count(tmp_path):
+    serial = generate(tmp_path / 'serial', workers=1)
+    parallel = generate(tmp_path / 'parallel', workers=3)
+
+    assert [shard['animals'] for shard in serial] == [20, 20, 10]
+    for a, b in zip(serial, parallel):
+        assert {k: v for k, v in a.items() if k != 'path'} == {k: v for k, v in b.items() if k != 'path'}
+        assert Path(a['path']).read_bytes() == Path(b['path']).read_bytes()
+
+
+def test_shards_cover_every_animal_once(tmp_path):
+    shards = generate(tmp_path, workers=1)
+    df = pd.concat([pd.read_csv(shard['path']) for shard in shards], ignore_index=True)
+
+    assert df['animal_id'].nunique() == 50
+    assert len(df) == sum(shard['records'] for shard in shards)
+    assert df.groupby('animal_id').size().eq(3).all()    # one reading per animal per day
@@ -0,0 +1,69 @@
+import numpy as np
+
+from embedding_cache import INITIAL_CAPACITY, EmbeddingCache
+
+
+def vector(i, dimension=8):
+    return np.random.default_rng(i).normal(size=dimension).astype(np.float32).tolist()
+
+
+def test_files_grow_on_demand(tmp_path):
+    cache = EmbeddingCache('model', tmp_path, capacity=10 * INITIAL_CAPACITY)
+    cache.put('first', vector(0))
+    assert cache.stats()['slots'] == INITIAL_CAPACITY
+
+    n = INITIAL_CAPACITY + 1
+    cache.put_many([f"text {i}" for i in range(n)], [vector(i) for i in range(n)])
+    assert cache.stats()['slots'] == 2 * INITIAL_CAPACITY
+    assert len(cache) == n + 1
+    assert cache.get('first') == vector(0)
+    assert cache.get(f"text {n - 1}") == vector(n - 1)
+
+
+def test_least_recently_used_entry_is_evicted_at_capacity(tmp_path):
+    cache = EmbeddingCache('model', tmp_path, capacity=3)
+    for i in range(3):
+        cache.put(f"text {i}", vector(i))
+    cache.get('text 0')
+    cache.put('text 3', vector(3))
+
+    assert cache.stats()['slots'] == 3
+    assert cache.get('text 1') is None
+    assert [cache.get(f"text {i}") for i in (0, 2, 3)] == [vector(0), vector(2), vector(3)]
+
+
+def test_zero_vectors_are_not_cached(tmp_path):
+    cache = EmbeddingCache('model', tmp_path)
+    cache.put('failed', [0.0] * 8)
+    assert len(cache) == 0 and cache.get('failed') is None
+
+
+def test_writes_are_seen_by_other_instances(tmp_path):
+    a = EmbeddingCache('model', tmp_path)
+    b = EmbeddingCache('model', tmp_path)
+    a.put('from a', vector(1))
+    assert b.get('from a') == vector(1)
+
+    # b reloads before writing, so neither write is lost, including across a resize
+    n = INITIAL_CAPACITY
+    b.put_many([f"from b {i}" for i in range(n)], [vector(i) for i in range(n)])
+    a.put('again from a', vector(2))
+    reopened = EmbeddingCache('model', tmp_path)
+    assert len(reopened) == n + 2
+    assert reopened.get('from a') == vector(1)
+    assert reopened.get(f"from b {n - 1}") == vector(n - 1)
+    assert reopened.get('again from a') == vector(2)
+
+
+def test_eviction_order_counts_hits_from_every_instance(tmp_path):
+    a = EmbeddingCache('model', tmp_path, capacity=3)
+    b = EmbeddingCache('model', tmp_path, capacity=3)
+    for i in range(3):
+        a.put(f"text {i}", vector(i))
+    # Only b uses text 0 again; a must still see it as recently used
+    assert b.get('text 0') == vector(0)
+    a.put('text 3', vector(3))
+
+    reopened = EmbeddingCache('model', tmp_path, capacity=3)
+    assert reopened.get('text 1') is None
+    assert [reopened.get(f"text {i}") for i in (0, 2, 3)] == [vector(0), vector(2), vector(3)]
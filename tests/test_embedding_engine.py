@@ -0,0 +1,143 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from embedding_cache import EmbeddingCache
+from embedding_engine import BatchEmbeddingEngine
+
+
+def fake_embedding(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0]
+
+
+class FakeOllama:
+    """Local stand-in for the Ollama embedding API.
+
+    ``fail_embed`` HTTP statuses are returned, in order, to the next
+    ``/api/embed`` requests; ``legacy`` makes ``/api/embed`` a 404, as on
+    Ollama builds that only have ``/api/embeddings``.
+    """
+
+    def __init__(self):
+        self.fail_embed = []
+        self.legacy = False
+        self.requests = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with fake._lock:
+                    fake.requests.append((self.path, body))
+                    status = fake.fail_embed.pop(0) if self.path == '/api/embed' and fake.fail_embed else 200
+                if self.path == '/api/embed' and fake.legacy:
+                    status = 404
+                if status != 200:
+                    self.send_response(status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                # Out-of-order completion across concurrent requests
+                time.sleep(random.uniform(0, 0.01))
+                if self.path == '/api/embed':
+                    payload = {'embeddings': [fake_embedding(text) for text in body['input']]}
+                else:
+                    payload = {'embedding': fake_embedding(body['prompt'])}
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+
+@pytest.fixture
+def ollama():
+    fake = FakeOllama()
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+def engine_for(ollama, **kwargs):
+    kwargs = {'batch_size': 4, 'max_workers': 4, 'backoff': 0, 'dimension': 3, **kwargs}
+    return BatchEmbeddingEngine(base_url=ollama.url, **kwargs)
+
+
+def test_batches_keep_input_order(ollama):
+    texts = [f"sentence number {i}" + "!" * i for i in range(50)]
+    embeddings = engine_for(ollama).embed(texts)
+
+    assert embeddings == [fake_embedding(text) for text in texts]
+    assert ollama.paths() == ['/api/embed'] * 13
+
+
+def test_stream_keeps_batch_order(ollama):
+    batches = [[f"batch {b} text {i}" for i in range(3)] for b in range(10)]
+    results = list(engine_for(ollama).embed_stream(iter(batches)))
+
+    assert [batch for batch, _ in results] == batches
+    for batch, embeddings in results:
+        assert embeddings == [fake_embedding(text) for text in batch]
+
+
+def test_retries_transient_503(ollama):
+    ollama.fail_embed = [503, 503]
+    embeddings = engine_for(ollama, max_retries=3).embed(["a", "bb"])
+
+    assert embeddings == [fake_embedding("a"), fake_embedding("bb")]
+    assert ollama.paths() == ['/api/embed'] * 3
+
+
+def test_gives_up_with_none_and_caches_nothing(ollama, tmp_path):
+    ollama.fail_embed = [503] * 10
+    cache = EmbeddingCache('fake', tmp_path)
+    engine = engine_for(ollama, max_retries=1, cache=cache)
+
+    assert engine.embed(["a", "bb"]) == [None, None]
+    assert engine.last_stats['failed'] == 2
+    assert len(cache) == 0
+    # Search queries still get a (zero) vector
+    assert engine.embed_one("a") == [0.0, 0.0, 0.0]
+
+
+def test_client_errors_are_not_retried(ollama):
+    ollama.fail_embed = [400]
+    assert engine_for(ollama, max_retries=3).embed(["a"]) == [None]
+    assert ollama.paths() == ['/api/embed']
+
+
+def test_404_falls_back_to_single_text_endpoint(ollama):
+    ollama.legacy = True
+    engine = engine_for(ollama, max_workers=1)
+    texts = ["first", "second", "third", "fourth", "fifth"]
+
+    assert engine.embed(texts) == [fake_embedding(text) for text in texts]
+    # /api/embed is tried once; every text then goes to /api/embeddings
+    assert ollama.paths() == ['/api/embed'] + ['/api/embeddings'] * len(texts)
+
+
+def test_cached_texts_are_not_sent_again(ollama, tmp_path):
+    engine = engine_for(ollama, cache=EmbeddingCache('fake', tmp_path))
+    texts = [f"text {i}" for i in range(6)]
+    engine.embed(texts)
+    sent = len(ollama.requests)
+
+    assert engine.embed(texts + ["new text"]) == [fake_embedding(t) for t in texts + ["new text"]]
+    assert len(ollama.requests) == sent + 1
+    assert ollama.requests[-1][1]['input'] == ["new text"]
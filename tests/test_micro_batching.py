@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+from livestock_biosecurity.micro_batching import MicroBatcher
+
+
+def test_requests_are_batched_in_order():
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        return [i * 2 for i in items]
+
+    async def main():
+        batcher = MicroBatcher(double, max_batch_rows=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+        await batcher.aclose()
+        return results
+
+    assert asyncio.run(main()) == [i * 2 for i in range(8)]
+    assert sum(sizes) == 8 and max(sizes) > 1
+
+
+def test_dead_scheduler_fails_held_requests_and_restarts_on_the_same_queue():
+    release = threading.Event()
+
+    def blocking(items):
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(blocking, max_batch_rows=2, max_wait_ms=1)
+        held = [asyncio.create_task(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.05)          # first batch is running
+        queued = [asyncio.create_task(batcher.submit(i)) for i in range(2, 4)]
+        await asyncio.sleep(0.01)
+        batcher._task.cancel()             # the scheduler dies
+        await asyncio.sleep(0)
+        release.set()
+        late = await asyncio.wait_for(batcher.submit(4), 5)
+        results = await asyncio.wait_for(asyncio.gather(*held, *queued, return_exceptions=True), 5)
+        await batcher.aclose()
+        return late, results
+
+    late, results = asyncio.run(main())
+    assert late == 4
+    assert all(isinstance(r, asyncio.CancelledError) for r in results[:2])
+    assert results[2:] == [2, 3]
+
+
+def test_batcher_survives_a_new_event_loop():
+    batcher = MicroBatcher(lambda items: [i + 1 for i in items])
+
+    async def one():
+        return await batcher.submit(1)
+
+    assert asyncio.run(one()) == 2
+    assert asyncio.run(one()) == 2
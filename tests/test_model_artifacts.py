@@ -0,0 +1,62 @@
+import json
+
+from livestock_biosecurity.artifacts import current_version, KEEP_VERSIONS, LazyEstimator
+from livestock_biosecurity.models import load_models, save_models
+
+
+def test_round_trip_matches_trained_models(tmp_path, trained_models, herd_df):
+    save_models(trained_models, tmp_path)
+    loaded = load_models(tmp_path)
+
+    assert sorted(loaded) == sorted(trained_models)
+    for name, model in trained_models.items():
+        assert isinstance(loaded[name].model, LazyEstimator)
+        assert loaded[name].features == model.features
+        expected = model.predict_batch(herd_df)
+        actual = loaded[name].predict_batch(herd_df)
+        assert actual.equals(expected), name
+
+
+def test_both_backends_load_from_one_save(tmp_path, trained_models, herd_df):
+    save_models(trained_models, tmp_path)
+    compiled = load_models(tmp_path, backend='compiled')
+    sklearn = load_models(tmp_path, backend='sklearn')
+
+    assert sorted(compiled) == sorted(sklearn) == sorted(trained_models)
+    for name in trained_models:
+        assert type(sklearn[name].model).__module__.startswith('sklearn.')
+        assert compiled[name].predict_batch(herd_df).equals(sklearn[name].predict_batch(herd_df)), name
+
+
+def test_fast_tier_without_student_falls_back_with_warning(tmp_path, trained_models, capsys):
+    save_models(trained_models, tmp_path)
+    for backend in ('compiled', 'sklearn'):
+        models = load_models(tmp_path, backend=backend, tier='fast')
+        assert "No distilled disease_forecaster_fast" in capsys.readouterr().out
+        assert 'disease_forecaster' in models
+
+
+def test_save_publishes_a_new_version_atomically(tmp_path, trained_models, herd_df):
+    save_models(trained_models, tmp_path)
+    first = current_version(tmp_path)
+    served = load_models(tmp_path)   # arrays not mapped yet
+
+    save_models(trained_models, tmp_path)
+    second = current_version(tmp_path)
+    assert second != first
+    manifest = json.loads((second / 'manifest.json').read_text())
+    assert sorted(manifest['models']) == sorted(trained_models)
+
+    # The earlier load keeps reading its own version
+    expected = trained_models['gait_predictor'].predict_batch(herd_df)
+    assert served['gait_predictor'].predict_batch(herd_df).equals(expected)
+    assert served['gait_predictor'].model._directory == first / 'gait_predictor'
+
+
+def test_old_versions_are_pruned(tmp_path, trained_models):
+    models = {'gait_predictor': trained_models['gait_predictor']}
+    for _ in range(KEEP_VERSIONS + 2):
+        save_models(models, tmp_path)
+    versions = sorted(p for p in tmp_path.iterdir() if p.is_dir())
+    assert len(versions) == KEEP_VERSIONS
+    assert current_version(tmp_path) == versions[-1]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from livestock_biosecurity.timeseries import AnimalSeriesStore
+
+
+def test_rolling_stats_match_numpy():
+    store = AnimalSeriesStore(['a'], capacity=4)
+    samples = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0]
+    for t, value in enumerate(samples):
+        store.update(['cow'], {'a': [value]}, timestamp=t)
+
+    stats = store.stats(['cow', 'unknown'])
+    window = samples[-4:]
+    assert stats['samples'].tolist() == [4, 0]
+    assert stats['a']['mean'][0] == pytest.approx(np.mean(window))
+    assert stats['a']['slope'][0] == pytest.approx(np.polyfit(range(4), window, 1)[0])
+
+
+def test_eviction_spares_animals_of_the_same_update():
+    store = AnimalSeriesStore(['a'], capacity=4, max_animals=10)
+    store.update(list(range(10)), {'a': np.arange(10.0)}, timestamp=1)
+    new = list(range(10, 15))
+    store.update(new, {'a': np.arange(10.0, 15.0)}, timestamp=2)
+
+    assert all(animal in store for animal in new)
+    stats = store.stats(new)
+    assert stats['samples'].tolist() == [1] * 5
+    assert stats['a']['mean'].tolist() == [10.0, 11.0, 12.0, 13.0, 14.0]
+    # Five of the older animals made room; the rest keep their own samples
+    old = [animal for animal in range(10) if animal in store]
+    assert len(old) == 5
+    assert store.stats(old)['a']['mean'].tolist() == [float(animal) for animal in old]
+
+
+def test_existing_animal_in_the_update_is_not_evicted():
+    store = AnimalSeriesStore(['a'], capacity=4, max_animals=10)
+    store.update(list(range(10)), {'a': np.arange(10.0)}, timestamp=1)
+    store.update(list(range(1, 10)), {'a': np.arange(1.0, 10.0)}, timestamp=2)
+    # Animal 0 is the least recently updated, but it is part of this update
+    store.update([0, 10], {'a': [100.0, 10.0]}, timestamp=3)
+
+    stats = store.stats([0, 10])
+    assert stats['samples'].tolist() == [2, 1]
+    assert stats['a']['mean'].tolist() == [50.0, 10.0]
+
+
+def test_update_with_more_animals_than_capacity_is_rejected():
+    store = AnimalSeriesStore(['a'], max_animals=3)
+    with pytest.raises(ValueError):
+        store.update(list(range(4)), {'a': np.zeros(4)})
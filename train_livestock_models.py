@@ -4,13 +4,33 @@
 Generates synthetic data, trains all ML models, evaluates performance,
 and saves trained models to disk for use by the dashboard.
 
+The four models are independent, so they are fitted concurrently in a
+process pool (slowest first). The generated DataFrame is written once as
+memory-mapped column files (``SharedFrame``) that every worker opens,
+instead of being pickled to each of them. Workers also compile their
+model's trees; nothing is written to disk until every fit has succeeded,
+and then the training data and artifacts are written via temp files and
+renames.
+
+With ``--tune`` the hyperparameters are first searched by successive
+halving (see ``livestock_biosecurity.tuning``), scored on accuracy and on
+single-row / batch inference latency; the models are then trained with each
+model's recommended Pareto-optimal point and the search report is saved.
+``--params`` reuses the recommendations of an earlier report.
+
+The disease forecaster is then distilled into a shallow student (see
+``livestock_biosecurity.distillation``), which is saved alongside it as the
+"fast" tier of ``load_models`` when its accuracy drop is within tolerance.
+
 Usage:
-    python train_livestock_models.py
+    python train_livestock_models.py [--workers N] [--tune | --params tuning_results.json] [--no-distill]
 """
 
 import sys
 import os
 import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -22,32 +42,136 @@ from livestock_biosecurity.models import (
     GaitPredictor,
     DiseaseForecaster,
     save_models,
+    artifact_entry,
+    FAST_TIER,
 )
+from livestock_biosecurity.shared_frame import SharedFrame
+from livestock_biosecurity import tuning, distillation
+
+
+# Model fits, slowest first so the long gradient-boosting fits start at once
+STAGES = {
+    'disease_forecaster': (DiseaseForecaster, {}),
+    'gait_predictor': (GaitPredictor, {}),
+    'health_predictor': (HealthPredictor, {}),
+    'anomaly_detector': (AnomalyDetector, {'contamination': 0.08}),
+}
+
+
+def train_stage(name, data, n_jobs=None, params=None):
+    """
+    Fit and compile one model (runs in a worker process).
+
+    Args:
+        name: key of ``STAGES``
+        data: the training DataFrame, or a ``SharedFrame`` handle to it
+        n_jobs: thread budget for estimators that parallelize internally
+        params: estimator hyperparameters overriding the model's defaults
+
+    Returns:
+        (name, fitted wrapper, artifact entry, {'fit', 'compile', 'start', 'end'})
+    """
+    started = time.time()
+    df = data.load() if isinstance(data, SharedFrame) else data
+    cls, kwargs = STAGES[name]
+    model = cls(**kwargs)
+    if params:
+        model.model.set_params(**params)
+    if n_jobs is not None and hasattr(model.model, 'n_jobs'):
+        model.model.n_jobs = n_jobs
+    model.train(df)
+    fitted = time.time()
+    entry = artifact_entry(name, model)
+    done = time.time()
+    return name, model, entry, {'fit': fitted - started, 'compile': done - fitted, 'start': started, 'end': done}
+
+
+def train_models(df, workers=None, params=None):
+    """Run every stage of ``STAGES``, concurrently when more than one worker is available."""
+    params = params or {}
+    cpus = os.cpu_count() or 1
+    workers = min(workers or cpus, len(STAGES))
+    if workers <= 1:
+        return [train_stage(name, df, params=params.get(name)) for name in STAGES]
+    # Split the cores between the concurrent fits
+    n_jobs = max(1, cpus // workers)
+    with SharedFrame.create(df) as shared, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(train_stage, name, shared, n_jobs, params.get(name)) for name in STAGES]
+        return [future.result() for future in futures]
+
+
+def write_csv_atomic(df, path):
+    tmp = f"{path}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
 
 
-def main():
+def main(workers=None, tune=False, tune_candidates=27, params_path=None, distill=True):
     print("=" * 65)
     print("🐄  LIVESTOCK BIOSECURITY — MODEL TRAINING PIPELINE")
     print("=" * 65)
     start_time = time.time()
+    timings = {}
 
     # ── Step 1: Generate Synthetic Data ──────────────────────────────
     print("\n📊 Step 1: Generating Synthetic IoT Sensor Data...")
     print("-" * 50)
+    t = time.time()
     generator = LivestockDataGenerator(seed=42)
     df = generator.generate_dataset(n_animals=250, n_days=30, anomaly_rate=0.20)
-
-    # Save training data
     data_path = "livestock_training_data.csv"
-    df.to_csv(data_path, index=False)
-    print(f"   📁 Training data saved → {data_path}")
     print(f"   📏 Shape: {df.shape}")
+    timings['Data generation'] = time.time() - t
 
-    # ── Step 2: Train Health Predictor ───────────────────────────────
-    print("\n🏥 Step 2: Training Health Risk Classifier (Random Forest)...")
+    # ── Optional: Hyperparameter Search ──────────────────────────────
+    params = None
+    if tune:
+        print("\n🎛️  Hyperparameter search (successive halving, accuracy × latency)...")
+        print("-" * 50)
+        t = time.time()
+        report = tuning.successive_halving(df, n_candidates=tune_candidates, workers=workers)
+        for name, entry in report.items():
+            print(tuning.format_front(name, entry))
+        params_path = params_path or "tuning_results.json"
+        tuning.save_results(report, params_path)
+        print(f"   📁 Search report saved → {params_path}")
+        params = tuning.recommended_params(report)
+        timings['Hyperparameter search'] = time.time() - t
+    elif params_path:
+        params = tuning.recommended_params(tuning.load_results(params_path))
+        print(f"\n🎛️  Using recommended hyperparameters from {params_path}")
+
+    # ── Step 2: Train All Models ─────────────────────────────────────
+    print("\n🧠 Step 2: Training Models (RF, Isolation Forest, 2× Gradient Boosting)...")
     print("-" * 50)
-    health_model = HealthPredictor()
-    health_metrics = health_model.train(df)
+    t = time.time()
+    results = train_models(df, workers, params)
+    timings['Training (wall)'] = time.time() - t
+    trained = {name: model for name, model, _, _ in results}
+    entries = {name: entry for name, _, entry, _ in results}
+    stage_times = {name: stage for name, _, _, stage in results}
+    health_model = trained['health_predictor']
+    anomaly_model = trained['anomaly_detector']
+    gait_model = trained['gait_predictor']
+    disease_model = trained['disease_forecaster']
+
+    # ── Distillation: Fast-Tier Students ─────────────────────────────
+    students = {}
+    if distill:
+        print("\n🎓 Distilling fast-tier students (teacher predict_proba → shallow trees)...")
+        print("-" * 50)
+        t = time.time()
+        for name, distill_model in distillation.DISTILLERS.items():
+            student, report = distill_model(trained[name], df)
+            print(distillation.format_report(name, report))
+            if report['ship']:
+                students[FAST_TIER[name]] = student
+        timings['Distillation'] = time.time() - t
+
+    # ── Step 3: Health Predictor Report ──────────────────────────────
+    print("\n🏥 Step 3: Health Risk Classifier (Random Forest)...")
+    print("-" * 50)
+    health_metrics = health_model.metrics
     print(f"\n   📋 Classification Report:\n{health_metrics['report']}")
 
     # Feature importance (top 10)
@@ -57,35 +181,34 @@ def main():
         bar = '█' * int(imp * 100)
         print(f"      {feat:30s} {imp:.4f} {bar}")
 
-    # ── Step 3: Train Anomaly Detector ───────────────────────────────
-    print("\n🔍 Step 3: Training Anomaly Detector (Isolation Forest)...")
-    print("-" * 50)
-    anomaly_model = AnomalyDetector(contamination=0.08)
-    anomaly_metrics = anomaly_model.train(df)
+    anomaly_metrics = anomaly_model.metrics
+    gait_metrics = gait_model.metrics
+    disease_metrics = disease_model.metrics
+    print(f"\n   🦠 Disease classes: {disease_metrics['classes']}")
 
-    # ── Step 4: Train Gait Predictor ─────────────────────────────────
-    print("\n🦿 Step 4: Training Gait Score Predictor (Gradient Boosting)...")
-    print("-" * 50)
-    gait_model = GaitPredictor()
-    gait_metrics = gait_model.train(df)
-
-    # ── Step 5: Train Disease Forecaster ─────────────────────────────
-    print("\n🦠 Step 5: Training Disease Forecaster (Gradient Boosting)...")
-    print("-" * 50)
-    disease_model = DiseaseForecaster()
-    disease_metrics = disease_model.train(df)
-    print(f"   Disease classes: {disease_metrics['classes']}")
-
-    # ── Step 6: Save All Models ──────────────────────────────────────
-    print("\n💾 Step 6: Saving Trained Models...")
+    # ── Step 4: Save Data and Models ─────────────────────────────────
+    print("\n💾 Step 4: Saving Training Data and Models...")
     print("-" * 50)
+    t = time.time()
+    write_csv_atomic(df, data_path)
+    print(f"   📁 Training data saved → {data_path}")
     models_dict = {
         'health_predictor': health_model,
         'anomaly_detector': anomaly_model,
         'gait_predictor': gait_model,
         'disease_forecaster': disease_model,
+        **students,
     }
-    save_models(models_dict, save_dir='trained_models')
+    save_models(models_dict, save_dir='trained_models', entries=entries)
+    timings['Saving'] = time.time() - t
+
+    # ── Timing Breakdown ─────────────────────────────────────────────
+    print("\n⏱️  Stage timings:")
+    for stage, seconds in timings.items():
+        print(f"      {stage:28s} {seconds:7.2f}s")
+    for name, stage in stage_times.items():
+        print(f"        {name:26s} fit {stage['fit']:6.2f}s  compile {stage['compile']:5.2f}s  "
+              f"(+{stage['start'] - start_time:.1f}s → +{stage['end'] - start_time:.1f}s)")
 
     # ── Summary ──────────────────────────────────────────────────────
     elapsed = time.time() - start_time
@@ -121,4 +244,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the livestock biosecurity models")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="concurrent model fits (default: CPU count, at most 4)")
+    parser.add_argument('--tune', action='store_true',
+                        help="search hyperparameters first and train with the recommended ones")
+    parser.add_argument('--tune-candidates', type=int, default=27,
+                        help="random configurations per model in the first search rung")
+    parser.add_argument('--params', default=None,
+                        help="search report to read recommendations from (or write with --tune)")
+    parser.add_argument('--no-distill', action='store_true',
+                        help="skip fitting the distilled fast-tier models")
+    args = parser.parse_args()
+    main(args.workers, args.tune, args.tune_candidates, args.params, not args.no_distill)